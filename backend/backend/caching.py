@@ -0,0 +1,66 @@
+import hashlib
+import time
+
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+# Tiempo que se guardan las respuestas, las versiones no expiran
+RESPONSE_TIMEOUT = 60*60
+
+# Versión actual de un recurso ('game', 'league'): la fecha (time.time) de su último cambio.
+# Se guarda en el caché 'versions', compartido por todos los procesos (ver settings.py)
+def resourceVersion(resource):
+    key = f'version:{resource}'
+    versions = caches['versions']
+    version = versions.get(key)
+    if version is None:
+        versions.add(key, time.time(), None)
+        version = versions.get(key)
+    return version
+
+# Marca los recursos como modificados, invalidando las respuestas guardadas que dependen de ellos
+def bumpResource(*resources):
+    now = time.time()
+    for resource in resources:
+        caches['versions'].set(f'version:{resource}', now, None)
+
+# Igual a bumpResource, pero espera a que termine la transacción en curso
+def bumpOnCommit(*resources):
+    transaction.on_commit(lambda: bumpResource(*resources))
+
+class CachedResponseMixin:
+    """
+    Mixin de vistas GET que guarda las respuestas en el caché de Django.
+    - La vista indica en cache_resources de qué recursos depende, p.ej. ('game', 'league')
+    - Cada recurso tiene una versión que se cambia al guardar sus modelos (ver signals.py de
+      cada app), así una respuesta guardada sólo se usa mientras los datos no cambien
+    - Responde ETag y Last-Modified, y 304 si el cliente ya tiene la versión actual
+    """
+
+    cache_resources = tuple()
+
+    def get(self, request, *args, **kwargs):
+        versions = [resourceVersion(resource) for resource in self.cache_resources]
+        lastModified = int(max(versions)) if versions else None
+        identity = f'{request.get_full_path()}|{request.accepted_renderer.format}|{versions}'
+        etag = quote_etag(hashlib.sha1(identity.encode('utf8')).hexdigest())
+
+        # GET condicional: el cliente ya tiene esta versión (el 304 también lleva los validadores)
+        response = get_conditional_response(request, etag=etag, last_modified=lastModified)
+        if response is None:
+            key = f'response:{etag}'
+            data = cache.get(key)
+            if data is None:
+                response = super().get(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                cache.set(key, response.data, RESPONSE_TIMEOUT)
+            else:
+                response = Response(data)
+        response['ETag'] = etag
+        if lastModified is not None:
+            response['Last-Modified'] = http_date(lastModified)
+        return response
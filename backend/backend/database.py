@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# Pragmas por defecto de cada conexión a SQLite, se pueden cambiar con SQLITE_PRAGMAS en settings
+SQLITE_PRAGMAS = {
+    # Con WAL los lectores (la web) no esperan al escritor ni el escritor a los lectores
+    'journal_mode': 'wal',
+    # En WAL, normal sólo sincroniza en los checkpoints: una caída del proceso no pierde datos,
+    # un corte de luz puede perder las últimas transacciones
+    'synchronous': 'normal',
+    # Páginas en caché por conexión, en KiB si es negativo (64 MiB)
+    'cache_size': -65536,
+    'temp_store': 'memory',
+    'mmap_size': 256*2**20,
+}
+
+# Aplica los pragmas apenas se abre una conexión a SQLite
+@receiver(connection_created)
+def configureSqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = {**SQLITE_PRAGMAS, **getattr(settings, 'SQLITE_PRAGMAS', {})}
+    with connection.cursor() as cursor:
+        for pragma, value in pragmas.items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+
+# Mueve el WAL a la base de datos y lo vacía, p.ej. al terminar una escritura masiva
+def checkpoint(connection, mode='truncate'):
+    if connection.vendor != 'sqlite':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA wal_checkpoint({mode})')
+        return cursor.fetchone()
@@ -0,0 +1,46 @@
+import datetime
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+# Convierte el valor de un parámetro según su tipo
+def parseParam(name, value, kind):
+    if kind == 'int':
+        if value.lstrip('-').isdigit():
+            return int(value)
+    elif kind == 'bool':
+        if value.lower() in ['true', '1']:
+            return True
+        if value.lower() in ['false', '0']:
+            return False
+    elif kind == 'datetime':
+        parsed = parse_datetime(value)
+        if parsed is None and parse_date(value) is not None:
+            parsed = datetime.datetime.combine(parse_date(value), datetime.time())
+        if parsed is not None:
+            if timezone.is_naive(parsed):
+                parsed = timezone.make_aware(parsed)
+            return parsed
+    else:
+        return value
+    raise ValidationError({name: f'Valor inválido: {value}'})
+
+class QueryFilterMixin:
+    """
+    Mixin de vistas de lista que filtra por parámetros de la url.
+    - La vista indica en query_filters el parámetro, su lookup del ORM y su tipo,
+      p.ej. {'adventure': ('adventure_id', 'int'), 'since': ('created_at__gte', 'datetime')}
+    - Un valor que no calza con el tipo responde 400 en vez de hacer la consulta
+    """
+
+    query_filters = dict()
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        lookups = dict()
+        for name, (lookup, kind) in self.query_filters.items():
+            value = self.request.query_params.get(name)
+            if value not in [None, '']:
+                lookups[lookup] = parseParam(name, value, kind)
+        return queryset.filter(**lookups)
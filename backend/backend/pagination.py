@@ -0,0 +1,117 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.paginator import Paginator
+from django.db import models
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por llave (keyset) en orden descendente, sin OFFSET.
+    - El cursor guarda la llave de la última fila entregada y la siguiente página parte de ahí,
+      así el costo de una página no depende de cuántas filas haya antes
+    - La vista indica la llave con keyset: ('id',) o (campo, 'id'), donde id desempata filas con
+      el mismo valor (p.ej. tiradas insertadas en el mismo lote, con el mismo created_at)
+    - Para que la página se lea directo de un índice, los filtros de igualdad de la vista y la
+      llave deben formar un prefijo de un índice (p.ej. adventure, characterprogression, created_at)
+    - Sólo avanza: entrega next, no previous
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 100
+    max_page_size = 1000
+
+    ### Class Methods ###
+    # Filas de la página pedida
+    def paginate_queryset(self, queryset, request, view=None):
+        self.__request = request
+        self.__keyset = getattr(view, 'keyset', ('id',))
+        self.__pageSize = self.__getPageSize(request)
+        queryset = queryset.order_by(*[f'-{field}' for field in self.__keyset])
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            key = self.__decode(cursor)
+            if len(self.__keyset) == 1:
+                queryset = queryset.filter(**{f'{self.__keyset[0]}__lt': key[0]})
+            else:
+                # (campo, id) < (valor, último id), escrito como rango sobre campo para que use el índice
+                field, tiebreak = self.__keyset
+                queryset = queryset.filter(**{f'{field}__lte': key[0]}).exclude(**{field: key[0], f'{tiebreak}__gte': key[1]})
+
+        page = list(queryset[:self.__pageSize + 1])
+        self.__hasNext = len(page) > self.__pageSize
+        page = page[:self.__pageSize]
+        self.__last = page[-1] if page else None
+        return page
+
+    # Respuesta con el enlace a la siguiente página
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.__nextLink()),
+            ('results', data)
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    # Enlace a la siguiente página, None si es la última
+    def __nextLink(self):
+        if not self.__hasNext:
+            return None
+        key = [getattr(self.__last, field) for field in self.__keyset]
+        key = [value.isoformat() if hasattr(value, 'isoformat') else value for value in key]
+        cursor = base64.urlsafe_b64encode(json.dumps(key).encode('utf8')).decode('ascii')
+        return replace_query_param(self.__request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    # Llave guardada en el cursor
+    def __decode(self, cursor):
+        try:
+            key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf8'))
+            if len(key) != len(self.__keyset):
+                raise ValueError(cursor)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound('Cursor inválido')
+        if isinstance(key[0], str):
+            key[0] = parse_datetime(key[0]) or key[0]
+        return key
+
+    # Tamaño de página pedido, acotado por max_page_size
+    def __getPageSize(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginador del admin para tablas de millones de filas (p.ej. AdventureLog), sin COUNT(*) completo.
+    - Sin filtros estima el total con el mayor id, que se lee directo del índice de la llave primaria
+      (las filas borradas dejan huecos, así que es una cota superior)
+    - Con filtros cuenta a lo más max_count filas: más allá de eso las páginas quedan acotadas
+      y se debe filtrar más para encontrar lo que se busca
+    """
+
+    max_count = 10000
+
+    # Total de filas, estimado o acotado
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            return queryset.model._default_manager.order_by().aggregate(last=models.Max('pk'))['last'] or 0
+        return queryset.order_by().values('pk')[:self.max_count].count()
@@ -62,6 +62,27 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'backend.urls'
 
+# Caché de la API (ver backend/caching.py)
+# - default: respuestas guardadas. Su llave incluye las versiones de los recursos, así puede ser
+#   propia de cada proceso del servidor
+# - versions: versión de cada recurso. Debe ser compartida por todos los procesos que escriben
+#   (simulate, simulation_worker, import_roster) y los que sirven la API, si no la web nunca se
+#   entera de los cambios y sigue respondiendo 304 con datos viejos
+# Los tests usan una carpeta temporal en vez de backend/cache (ver backend/testing.py)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'simulador',
+        'OPTIONS': {'MAX_ENTRIES': 10000}
+    },
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'versions',
+        'TIMEOUT': None
+    }
+}
+TEST_RUNNER = 'backend.testing.TestRunner'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -91,9 +112,17 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Segundos que espera una escritura mientras otro proceso (p.ej. un worker) tiene la base bloqueada
+        # (es el busy_timeout de SQLite)
+        'OPTIONS': {'timeout': 30},
+        # Conexiones persistentes: cada proceso de la web reutiliza la suya (y sus pragmas) entre requests
+        'CONN_MAX_AGE': 600,
     }
 }
 
+# Pragmas de cada conexión a SQLite (WAL, synchronous, caché), ver backend/database.py
+SQLITE_PRAGMAS = {}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
@@ -0,0 +1,33 @@
+import shutil
+import tempfile
+
+from django.core.cache import caches
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+class TestRunner(DiscoverRunner):
+    """
+    Runner de los tests: los cachés de la API (ver settings.py) van a una carpeta temporal durante
+    toda la corrida, incluida la creación de la base de datos de prueba, así los tests nunca escriben
+    en backend/cache.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.__directory = tempfile.mkdtemp(prefix='simulador-cache-')
+        self.__caches = override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'},
+            'versions': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                         'LOCATION': self.__directory, 'TIMEOUT': None}
+        })
+        self.__caches.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.__caches.disable()
+        shutil.rmtree(self.__directory, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
+
+# Vacía los cachés, para que cada test parta sin respuestas ni versiones guardadas
+def clearCaches():
+    for cache in caches.all():
+        cache.clear()
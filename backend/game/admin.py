@@ -1,8 +1,46 @@
 from django.contrib import admin
-from django.apps import apps
 
-tables_db = apps.all_models['game']
+from game.models import Character, CharacterProgression, DnDClass, DnDSubclass, Multiclass, Skill
 
-# Mostrar todas las tablas del game en el panel de administración.
-for _, table in tables_db.items():
-    admin.site.register(table)
\ No newline at end of file
+# Personajes: se buscan por nombre o jugador, también desde los autocompletar de otras tablas
+@admin.register(Character)
+class CharacterAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'player', 'created_at')
+    search_fields = ('name', 'player')
+    ordering = ('name',)
+
+# Clases
+@admin.register(DnDClass)
+class DnDClassAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name')
+    search_fields = ('name',)
+
+# Subclases, con su clase en el mismo JOIN
+@admin.register(DnDSubclass)
+class DnDSubclassAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'dndclass')
+    list_select_related = ('dndclass',)
+    list_filter = ('dndclass',)
+    search_fields = ('name',)
+    autocomplete_fields = ('dndclass',)
+
+# Niveles de cada personaje
+@admin.register(CharacterProgression)
+class CharacterProgressionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'character', 'level', 'created_at')
+    list_select_related = ('character',)
+    search_fields = ('character__name', 'character__player')
+    autocomplete_fields = ('character',)
+
+# Subclases de cada nivel de personaje
+@admin.register(Multiclass)
+class MulticlassAdmin(admin.ModelAdmin):
+    list_display = ('id', 'characterprogression', 'dndsubclass', 'level')
+    list_select_related = ('characterprogression__character', 'dndsubclass')
+    autocomplete_fields = ('characterprogression', 'dndsubclass')
+
+# Habilidades
+@admin.register(Skill)
+class SkillAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name')
+    search_fields = ('name',)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class GameConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'game'
+
+    # Registra las señales que invalidan el caché de respuestas
+    def ready(self):
+        from game import signals
@@ -0,0 +1,37 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from game.roster import RosterImport
+
+class Command(BaseCommand):
+    help = 'Registra todos los personajes de una carpeta o zip de exports de Foundry VTT (fvtt-Actor-*.json)'
+
+    # Argumentos del comando
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Carpeta (se recorren las subcarpetas) o zip con los fvtt-Actor-*.json')
+        parser.add_argument('-p', '--player', default='', help='Jugador de los personajes')
+        parser.add_argument('-w', '--workers', type=int, default=os.cpu_count(), help='Procesos que leen los archivos')
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['source']):
+            raise CommandError(f'No existe {options["source"]}')
+        roster = RosterImport(options['source'], player=options['player'], workers=options['workers'])
+        if not roster.files:
+            raise CommandError(f'{options["source"]} no tiene archivos fvtt-Actor-*.json')
+
+        # Lectura en paralelo
+        start = time.perf_counter()
+        snapshots = roster.read()
+        read = time.perf_counter() - start
+        self.stdout.write(f'{len(snapshots)} personajes leídos de {len(roster.files)} archivos en {read:.2f} s')
+        for name, error in roster.errors:
+            self.stderr.write(f'{name}: {error.strip().splitlines()[-1]}')
+
+        # Registro con consultas masivas
+        start = time.perf_counter()
+        progressions = roster.register()
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(progressions)} personajes registrados en {time.perf_counter() - start:.2f} s'
+        ))
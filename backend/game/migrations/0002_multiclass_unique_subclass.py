@@ -0,0 +1,17 @@
+# Generated by Django 4.0.10 on 2026-10-18 13:06
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='multiclass',
+            unique_together={('characterprogression', 'dndsubclass')},
+        ),
+    ]
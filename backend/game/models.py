@@ -55,7 +55,7 @@ class Multiclass(Auditable):
     level = models.IntegerField(null=False, blank=False)
 
     class Meta:
-        unique_together = ('characterprogression', 'level')
+        unique_together = ('characterprogression', 'dndsubclass')
 
 # Nombres de las habilidades
 class Skill(Auditable):
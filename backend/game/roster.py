@@ -0,0 +1,185 @@
+import fnmatch
+import io
+import os
+import traceback
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import transaction
+
+from backend.caching import bumpOnCommit
+from engine.game.characters import Character as Actor
+from engine.game.foundry import FoundryReader
+from game.models import Character, CharacterProgression, DnDClass, DnDSubclass, Multiclass
+
+# Exports de personajes de Foundry VTT
+ACTOR_PATTERN = 'fvtt-Actor-*.json'
+
+# Crea las filas que falten sin fallar si otro proceso las creó antes, y devuelve todas las pedidas
+def upsert(model, rows, fields):
+    """
+    Inserta con ignore_conflicts (INSERT ... ON CONFLICT DO NOTHING), así dos ingestas
+    simultáneas no chocan con IntegrityError, y luego lee los ids con una sola consulta.
+
+    Args:
+        model (django.db.models.Model): Modelo con una restricción única sobre fields
+        rows (list): Diccionarios con los valores de fields (y opcionalmente otros campos)
+        fields (tuple): Campos que identifican a cada fila
+
+    Returns:
+        dict: Objeto de cada fila, indexado por la tupla de sus valores en fields
+    """
+    if not rows:
+        return dict()
+    model.objects.bulk_create([model(**row) for row in rows], ignore_conflicts=True)
+    keys = {tuple(getattr(model(**row), field) for field in fields) for row in rows}
+    objects = dict()
+    for obj in model.objects.filter(**{f'{fields[0]}__in': {key[0] for key in keys}}):
+        key = tuple(getattr(obj, field) for field in fields)
+        if key in keys:
+            objects[key] = obj
+    return objects
+
+# Registra varios personajes de una vez, con sus clases, subclases y multiclases
+def registerCharacters(snapshots, player=''):
+    """
+    Junta en memoria las clases, subclases, personajes y progresos de todos los snapshots
+    (sin repetidos) y los registra con un upsert por tabla: la cantidad de consultas no
+    depende de cuántos personajes haya.
+
+    Args:
+        snapshots (list): Snapshots de personajes (Character.snapshot del motor)
+        player (str): Jugador de los personajes, '' si no se indica (con NULL la restricción única no aplica)
+
+    Returns:
+        dict: Progreso (CharacterProgression) de cada personaje a su nivel actual, indexado por nombre
+    """
+    levels = dict()
+    classes = set()
+    subclasses = set()
+    for snapshot in snapshots:
+        levels[(snapshot['name'], sum(info['level'] for info in snapshot['classes'].values()))] = snapshot
+        for dndclass, info in snapshot['classes'].items():
+            classes.add(dndclass)
+            subclasses.add((info['subclass'], dndclass))
+
+    with transaction.atomic():
+        classes = upsert(DnDClass, [{'name': dndclass} for dndclass in classes], ('name',))
+        subclasses = upsert(DnDSubclass, [{'name': subclass, 'dndclass': classes[(dndclass,)]}
+                                          for subclass, dndclass in subclasses], ('name', 'dndclass_id'))
+        characters = upsert(Character, [{'name': name, 'player': player} for name in {name for name, _ in levels}],
+                            ('name', 'player'))
+        progressions = upsert(CharacterProgression, [{'character': characters[(name, player)], 'level': level}
+                                                     for name, level in levels], ('character_id', 'level'))
+        multiclasses = list()
+        registered = dict()
+        for (name, level), snapshot in levels.items():
+            objProgression = progressions[(characters[(name, player)].id, level)]
+            registered[name] = objProgression
+            for dndclass, info in snapshot['classes'].items():
+                dndclass = classes[(dndclass,)]
+                multiclasses.append({'characterprogression': objProgression,
+                                     'dndsubclass': subclasses[(info['subclass'], dndclass.id)],
+                                     'level': info['level']})
+        upsert(Multiclass, multiclasses, ('characterprogression_id', 'dndsubclass_id'))
+        bumpOnCommit('game')
+    return registered
+
+# Exports de personajes de una carpeta (incluyendo subcarpetas) o de un zip, con rutas relativas
+def actorFiles(source):
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            names = [name for name in archive.namelist() if fnmatch.fnmatch(os.path.basename(name), ACTOR_PATTERN)]
+    else:
+        names = list()
+        for root, _, files in os.walk(source):
+            names += [os.path.relpath(os.path.join(root, name), source) for name in fnmatch.filter(files, ACTOR_PATTERN)]
+    return sorted(names)
+
+# Lee y compila los actores de un grupo de archivos, trabajo de cada proceso de RosterImport
+def readActors(task):
+    """
+    Args:
+        task (tuple): (source, names), la carpeta o zip y los archivos a leer
+
+    Returns:
+        tuple: (snapshots, errors), los snapshots de los personajes y (archivo, traceback) de los que fallaron
+    """
+    source, names = task
+    snapshots = list()
+    errors = list()
+    archive = zipfile.ZipFile(source) if zipfile.is_zipfile(source) else None
+    try:
+        for name in names:
+            try:
+                if archive is None:
+                    reader = FoundryReader(os.path.join(source, name))
+                    actors = list(reader.actors())
+                else:
+                    with io.TextIOWrapper(archive.open(name), encoding='utf8') as file:
+                        actors = list(FoundryReader(name, file=file).actors())
+                # Sólo personajes jugadores, los npc no tienen clases ni trasfondo
+                snapshots += [Actor(actor=actor).snapshot for actor in actors if actor.get('type', 'character') == 'character']
+            except Exception:
+                errors.append((name, traceback.format_exc()))
+    finally:
+        if archive is not None:
+            archive.close()
+    return snapshots, errors
+
+class RosterImport:
+    """
+    Clase que registra de una vez todos los personajes de una carpeta o zip de exports de Foundry VTT.
+    - Atributos:
+        source: carpeta o zip con los fvtt-Actor-*.json
+        player: jugador de los personajes
+        workers: procesos que leen los archivos, por defecto la cantidad de núcleos
+        files: archivos de actores encontrados
+        snapshots: personajes leídos, compilados como Character.snapshot
+        errors: (archivo, traceback) de los archivos que no se pudieron leer
+    - Lee los archivos en varios procesos, cada uno con un grupo de archivos (así un zip se abre
+      una vez por grupo) y quedándose sólo con lo que usa el simulador (ver FoundryReader)
+    - Registra todo con registerCharacters: clases y subclases se deduplican en memoria
+    """
+
+    ### Initializer ###
+    def __init__(self, source, **kwargs):
+        self.__source = source
+        self.__player = kwargs.get('player', '')
+        self.__workers = kwargs.get('workers') or os.cpu_count()
+        self.__files = actorFiles(source)
+        self.__snapshots = None
+        self.__errors = list()
+
+    def __str__(self):
+        return f'{self.__source}: {len(self.__files)} archivos'
+
+    ### Getters & Setters ###
+    def __get_files(self): return list(self.__files)
+    files = property(__get_files)
+    def __get_snapshots(self): return self.read()
+    snapshots = property(__get_snapshots)
+    def __get_errors(self): return list(self.__errors)
+    errors = property(__get_errors)
+
+    ### Class Methods ###
+    # Lee todos los actores, una sola vez
+    def read(self):
+        if self.__snapshots is not None:
+            return self.__snapshots
+        groups = max(1, min(len(self.__files), self.__workers*4))
+        tasks = [(self.__source, self.__files[group::groups]) for group in range(groups)]
+        if self.__workers <= 1 or len(self.__files) <= 1:
+            results = list(map(readActors, tasks))
+        else:
+            with ProcessPoolExecutor(max_workers=self.__workers) as executor:
+                results = list(executor.map(readActors, tasks))
+        self.__snapshots = list()
+        for snapshots, errors in results:
+            self.__snapshots += snapshots
+            self.__errors += errors
+        return self.__snapshots
+
+    # Registra los personajes leídos, devuelve el progreso de cada uno indexado por nombre
+    def register(self):
+        return registerCharacters(self.read(), self.__player)
@@ -0,0 +1,28 @@
+from rest_framework import serializers
+
+from game.models import Character, CharacterProgression, Multiclass
+
+# Personajes
+class CharacterSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Character
+        fields = ['id', 'name', 'player', 'created_at', 'updated_at']
+
+# Subclases de un progreso, con los nombres ya resueltos
+class MulticlassSerializer(serializers.ModelSerializer):
+    subclass = serializers.CharField(source='dndsubclass.name')
+    dndclass = serializers.CharField(source='dndsubclass.dndclass.name')
+
+    class Meta:
+        model = Multiclass
+        fields = ['id', 'characterprogression', 'dndsubclass', 'subclass', 'dndclass', 'level', 'created_at']
+
+# Progreso de un personaje, con sus subclases
+class CharacterProgressionSerializer(serializers.ModelSerializer):
+    characterName = serializers.CharField(source='character.name')
+    player = serializers.CharField(source='character.player')
+    multiclasses = MulticlassSerializer(source='multiclass_set', many=True)
+
+    class Meta:
+        model = CharacterProgression
+        fields = ['id', 'character', 'characterName', 'player', 'level', 'multiclasses', 'created_at']
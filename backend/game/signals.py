@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from backend.caching import bumpOnCommit
+from game.models import Character, CharacterProgression, DnDClass, DnDSubclass, Multiclass, Skill
+
+# Cualquier cambio en los modelos del juego invalida las respuestas guardadas que los usan
+@receiver([post_save, post_delete], sender=Character)
+@receiver([post_save, post_delete], sender=CharacterProgression)
+@receiver([post_save, post_delete], sender=DnDClass)
+@receiver([post_save, post_delete], sender=DnDSubclass)
+@receiver([post_save, post_delete], sender=Multiclass)
+@receiver([post_save, post_delete], sender=Skill)
+def bumpGame(sender, **kwargs):
+    bumpOnCommit('game')
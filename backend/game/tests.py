@@ -1,3 +1,348 @@
-from django.test import TestCase
+import json
+import math
+import os
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase, TestCase
+
+from engine.game.adventures import AdventurePlan
+from engine.game.cache import CharacterCache
+from engine.game.characters import Character as Actor
+from engine.game.columnar import ColumnarReader, ColumnarWriter
+from engine.game import environment
+from engine.game.environment import Adventure
+from engine.game.foundry import ACTOR_FIELDS, FoundryReader, prune
+from engine.game.instrumentation import NULL_SPAN, Capture, JsonSink, instrumentation
+from engine.game.statistics import RunningStatistics
+from engine.game.strategy import StrategyOptimizer
+from engine.game.sweep import RosterSweep
+from engine.game.whatif import applyOverrides
+from game.models import Character, CharacterProgression, DnDClass, DnDSubclass, Multiclass
+from game.roster import registerCharacters, upsert
+
+# Personaje de los tests del motor
+adventureManager = Adventure()
+ZGRAK = adventureManager.loadCharacter('fvtt-Actor-zgrak.json')
+# Jsons de las aventuras y personajes, para armar variantes
+ADVENTURES = os.path.join(os.path.dirname(environment.__file__), '..', 'data', 'adventures')
+CHARACTERS = os.path.join(os.path.dirname(environment.__file__), '..', 'data', 'characters')
+
+# Export de zgrak (Barbarian 5, Rogue 2 sin subclase) con ninguna clase con subclase
+def zgrakWithoutSubclasses():
+    with open(os.path.join(CHARACTERS, 'fvtt-Actor-zgrak.json'), encoding='utf8') as file:
+        data = json.load(file)
+    for item in data['items']:
+        if item['type'] == 'class':
+            item['data']['subclass'] = ''
+    return data
+
+# Variante de private_investigations con más challenges y comodines, todos con el dado de premio
+def largeInvestigation(challenges, jokers):
+    with open(os.path.join(ADVENTURES, 'private_investigations.json'), encoding='utf8') as file:
+        data = json.load(file)
+    steps = [step for step in data['steps'] if step['id'] not in ('challenge', 'cheat')]
+    steps[1:1] = [{'id': 'challenge', 'skillCheck': ['investigation']}]*challenges + \
+        [{'id': 'cheat', 'skillCheck': ['stealth'], 'time': 'after'}]*jokers
+    data['steps'] = steps
+    data['replacements'] = jokers
+    data['steps'][-1]['type']['ammount'] = challenges
+    data['steps'][-1]['difficultyClass'] = {str(success): 100*success for success in range(challenges + 1)}
+    return data
+
+class StrategyOptimizerTests(SimpleTestCase):
+
+    # Dos asignaciones con el mismo dinero esperado: la segunda del ranking debe conservar su dinero por ciclo
+    def test_best_with_tied_candidates(self):
+        optimizer = StrategyOptimizer(adventureManager.loadPlan('street_fighting.json'), ZGRAK, samples=20000)
+        df_results = optimizer.evaluate()
+        self.assertEqual(df_results['expectedMoney'].iloc[1], df_results['expectedMoney'].iloc[2])
+
+        best = optimizer.best()
+        self.assertAlmostEqual(best['margin'], df_results['expectedMoney'].iloc[0] - df_results['expectedMoney'].iloc[1])
+        self.assertGreater(best['marginError'], 0)
+
+    # Con dos cheats 'before' da lo mismo cuál reemplaza a qué challenge: cada asignación aparece una sola vez
+    def test_candidates_without_repeated_substitutions(self):
+        with open(os.path.join(ADVENTURES, 'private_investigations.json'), encoding='utf8') as file:
+            data = json.load(file)
+        data['replacements'] = 2
+        for step in data['steps']:
+            if step['id'] == 'cheat':
+                step['time'] = 'before'
+        candidates = StrategyOptimizer(AdventurePlan(data), ZGRAK, samples=1000).candidates
+        keys = [(tuple(sorted(candidate['skills'].items())), candidate['jokers'], candidate['uniqueBonus'])
+                for candidate in candidates]
+        self.assertEqual(len(keys), len(set(keys)))
+        self.assertIn(2, [len(candidate['substitutions']) for candidate in candidates])
+
+class CharacterTests(SimpleTestCase):
+
+    # Dos clases sin subclase todavía no se pisan: el nivel y la competencia suman ambas
+    def test_multiclass_without_subclasses(self):
+        actor = Actor(actor=zgrakWithoutSubclasses())
+        self.assertEqual(actor.classes, {'Barbarian': {'level': 5, 'subclass': 'No Subclass'},
+                                         'Rogue': {'level': 2, 'subclass': 'No Subclass'}})
+        self.assertEqual(actor.level, 7)
+        self.assertEqual(actor.proficiency, ZGRAK.proficiency)
+        self.assertEqual(actor.subclasses, dict())
+        self.assertEqual(ZGRAK.subclasses, {'Path of the Totem Warrior': {'level': 5, 'class': 'Barbarian'}})
+
+    # Subir de nivel suma a la clase con más niveles, sin perder la otra
+    def test_level_override_without_subclasses(self):
+        snapshot = applyOverrides(Actor(actor=zgrakWithoutSubclasses()).snapshot, {'level': 9})
+        self.assertEqual(Actor(snapshot=snapshot).classes['Barbarian']['level'], 7)
+        self.assertEqual(Actor(snapshot=snapshot).level, 9)
+
+class ApplyOverridesTests(SimpleTestCase):
+
+    # Edward tiene los Gauntlets of Ogre Power: el cambio relativo va sobre la fuerza sin el objeto
+    def test_relative_ability_with_magic_item(self):
+        snapshot = adventureManager.loadCharacter('fvtt-Actor-edward-genkov.json').snapshot
+        self.assertEqual(snapshot['abilityScores']['str'], 19)
+        self.assertEqual(applyOverrides(snapshot, {'str': '+2'})['abilityScores']['str'], 19)
+        self.assertEqual(applyOverrides(snapshot, {'str': '+12'})['abilityScores']['str'], 20)
+        self.assertEqual(applyOverrides(snapshot, {'int': '+2', 'items': ['Headband of Intellect']})['abilityScores']['int'], 19)
+        self.assertEqual(applyOverrides(snapshot, {'int': '+2'})['abilityScores']['int'], snapshot['abilityScores']['int'] + 2)
+
+class RunningStatisticsTests(SimpleTestCase):
+
+    # Sin ciclos el resumen y los cuantiles son NaN en vez de dividir por cero
+    def test_empty_statistics(self):
+        statistics = RunningStatistics()
+        summary = statistics.summary()
+        self.assertEqual(summary['cycles'], 0)
+        self.assertTrue(math.isnan(summary['mean']))
+        self.assertTrue(math.isnan(summary['median']))
+        self.assertTrue(math.isnan(summary['lossProbability']))
+        self.assertTrue(math.isnan(statistics.quantile(0.9)))
+        statistics.merge(RunningStatistics())
+        self.assertEqual(statistics.cycles, 0)
+
+class MoneyAdventureTests(SimpleTestCase):
+
+    # La simulación vectorizada converge a la evaluación exacta, con y sin dificultades
+    def test_vectorized_matches_exact(self):
+        cycles = 200000
+        for name in adventureManager.adventureNames():
+            with self.subTest(adventure=name):
+                cookedAdventure = adventureManager.loadAdventure(name, ZGRAK, apuesta=5)
+                exact = adventureManager.evaluateMoneyAdventure(cookedAdventure)
+                df_summary, _ = adventureManager.executeMoneyAdventure(cookedAdventure, cycles, vectorized=True, seed=3)
+                self.assertEqual(len(df_summary), cycles)
+                tolerance = 5*np.sqrt(exact['variance']/cycles) + 1e-9
+                self.assertLess(abs(df_summary['money'].mean() - exact['expectedMoney']), tolerance)
+                frequencies = df_summary['money'].value_counts(normalize=True)
+                self.assertTrue(set(frequencies.index) <= set(exact['money'][exact['money'] > 0].index))
+                for money, probability in exact['money'].items():
+                    self.assertLess(abs(frequencies.get(money, 0.) - probability), 0.01)
+
+    # El motor ciclo a ciclo reemplaza la misma tirada que el vectorizado: la peor, con el comodín de mejor promedio
+    def test_loop_matches_vectorized_with_jokers(self):
+        cookedAdventure = adventureManager.loadAdventure('illegal_gambling.json', ZGRAK, apuesta=5)
+        self.assertGreater(len(cookedAdventure['jokers']), 0)
+        loop, _ = adventureManager.executeMoneyAdventure(cookedAdventure, 500, seed=2)
+        vectorized, _ = adventureManager.executeMoneyAdventure(cookedAdventure, 100000, vectorized=True, seed=2)
+        error = np.sqrt(loop['money'].var()/len(loop) + vectorized['money'].var()/len(vectorized))
+        self.assertLess(abs(loop['money'].mean() - vectorized['money'].mean()), 4*error)
+
+    # La evaluación exacta no enumera el producto de los soportes: doce challenges y dos comodines
+    def test_exact_large_adventure(self):
+        plan = AdventurePlan(largeInvestigation(12, 2))
+        cookedAdventure = adventureManager.cookAdventure(plan, ZGRAK)
+        exact = adventureManager.evaluateMoneyAdventure(cookedAdventure)
+        self.assertAlmostEqual(exact['money'].sum(), 1.)
+        self.assertAlmostEqual(exact['successes'].sum(), 1.)
+        df_summary, _ = adventureManager.executeMoneyAdventure(cookedAdventure, 100000, vectorized=True, seed=4)
+        self.assertLess(abs(df_summary['money'].mean() - exact['expectedMoney']), 5*np.sqrt(exact['variance']/100000))
+
+    # Si la aventura necesita demasiados estados falla con un error claro en vez de agotar la memoria
+    def test_exact_size_limit(self):
+        cookedAdventure = adventureManager.cookAdventure(AdventurePlan(largeInvestigation(6, 3)), ZGRAK)
+        with mock.patch('engine.game.environment.MAX_EXACT_STATES', 100):
+            with self.assertRaisesRegex(ValueError, 'simularla'):
+                adventureManager.evaluateMoneyAdventure(cookedAdventure)
+
+    # Con la misma semilla da lo mismo cuántos hilos se usen o cómo se repartan los bloques
+    def test_seed_independent_of_workers_and_chunks(self):
+        cookedAdventure = adventureManager.loadAdventure('street_fighting.json', ZGRAK)
+        serial = adventureManager.executeMoneyAdventure(cookedAdventure, 10000, vectorized=True, seed=11, chunkSize=1000)
+        threaded = adventureManager.executeMoneyAdventure(cookedAdventure, 10000, vectorized=True, seed=11, chunkSize=1000,
+                                                          workers=3)
+        pd.testing.assert_frame_equal(serial[0], threaded[0])
+        pd.testing.assert_frame_equal(serial[1], threaded[1])
+
+        chunks = list(adventureManager.streamMoneyAdventure(cookedAdventure, 10000, seed=11, chunkSize=1000, chunks=[7, 2]))
+        pd.testing.assert_frame_equal(chunks[0][0].reset_index(drop=True), serial[0].iloc[7000:8000].reset_index(drop=True))
+        pd.testing.assert_frame_equal(chunks[1][0].reset_index(drop=True), serial[0].iloc[2000:3000].reset_index(drop=True))
+
+    # El barrido reparte los bloques de cada par entre los procesos sin cambiar la tabla
+    def test_sweep_independent_of_workers(self):
+        kwargs = {'characters': ['fvtt-Actor-zgrak.json', 'fvtt-Actor-shrej-klock.json'],
+                  'adventures': ['street_fighting.json', 'honest_work.json'], 'seed': 5, 'chunkCycles': 5000}
+        serial = RosterSweep(20000, workers=1, **kwargs).run()
+        parallel = RosterSweep(20000, workers=2, chunksize=3, **kwargs).run()
+        pd.testing.assert_frame_equal(serial, parallel)
+        self.assertTrue((serial['cycles'] == 20000).all())
+
+class FoundryReaderTests(SimpleTestCase):
+
+    # Con un buffer diminuto (valores cortados entre bloques) lee lo mismo que json.load podado
+    def test_matches_json_load(self):
+        for name in adventureManager.characterNames():
+            with self.subTest(character=name):
+                path = os.path.join(CHARACTERS, name)
+                with open(path, encoding='utf8') as file:
+                    expected = prune(json.load(file), ACTOR_FIELDS)
+                self.assertEqual(FoundryReader(path, bufferSize=7).actor(), expected)
+                self.assertEqual(Actor(actor=expected).snapshot, Actor(path).snapshot)
+
+    # Un arreglo de actores y un json por línea entregan todos los actores, en orden
+    def test_many_actors(self):
+        actors = list()
+        for name in adventureManager.characterNames():
+            with open(os.path.join(CHARACTERS, name), encoding='utf8') as file:
+                actors.append(json.load(file))
+        expected = [prune(actor, ACTOR_FIELDS) for actor in actors]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'actors.json')
+            with open(path, 'w', encoding='utf8') as file:
+                json.dump(actors, file, indent=2)
+            self.assertEqual(list(FoundryReader(path, bufferSize=64).actors()), expected)
+            path = os.path.join(directory, 'actors.db')
+            with open(path, 'w', encoding='utf8') as file:
+                file.write('\n'.join(json.dumps(actor) for actor in actors) + '\n')
+            self.assertEqual(list(FoundryReader(path, bufferSize=64).actors()), expected)
+
+class CharacterCacheTests(SimpleTestCase):
+
+    # El snapshot se compila una vez: luego sale de memoria, o del disco en otro proceso, y cambia con el archivo
+    def test_memory_and_disk(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'fvtt-Actor-zgrak.json')
+            with open(path, 'w', encoding='utf8') as file:
+                json.dump(zgrakWithoutSubclasses(), file)
+            cache = CharacterCache(directory=os.path.join(directory, 'cache'))
+            character = cache.load(path)
+            self.assertIs(cache.load(path), character)
+            self.assertEqual(cache.stats, {'hits': 1, 'diskHits': 0, 'misses': 1, 'size': 1})
+            self.assertEqual(character.snapshot, Actor(path).snapshot)
+
+            other = CharacterCache(directory=os.path.join(directory, 'cache'))
+            self.assertEqual(other.load(path).snapshot, character.snapshot)
+            self.assertEqual(other.stats['diskHits'], 1)
+
+            with open(os.path.join(CHARACTERS, 'fvtt-Actor-zgrak.json'), encoding='utf8') as source:
+                content = source.read()
+            with open(path, 'w', encoding='utf8') as file:
+                file.write(content)
+            self.assertEqual(other.load(path).classes, ZGRAK.classes)
+            self.assertEqual(other.stats['misses'], 1)
+
+class InstrumentationTests(SimpleTestCase):
+
+    # Desactivada no emite nada; con Capture junta las fases y contadores de una corrida por bloques
+    def test_capture_stream(self):
+        self.assertFalse(instrumentation.enabled)
+        self.assertIs(instrumentation.span('money.chunk'), NULL_SPAN)
+        cookedAdventure = adventureManager.loadAdventure('street_fighting.json', ZGRAK)
+        with Capture() as capture:
+            chunks = list(adventureManager.streamMoneyAdventure(cookedAdventure, 2500, seed=1, chunkSize=1000))
+        self.assertFalse(instrumentation.enabled)
+        self.assertEqual(capture.collector.spans().loc['money.chunk', 'count'], 3)
+        counters = capture.collector.counters()
+        self.assertEqual(counters['money.cycles'], 2500)
+        self.assertEqual(counters['money.rows'], sum(len(chunk[1]) for chunk in chunks))
+        self.assertIn('money.chunk', capture.report())
+
+    # Cada evento es una línea de json, con el span que lo contiene y el error si lo hubo
+    def test_json_sink(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'events.jsonl')
+            sink = JsonSink(path)
+            instrumentation.enable(sink)
+            try:
+                with self.assertRaises(KeyError):
+                    with instrumentation.span('outer', adventure='Street Fighting'):
+                        with instrumentation.span('inner') as span:
+                            span.set(rows=10)
+                        raise KeyError('falla')
+            finally:
+                instrumentation.disable(sink)
+            with open(path, encoding='utf8') as file:
+                events = [json.loads(line) for line in file]
+        self.assertEqual([(event['name'], event['parent']) for event in events], [('inner', 'outer'), ('outer', None)])
+        self.assertEqual(events[0]['attributes'], {'rows': 10})
+        self.assertEqual(events[1]['error'], 'KeyError')
+        self.assertNotIn('error', events[0])
+
+class ColumnarTests(SimpleTestCase):
+
+    # Lo que se escribe por bloques se vuelve a leer igual, entero o por rangos de filas
+    def test_write_read_round_trip(self):
+        cookedAdventure = adventureManager.loadAdventure('street_fighting.json', ZGRAK)
+        chunks = list(adventureManager.streamMoneyAdventure(cookedAdventure, 2500, seed=1, chunkSize=1000))
+        df_summary = pd.concat([chunk[0] for chunk in chunks], ignore_index=True)
+        df_detail = pd.concat([chunk[1] for chunk in chunks], ignore_index=True)
+        with tempfile.TemporaryDirectory() as directory:
+            ColumnarWriter(directory).writeRun(chunks, seed=1)
+            reader = ColumnarReader(directory)
+            self.assertEqual(reader.attributes, {'seed': 1})
+            self.assertEqual((reader.rows('summary'), reader.rows('detail')), (len(df_summary), len(df_detail)))
+            pd.testing.assert_frame_equal(reader.frame('summary'), df_summary)
+            self.assertTrue(np.array_equal(np.load(os.path.join(directory, 'detail', 'roll.npy')), df_detail['roll']))
+
+            df_read = reader.frame('detail', 700, 1900)
+            df_expected = df_detail.iloc[700:1900].reset_index(drop=True)
+            for name in ('advantage', 'roll', 'DC', 'success'):
+                self.assertTrue(np.array_equal(df_read[name], df_expected[name]))
+            self.assertEqual(list(df_read['skillName'].astype(str)), list(df_expected['skillName']))
+            self.assertEqual(list(df_read['bonus'].astype(str)), [' '.join(map(str, bonus)) for bonus in df_expected['bonus']])
+
+            statistics = reader.statistics(chunkSize=700)
+            self.assertEqual(statistics.cycles, len(df_summary))
+            self.assertAlmostEqual(statistics.mean, df_summary['money'].mean())
+
+class RosterTests(TestCase):
+
+    # Registrar dos veces los mismos personajes no crea filas nuevas
+    def test_register_characters_is_idempotent(self):
+        snapshots = [adventureManager.loadCharacter(name).snapshot for name in adventureManager.characterNames()]
+        first = registerCharacters(snapshots, 'liga')
+        counts = [model.objects.count() for model in (Character, CharacterProgression, DnDClass, DnDSubclass, Multiclass)]
+        second = registerCharacters(snapshots, 'liga')
+        self.assertEqual(counts, [model.objects.count() for model in (Character, CharacterProgression, DnDClass, DnDSubclass, Multiclass)])
+        self.assertEqual({name: obj.id for name, obj in first.items()}, {name: obj.id for name, obj in second.items()})
+        self.assertEqual(counts[0], len(snapshots))
+
+    # Las clases sin subclase de un mismo personaje quedan cada una con su nivel
+    def test_register_classes_without_subclasses(self):
+        progression = registerCharacters([Actor(actor=zgrakWithoutSubclasses()).snapshot])['Zgrak']
+        self.assertEqual(progression.level, 7)
+        multiclasses = Multiclass.objects.filter(characterprogression=progression)
+        self.assertEqual({(row.dndsubclass.dndclass.name, row.dndsubclass.name, row.level) for row in multiclasses},
+                         {('Barbarian', 'No Subclass', 5), ('Rogue', 'No Subclass', 2)})
+
+    # Dos clases con el mismo nivel quedan ambas registradas
+    def test_register_classes_with_same_level(self):
+        data = zgrakWithoutSubclasses()
+        for item in data['items']:
+            if item['type'] == 'class':
+                item['data']['levels'] = 3
+        progression = registerCharacters([Actor(actor=data).snapshot])['Zgrak']
+        self.assertEqual(progression.level, 6)
+        multiclasses = Multiclass.objects.filter(characterprogression=progression)
+        self.assertEqual({(row.dndsubclass.dndclass.name, row.level) for row in multiclasses},
+                         {('Barbarian', 3), ('Rogue', 3)})
+
+    # upsert devuelve los mismos objetos existan o no, y no duplica filas repetidas en la entrada
+    def test_upsert_is_idempotent(self):
+        rows = [{'name': 'Fighter'}, {'name': 'Rogue'}, {'name': 'Fighter'}]
+        first = upsert(DnDClass, rows, ('name',))
+        second = upsert(DnDClass, rows, ('name',))
+        self.assertEqual(set(first), {('Fighter',), ('Rogue',)})
+        self.assertEqual({key: obj.id for key, obj in first.items()}, {key: obj.id for key, obj in second.items()})
+        self.assertEqual(DnDClass.objects.count(), 2)
+        self.assertEqual(upsert(DnDClass, [], ('name',)), dict())
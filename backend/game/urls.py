@@ -2,4 +2,9 @@ from django.urls import path
 from .views import *
 
 urlpatterns = [
-]
\ No newline at end of file
+    path('characters/', CharacterList.as_view()),
+    path('characters/<int:pk>/', CharacterDetail.as_view()),
+    path('progressions/', CharacterProgressionList.as_view()),
+    path('progressions/<int:pk>/', CharacterProgressionDetail.as_view()),
+    path('multiclasses/', MulticlassList.as_view()),
+]
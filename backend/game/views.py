@@ -1,3 +1,54 @@
-from django.shortcuts import render
+from django.db.models import Prefetch
+from rest_framework import generics
 
-# Create your views here.
+from backend.caching import CachedResponseMixin
+from backend.filters import QueryFilterMixin
+from backend.pagination import KeysetPagination
+from game.models import Character, CharacterProgression, Multiclass
+from game.serializers import CharacterProgressionSerializer, CharacterSerializer, MulticlassSerializer
+
+# Personajes
+class CharacterList(CachedResponseMixin, QueryFilterMixin, generics.ListAPIView):
+    cache_resources = ('game',)
+    queryset = Character.objects.all()
+    serializer_class = CharacterSerializer
+    pagination_class = KeysetPagination
+    query_filters = {
+        'name': ('name', 'str'),
+        'player': ('player', 'str')
+    }
+
+class CharacterDetail(CachedResponseMixin, generics.RetrieveAPIView):
+    cache_resources = ('game',)
+    queryset = Character.objects.all()
+    serializer_class = CharacterSerializer
+
+# Progreso de los personajes, con sus subclases en una sola consulta extra por página
+class CharacterProgressionList(CachedResponseMixin, QueryFilterMixin, generics.ListAPIView):
+    cache_resources = ('game',)
+    queryset = CharacterProgression.objects.select_related('character').prefetch_related(
+        Prefetch('multiclass_set', queryset=Multiclass.objects.select_related('dndsubclass__dndclass'))
+    )
+    serializer_class = CharacterProgressionSerializer
+    pagination_class = KeysetPagination
+    query_filters = {
+        'character': ('character_id', 'int'),
+        'level': ('level', 'int')
+    }
+
+class CharacterProgressionDetail(CachedResponseMixin, generics.RetrieveAPIView):
+    cache_resources = ('game',)
+    queryset = CharacterProgressionList.queryset
+    serializer_class = CharacterProgressionSerializer
+
+# Subclases de cada progreso
+class MulticlassList(CachedResponseMixin, QueryFilterMixin, generics.ListAPIView):
+    cache_resources = ('game',)
+    queryset = Multiclass.objects.select_related('dndsubclass__dndclass')
+    serializer_class = MulticlassSerializer
+    pagination_class = KeysetPagination
+    query_filters = {
+        'characterprogression': ('characterprogression_id', 'int'),
+        'character': ('characterprogression__character_id', 'int'),
+        'subclass': ('dndsubclass_id', 'int')
+    }
@@ -1,8 +1,89 @@
 from django.contrib import admin
-from django.apps import apps
 
-tables_db = apps.all_models['league']
+from backend.pagination import EstimatedCountPaginator
+from league.models import Adventure, AdventureLog, AdventureRun, RunMoney, RunOutcome, RunSkill, SimulationJob
 
-# Mostrar todas las tablas del game en el panel de administración.
-for _, table in tables_db.items():
-    admin.site.register(table)
\ No newline at end of file
+# Aventuras: se buscan por nombre, también desde los autocompletar de otras tablas
+@admin.register(Adventure)
+class AdventureAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'created_at')
+    search_fields = ('name',)
+    ordering = ('name',)
+
+# Tiradas de las aventuras, la tabla más grande de la liga
+@admin.register(AdventureLog)
+class AdventureLogAdmin(admin.ModelAdmin):
+    """
+    Admin de AdventureLog pensado para millones de filas:
+    - Las llaves foráneas de cada fila vienen en el mismo JOIN (list_select_related) y se editan por id
+      (raw_id_fields), así la lista no hace una consulta por fila ni carga selects con todas las opciones
+    - Se ordena sólo por id (índice de la llave primaria) y se filtra por aventura o habilidad, que son
+      el inicio de los índices (adventure, characterprogression, created_at) y (skill, success)
+    - Sin date_hierarchy: created_at sólo está indexado después de aventura y personaje, y un índice propio
+      haría más lenta la carga de tiradas. Las fechas se revisan en las corridas (AdventureRun)
+    - El total se estima (EstimatedCountPaginator) en vez de contar toda la tabla
+    """
+
+    list_display = ('id', 'created_at', 'adventure', 'characterprogression', 'skill', 'roll', 'difficultyclass',
+                    'success', 'run_id')
+    list_select_related = ('adventure', 'characterprogression__character', 'skill')
+    raw_id_fields = ('adventure', 'characterprogression', 'skill', 'run')
+    list_filter = ('adventure', 'skill')
+    ordering = ('-id',)
+    sortable_by = ('id',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 100
+
+# Rollups de una corrida, se muestran dentro de ella
+class RunOutcomeInline(admin.TabularInline):
+    model = RunOutcome
+    fields = ('outcome', 'count')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+class RunMoneyInline(admin.TabularInline):
+    model = RunMoney
+    fields = ('money', 'count')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+class RunSkillInline(admin.TabularInline):
+    model = RunSkill
+    fields = ('skill', 'rolls', 'mean', 'successes', 'successrate')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    # La habilidad de cada fila en el mismo JOIN
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('skill')
+
+# Corridas del simulador, con sus resultados agregados
+@admin.register(AdventureRun)
+class AdventureRunAdmin(admin.ModelAdmin):
+    list_display = ('id', 'created_at', 'characterprogression', 'adventure', 'cycles', 'apuesta', 'money',
+                    'moneyperday', 'lossprobability', 'engineversion')
+    list_select_related = ('adventure', 'characterprogression__character')
+    raw_id_fields = ('characterprogression',)
+    autocomplete_fields = ('adventure',)
+    list_filter = ('adventure',)
+    date_hierarchy = 'created_at'
+    ordering = ('-id',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    inlines = (RunOutcomeInline, RunMoneyInline, RunSkillInline)
+
+# Cola de simulaciones
+@admin.register(SimulationJob)
+class SimulationJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'status', 'character', 'adventure', 'cycles', 'progress', 'worker', 'created_at',
+                    'finished_at', 'run_id')
+    list_filter = ('status',)
+    search_fields = ('=batch',)
+    raw_id_fields = ('run',)
+    readonly_fields = ('status', 'progress', 'worker', 'attempts', 'error', 'run', 'started_at', 'heartbeat_at', 'finished_at')
+    ordering = ('-id',)
+    show_full_result_count = False
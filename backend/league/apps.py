@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class LeagueConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'league'
+
+    # Registra las señales que invalidan el caché de respuestas y las que configuran SQLite
+    def ready(self):
+        from backend import database
+        from league import signals
@@ -0,0 +1,219 @@
+import pandas as pd
+from django.db import connection, transaction
+from django.utils import timezone
+
+from backend.caching import bumpOnCommit
+from engine.game.environment import ENGINE_VERSION
+from engine.game.statistics import RunningStatistics, addSkills
+from game.models import Skill
+from game.roster import registerCharacters, upsert
+from league.models import Adventure, AdventureLog, AdventureRun, RunMoney, RunOutcome, RunSkill
+
+# Filas por cada INSERT
+BATCH_SIZE = 5000
+
+class LogIngest:
+    """
+    Clase que guarda los resultados del simulador en la base de datos de la liga.
+    - Atributos:
+        progression: progreso del personaje (CharacterProgression) al que pertenecen las tiradas
+        adventure: aventura (Adventure) a la que pertenecen las tiradas
+        player: jugador del personaje, '' si no se indica (con NULL la restricción única no aplica)
+        skills: ids de las habilidades, se resuelven una sola vez por nombre
+        batchSize: filas por cada INSERT
+    - Resuelve personaje, clases, subclases, aventura y habilidades una sola vez al crearse
+    - Inserta el detalle de las tiradas por lotes, dentro de una transacción
+    - Registra corridas completas (AdventureRun) con sus tablas agregadas, llenadas mientras se ingesta
+    - Los lotes van directo a executemany con un INSERT armado desde los campos del modelo: con
+      bulk_create el ORM prepara cada valor por separado y no pasa de unas miles de filas por segundo
+    """
+
+    ### Initializer ###
+    def __init__(self, character, adventureName, **kwargs):
+        self.__player = kwargs.get('player', '')
+        self.__batchSize = kwargs.get('batchSize', BATCH_SIZE)
+        self.__skills = dict()
+        self.__rows = 0
+        with transaction.atomic():
+            self.__progression = self.registerCharacter(character)
+            self.__adventure = upsert(Adventure, [{'name': adventureName}], ('name',))[(adventureName,)]
+            bumpOnCommit('game', 'league')
+
+    def __str__(self):
+        return f'{self.__progression} @ {self.__adventure.name}: {self.__rows} tiradas'
+
+    ### Getters & Setters ###
+    def __get_progression(self): return self.__progression
+    progression = property(__get_progression)
+    def __get_adventure(self): return self.__adventure
+    adventure = property(__get_adventure)
+    def __get_rows(self): return self.__rows
+    rows = property(__get_rows)
+
+    ### Class Methods ###
+    # Registra el personaje, sus clases y subclases, y devuelve su progreso al nivel actual
+    def registerCharacter(self, character):
+        return registerCharacters([character.snapshot], self.__player)[character.name]
+
+    # Ids de las habilidades indicadas, creando las que falten
+    def skillIds(self, names):
+        missing = [{'name': name} for name in set(names) if name not in self.__skills]
+        for (name,), obj in upsert(Skill, missing, ('name',)).items():
+            self.__skills[name] = obj.id
+        return self.__skills
+
+    # Guarda el detalle de las tiradas
+    def ingest(self, details, **kwargs):
+        """
+        Inserta las tiradas en una sola transacción. Acepta el df_detail de executeMoneyAdventure
+        o un iterable de ellos (p.ej. los bloques de streamMoneyAdventure), así una corrida larga
+        no necesita tener todo su detalle en memoria.
+
+        Args:
+            details (pandas.DataFrame | iterable): Detalle con las columnas skillName, roll y,
+                si la aventura lanza dificultades, DC y success
+
+        kwargs:
+            run (AdventureRun): Corrida a la que pertenecen las tiradas
+
+        Returns:
+            int: Cantidad de filas insertadas
+        """
+        if isinstance(details, pd.DataFrame):
+            details = [details]
+        run = kwargs.get('run')
+        rows = 0
+        with transaction.atomic():
+            for df_detail in details:
+                for start in range(0, len(df_detail), self.__batchSize):
+                    rows += self.__insert(df_detail.iloc[start:start + self.__batchSize], run)
+            # Las filas no pasan por save(), así que no hay señales que cambien la versión
+            bumpOnCommit('league')
+        self.__rows += rows
+        return rows
+
+    # Registra una corrida completa con sus resultados agregados
+    def ingestRun(self, chunks, **kwargs):
+        """
+        Registra la corrida y llena sus tablas agregadas (histograma de éxitos, distribución del
+        dinero y resultados por habilidad) a medida que llegan los bloques.
+
+        La simulación ocurre fuera de las transacciones, así una corrida larga no bloquea la base de
+        datos: el detalle de cada bloque se inserta en su propia transacción y los agregados al final.
+        Si algo falla (o se cancela, ver league/jobs.py) se borra la corrida con lo que alcanzó a insertar.
+
+        Args:
+            chunks (iterable): Tuplas (df_summary, df_detail), p.ej. de streamMoneyAdventure
+
+        kwargs:
+            days (int): Días que dura la aventura
+            seed: Semilla de la corrida
+            apuesta (int): Apuesta usada al cocinar la aventura
+            detail (bool): Si es False no guarda las tiradas, sólo los agregados
+
+        Returns:
+            AdventureRun: La corrida registrada
+        """
+        statistics = RunningStatistics()
+        skills = dict()
+        run = None
+        try:
+            for df_summary, df_detail in chunks:
+                statistics.update(df_summary)
+                addSkills(skills, df_detail)
+                if kwargs.get('detail', True):
+                    if run is None:
+                        run = self.createRun(**kwargs)
+                    self.ingest(df_detail, run=run)
+
+            # Resultados agregados
+            run = self.finishRun(run, statistics, skills, **kwargs)
+        except BaseException:
+            if run is not None:
+                AdventureRun.objects.filter(id=run.id).delete()
+            raise
+        return run
+
+    # Guarda los resultados agregados de una corrida, creándola si todavía no existe
+    def finishRun(self, run, statistics, skills, **kwargs):
+        """
+        Args:
+            run (AdventureRun): Corrida creada con createRun, None para crearla ahora
+            statistics (RunningStatistics): Estadísticas de todos los bloques de la corrida
+            skills (dict): Tiradas de cada habilidad, acumuladas con addSkills
+
+        kwargs:
+            Los de createRun, si la corrida no existe
+
+        Returns:
+            AdventureRun: La corrida con sus resultados
+        """
+        with transaction.atomic():
+            if run is None:
+                run = self.createRun(**kwargs)
+            summary = statistics.summary()
+            run.cycles = statistics.cycles
+            run.money = summary['mean']
+            run.variance = summary['variance']
+            run.moneyperday = summary['mean']/run.days
+            run.lossprobability = summary['lossProbability']
+            run.save()
+            RunOutcome.objects.bulk_create([RunOutcome(run=run, outcome=outcome, count=count)
+                                            for outcome, count in statistics.outcomeHistogram().items()])
+            RunMoney.objects.bulk_create([RunMoney(run=run, money=money, count=count)
+                                          for money, count in statistics.moneyHistogram().items()])
+            skillIds = self.skillIds(list(skills))
+            RunSkill.objects.bulk_create([
+                RunSkill(
+                    run=run,
+                    skill_id=skillIds[name],
+                    rolls=rolls,
+                    mean=total/rolls,
+                    successes=successes,
+                    successrate=None if successes is None else successes/rolls
+                )
+                for name, (rolls, total, successes) in skills.items()
+            ])
+            bumpOnCommit('league')
+        return run
+
+    # Crea la corrida, sin resultados todavía
+    def createRun(self, **kwargs):
+        return AdventureRun.objects.create(
+            adventure=self.__adventure,
+            characterprogression=self.__progression,
+            cycles=0,
+            seed=None if kwargs.get('seed') is None else str(kwargs['seed']),
+            apuesta=kwargs.get('apuesta', 0),
+            engineversion=ENGINE_VERSION,
+            days=kwargs['days']
+        )
+
+    # INSERT de AdventureLog, en el mismo orden de columnas que las tuplas de __insert
+    def __statement(self):
+        fields = ['created_at', 'updated_at', 'adventure', 'characterprogression', 'skill', 'difficultyclass', 'roll', 'success', 'run']
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(AdventureLog._meta.get_field(field).column) for field in fields)
+        placeholders = ', '.join(['%s']*len(fields))
+        return f'INSERT INTO {quote(AdventureLog._meta.db_table)} ({columns}) VALUES ({placeholders})'
+
+    # Inserta un lote de tiradas
+    def __insert(self, df_batch, run=None):
+        skills = self.skillIds(df_batch['skillName'].unique())
+        skillIds = df_batch['skillName'].map(skills).tolist()
+        rolls = df_batch['roll'].tolist()
+        if 'DC' in df_batch:
+            DCs = df_batch['DC'].tolist()
+            successes = df_batch['success'].tolist()
+        else:
+            DCs = [None]*len(df_batch)
+            successes = [None]*len(df_batch)
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        runId = None if run is None else run.id
+        logs = [
+            (now, now, self.__adventure.id, self.__progression.id, skill, DC, roll, success, runId)
+            for skill, DC, roll, success in zip(skillIds, DCs, rolls, successes)
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(self.__statement(), logs)
+        return len(logs)
@@ -0,0 +1,182 @@
+import json
+import os
+import socket
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+import numpy as np
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+
+from engine.game.environment import Adventure
+from league.ingest import LogIngest
+from league.models import AdventureRun, SimulationJob
+
+# Ciclos por bloque de cada trabajo: entre bloques se guarda el avance y se revisa si se canceló.
+# Cada bloque con detalle es una transacción, bloques chicos liberan antes la base para la web
+JOB_CHUNK_SIZE = 20000
+# Segundos sin latido (ver trackProgress) tras los que se da por muerto al worker de un trabajo
+JOB_TIMEOUT = 300
+# Veces que se toma un trabajo: si sus workers mueren todas esas veces se marca como fallido
+JOB_ATTEMPTS = 3
+
+class JobCancelled(Exception):
+    """
+    Se lanza dentro de un trabajo cuando se pidió cancelarlo, para deshacer lo que alcanzó a guardar.
+    """
+
+# Encola la simulación de cada par personaje x aventura
+def enqueueJobs(characters, adventures, cycles, **kwargs):
+    """
+    Crea un trabajo por cada par, todos con el mismo batch para poder seguirlos juntos. Las semillas
+    siguen la misma regla que RosterSweep, así la cola da los mismos resultados que simulate.
+
+    Args:
+        characters (list): Jsons de personajes en engine/data/characters
+        adventures (list): Jsons de aventuras en engine/data/adventures
+        cycles (int): Ciclos por cada par
+
+    kwargs:
+        seed (int): Semilla del batch, si no se indica se crea una
+        apuesta (int): Apuesta de las aventuras con multiplicador input
+        player (str): Jugador de los personajes
+        detail (bool): Si es True también guarda cada tirada en AdventureLog
+
+    Returns:
+        list: Los SimulationJob creados
+    """
+    seed = kwargs.get('seed')
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    batch = uuid.uuid4().hex
+    jobs = list()
+    for character in characters:
+        for adventure in adventures:
+            jobs.append(SimulationJob(
+                character=character,
+                adventure=adventure,
+                cycles=cycles,
+                seed=json.dumps([seed, len(jobs)]),
+                apuesta=kwargs.get('apuesta', 0),
+                player=kwargs.get('player', ''),
+                detail=kwargs.get('detail', False),
+                batch=batch
+            ))
+    return SimulationJob.objects.bulk_create(jobs)
+
+# Pide cancelar un trabajo: si está en cola se cancela de inmediato, si se está ejecutando lo detiene su worker
+def cancelJob(jobId):
+    updated = SimulationJob.objects.filter(id=jobId, status=SimulationJob.QUEUED).update(
+        status=SimulationJob.CANCELLED, finished_at=timezone.now())
+    if not updated:
+        SimulationJob.objects.filter(id=jobId, status=SimulationJob.RUNNING).update(status=SimulationJob.CANCELLING)
+    return SimulationJob.objects.get(id=jobId)
+
+# Toma el trabajo más antiguo en cola, None si no hay
+def claimJob(worker, **kwargs):
+    """
+    El UPDATE sólo afecta al trabajo si sigue en cola, así dos workers que eligen el mismo
+    nunca lo ejecutan ambos: el que pierde prueba con el siguiente. Antes recupera los trabajos
+    de workers muertos (ver recoverJobs).
+
+    kwargs:
+        timeout (float): Segundos sin latido tras los que se recupera un trabajo, por defecto JOB_TIMEOUT
+    """
+    recoverJobs(kwargs.get('timeout', JOB_TIMEOUT))
+    while True:
+        jobId = SimulationJob.objects.filter(status=SimulationJob.QUEUED).order_by('id').values_list('id', flat=True).first()
+        if jobId is None:
+            return None
+        now = timezone.now()
+        claimed = SimulationJob.objects.filter(id=jobId, status=SimulationJob.QUEUED).update(
+            status=SimulationJob.RUNNING, worker=worker, started_at=now, heartbeat_at=now, attempts=F('attempts') + 1)
+        if claimed:
+            return SimulationJob.objects.get(id=jobId)
+
+# Recupera los trabajos cuyo worker dejó de dar latidos (p.ej. murió sin memoria)
+def recoverJobs(timeout=JOB_TIMEOUT):
+    """
+    Un trabajo en ejecución vuelve a la cola (la semilla es la misma, así da el mismo resultado),
+    o falla si ya se intentó JOB_ATTEMPTS veces; uno que se estaba cancelando queda cancelado. En
+    ambos casos se borra la corrida a medias que alcanzó a guardar. Cada cambio es un UPDATE
+    condicionado al latido viejo, así dos workers que recuperan a la vez no se pisan.
+
+    Returns:
+        int: Cantidad de trabajos recuperados
+    """
+    limit = timezone.now() - timedelta(seconds=timeout)
+    stale = SimulationJob.objects.filter(status__in=[SimulationJob.RUNNING, SimulationJob.CANCELLING], heartbeat_at__lt=limit)
+    recovered = 0
+    for job in stale:
+        fields = {'worker': None, 'heartbeat_at': None}
+        if job.status == SimulationJob.CANCELLING:
+            fields.update(status=SimulationJob.CANCELLED, finished_at=timezone.now())
+        elif job.attempts >= JOB_ATTEMPTS:
+            fields.update(status=SimulationJob.FAILED, finished_at=timezone.now(),
+                          error=f'El worker {job.worker} dejó de responder en los {job.attempts} intentos')
+        else:
+            fields.update(status=SimulationJob.QUEUED, progress=0, started_at=None)
+        if SimulationJob.objects.filter(id=job.id, status=job.status, heartbeat_at__lt=limit).update(**fields):
+            AdventureRun.objects.filter(seed=job.seed, cycles=0).delete()
+            recovered += 1
+    return recovered
+
+# Ejecuta un trabajo ya tomado y guarda su resultado
+def runJob(job):
+    adventureManager = Adventure()
+    try:
+        character = adventureManager.loadCharacter(job.character)
+        if character is None:
+            raise ValueError(f'No existe el personaje {job.character}')
+        cookedAdventure = adventureManager.loadAdventure(job.adventure, character, apuesta=job.apuesta)
+        chunks = adventureManager.streamMoneyAdventure(cookedAdventure, job.cycles, seed=json.loads(job.seed),
+                                                       chunkSize=JOB_CHUNK_SIZE)
+        ingest = LogIngest(character, cookedAdventure['name'], player=job.player)
+        run = ingest.ingestRun(trackProgress(job, chunks), days=cookedAdventure['comparison']['days'],
+                               seed=job.seed, apuesta=job.apuesta, detail=job.detail)
+        finishJob(job, SimulationJob.DONE, run=run)
+    except JobCancelled:
+        finishJob(job, SimulationJob.CANCELLED)
+    except Exception:
+        finishJob(job, SimulationJob.FAILED, error=traceback.format_exc())
+
+# Guarda el avance y el latido después de cada bloque, y se detiene si se pidió cancelar
+def trackProgress(job, chunks):
+    progress = 0
+    for df_summary, df_detail in chunks:
+        yield df_summary, df_detail
+        progress += len(df_summary)
+        updated = SimulationJob.objects.filter(id=job.id, status=SimulationJob.RUNNING).update(
+            progress=progress, heartbeat_at=timezone.now())
+        if not updated:
+            raise JobCancelled(job.id)
+
+# Marca el trabajo como terminado
+def finishJob(job, status, **kwargs):
+    fields = {'status': status, 'run': kwargs.get('run'), 'error': kwargs.get('error'), 'finished_at': timezone.now()}
+    if status == SimulationJob.DONE:
+        fields['progress'] = job.cycles
+    SimulationJob.objects.filter(id=job.id).update(**fields)
+
+# Ciclo de un worker: toma trabajos hasta que no queden (once) o para siempre
+def workLoop(**kwargs):
+    """
+    kwargs:
+        name (str): Nombre del worker, por defecto host:pid
+        poll (float): Segundos de espera cuando la cola está vacía
+        once (bool): Si es True termina cuando la cola queda vacía
+        timeout (float): Segundos sin latido tras los que se recupera el trabajo de otro worker
+    """
+    name = kwargs.get('name') or f'{socket.gethostname()}:{os.getpid()}'
+    while True:
+        close_old_connections()
+        job = claimJob(name, timeout=kwargs.get('timeout', JOB_TIMEOUT))
+        if job is None:
+            if kwargs.get('once', False):
+                return
+            time.sleep(kwargs.get('poll', 1.0))
+            continue
+        runJob(job)
@@ -0,0 +1,144 @@
+import os
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from engine.game.columnar import ColumnarWriter
+from engine.game.environment import Adventure
+from engine.game.instrumentation import Capture, JsonSink
+from engine.game.strategy import STRATEGIES
+from engine.game.sweep import RosterSweep, cookPair
+from league.writer import LogWriter
+
+# Columnas del csv de --output file, iguales para todas las aventuras (DC y success quedan vacías
+# en las que no lanzan dificultades) así todas las filas tienen el mismo ancho
+CSV_COLUMNS = ('character', 'adventure', 'actorName', 'skillName', 'bonus', 'advantage', 'roll', 'DC', 'success')
+
+class Command(BaseCommand):
+    help = 'Simula aventuras de dinero para uno o varios personajes y guarda el resultado'
+
+    # Argumentos del comando
+    def add_arguments(self, parser):
+        parser.add_argument('-c', '--character', action='append', dest='characters',
+                            help='Json del personaje en engine/data/characters, se puede repetir (por defecto todos)')
+        parser.add_argument('-a', '--adventure', action='append', dest='adventures',
+                            help='Json de la aventura en engine/data/adventures, se puede repetir (por defecto todas)')
+        parser.add_argument('-n', '--cycles', type=int,
+                            help='Ciclos por cada par personaje x aventura (por defecto 1000), o el máximo con --precision')
+        parser.add_argument('-s', '--seed', type=int, help='Semilla de la corrida, si no se indica se crea una')
+        parser.add_argument('-w', '--workers', type=int, default=1, help='Procesos (summary, db) o hilos (file, columnar) que simulan')
+        parser.add_argument('-o', '--output', choices=['db', 'file', 'columnar', 'summary'], default='summary',
+                            help='Dónde dejar el resultado: tiradas en la base de datos, en un csv, en archivos por columna '
+                                 '(una carpeta por par, ver engine/game/columnar.py) o sólo el resumen')
+        parser.add_argument('-f', '--file', default='simulation.csv', help='Archivo (file) o carpeta (columnar) de salida')
+        parser.add_argument('-p', '--player', default='', help='Jugador de los personajes con --output db')
+        parser.add_argument('--apuesta', type=int, default=0, help='Apuesta de las aventuras con multiplicador input')
+        parser.add_argument('--strategy', choices=STRATEGIES, default='greedy',
+                            help='Cómo juega cada personaje: la mejor skill promedio por paso (greedy) o la '
+                                 'asignación de skills, cheats y uniqueBonus con mayor dinero esperado (optimal)')
+        parser.add_argument('--chunk-size', type=int,
+                            help='Ciclos por bloque, acota la memoria (por defecto 100000, o 10000 con --precision)')
+        parser.add_argument('--precision', type=float,
+                            help='Simula cada par hasta que el intervalo de confianza mida ±precision (sólo summary)')
+        parser.add_argument('--metric', choices=['money', 'successRate'], default='money',
+                            help='Métrica de --precision: dinero esperado o fracción de checks exitosos')
+        parser.add_argument('--confidence', type=float, default=0.95, help='Nivel de confianza de --precision')
+        parser.add_argument('--time-budget', type=float, help='Segundos máximos por par con --precision')
+        parser.add_argument('--trace', help='Archivo jsonl donde guardar los spans y contadores de cada fase del motor')
+        parser.add_argument('--profile', action='store_true',
+                            help='Muestra el tiempo por fase, las funciones más lentas (cProfile) y la memoria (tracemalloc)')
+
+    def handle(self, *args, **options):
+        adventureManager = Adventure()
+        characters = options['characters'] or adventureManager.characterNames()
+        adventures = options['adventures'] or adventureManager.adventureNames()
+        for name in set(characters) - set(adventureManager.characterNames()):
+            raise CommandError(f'No existe el personaje {name}')
+        for name in set(adventures) - set(adventureManager.adventureNames()):
+            raise CommandError(f'No existe la aventura {name}')
+        seed = options['seed']
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+
+        # Ciclos fijos o hasta lograr la precisión pedida
+        adaptive = None
+        if options['precision'] is None:
+            options['cycles'] = options['cycles'] or 1000
+            options['chunk_size'] = options['chunk_size'] or 100000
+            self.stdout.write(f'{len(characters)} personajes x {len(adventures)} aventuras @ {options["cycles"]} ciclos, semilla {seed}')
+        else:
+            if options['output'] != 'summary':
+                raise CommandError('--precision sólo funciona con --output summary')
+            if options['metric'] == 'successRate':
+                for name in adventures:
+                    if not adventureManager.loadPlan(name).comparison['rollsDice']:
+                        raise CommandError(f'{name} no lanza dificultades, no tiene tasa de éxito')
+            options['chunk_size'] = options['chunk_size'] or 10000
+            adaptive = {'precision': options['precision'], 'metric': options['metric'],
+                        'confidence': options['confidence'], 'timeBudget': options['time_budget']}
+            self.stdout.write(f'{len(characters)} personajes x {len(adventures)} aventuras hasta ±{options["precision"]} '
+                              f'({options["metric"]}, {options["confidence"]:.0%}), semilla {seed}')
+
+        # Instrumentación opcional: los workers de summary (procesos) sólo escriben en --trace
+        sinks = [JsonSink(options['trace'])] if options['trace'] else []
+        capture = Capture(*sinks, profile=options['profile'], memory=options['profile'])
+
+        start = time.perf_counter()
+        with capture:
+            sweep = RosterSweep(options['cycles'], characters=characters, adventures=adventures, seed=seed,
+                                workers=options['workers'], apuesta=options['apuesta'], chunkCycles=options['chunk_size'],
+                                strategy=options['strategy'], adaptive=adaptive)
+            if options['output'] == 'summary':
+                df_results = sweep.run()
+                self.stdout.write(df_results.to_string(index=False))
+                cycles = df_results['cycles'].sum()
+                rows = 0
+            elif options['output'] == 'db':
+                # Varios procesos simulan y uno solo escribe, en transacciones grandes
+                cycles = options['cycles']*len(characters)*len(adventures)
+                writer = LogWriter(sweep.tasks, workers=options['workers'], player=options['player'])
+                try:
+                    writer.run()
+                except RuntimeError as error:
+                    raise CommandError(str(error))
+                rows = writer.rows
+                self.stdout.write(f'{len(writer.runs)} corridas guardadas en {writer.transactions} transacciones')
+            else:
+                cycles = options['cycles']*len(characters)*len(adventures)
+                rows = self.__writeDetail(sweep, options)
+        elapsed = time.perf_counter() - start
+        if options['profile']:
+            self.stdout.write(capture.report())
+
+        # Rendimiento de la corrida
+        self.stdout.write(self.style.SUCCESS(
+            f'{cycles} ciclos y {rows} tiradas en {elapsed:.2f} s: '
+            f'{cycles/elapsed:,.0f} ciclos/s, {rows/elapsed:,.0f} tiradas/s'
+        ))
+
+    # Simula cada par por bloques y guarda el detalle de las tiradas (y la corrida en archivos por columna)
+    def __writeDetail(self, sweep, options):
+        adventureManager = Adventure()
+        rows = 0
+        header = True
+        for characterName, adventureName, cycles, seed, apuesta, chunkSize, strategy, _ in sweep.tasks:
+            character = adventureManager.loadCharacter(characterName)
+            cookedAdventure = cookPair(characterName, adventureName, apuesta, strategy)
+            chunks = adventureManager.streamMoneyAdventure(cookedAdventure, cycles, seed=seed,
+                                                           chunkSize=chunkSize, workers=options['workers'])
+            if options['output'] == 'columnar':
+                path = os.path.join(options['file'], f'{os.path.splitext(characterName)[0]}__{os.path.splitext(adventureName)[0]}')
+                writer = ColumnarWriter(path, attributes={'character': character.name, 'adventure': cookedAdventure['name']})
+                writer.writeRun(chunks, days=cookedAdventure['comparison']['days'], seed=seed, apuesta=apuesta, cycles=cycles)
+                rows += writer.rows['detail']
+                continue
+            for _, df_detail in chunks:
+                df_detail['character'] = characterName
+                df_detail['adventure'] = cookedAdventure['name']
+                df_detail['bonus'] = df_detail['bonus'].map(lambda bonuses: ' '.join(str(bonus) for bonus in bonuses))
+                df_detail = df_detail.reindex(columns=CSV_COLUMNS)
+                df_detail.to_csv(options['file'], mode='w' if header else 'a', header=header, index=False)
+                header = False
+                rows += len(df_detail)
+        return rows
@@ -0,0 +1,36 @@
+import multiprocessing
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from league.jobs import JOB_TIMEOUT, workLoop
+
+class Command(BaseCommand):
+    help = 'Ejecuta los trabajos de simulación en cola (SimulationJob) con varios procesos'
+
+    # Argumentos del comando
+    def add_arguments(self, parser):
+        parser.add_argument('-w', '--workers', type=int, default=multiprocessing.cpu_count(), help='Procesos que toman trabajos')
+        parser.add_argument('--poll', type=float, default=1.0, help='Segundos de espera cuando la cola está vacía')
+        parser.add_argument('--once', action='store_true', help='Terminar cuando la cola quede vacía')
+        parser.add_argument('--timeout', type=float, default=JOB_TIMEOUT,
+                            help='Segundos sin latido tras los que se recupera el trabajo de un worker muerto')
+
+    def handle(self, *args, **options):
+        kwargs = {'poll': options['poll'], 'once': options['once'], 'timeout': options['timeout']}
+        if options['workers'] <= 1:
+            workLoop(**kwargs)
+            return
+
+        # Cada proceso abre su propia conexión a la base de datos
+        connections.close_all()
+        processes = [multiprocessing.Process(target=workLoop, kwargs=kwargs, daemon=True) for _ in range(options['workers'])]
+        for process in processes:
+            process.start()
+        self.stdout.write(f'{len(processes)} workers esperando trabajos')
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
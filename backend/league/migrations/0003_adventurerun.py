@@ -0,0 +1,88 @@
+# Generated by Django 4.0.10 on 2026-10-18 12:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0001_initial'),
+        ('league', '0002_rename_skillname_adventurelog_skill_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdventureRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, null=True)),
+                ('cycles', models.IntegerField()),
+                ('seed', models.CharField(blank=True, max_length=100, null=True)),
+                ('apuesta', models.IntegerField(default=0)),
+                ('engineversion', models.CharField(max_length=20)),
+                ('days', models.IntegerField()),
+                ('money', models.FloatField(blank=True, null=True)),
+                ('variance', models.FloatField(blank=True, null=True)),
+                ('moneyperday', models.FloatField(blank=True, null=True)),
+                ('lossprobability', models.FloatField(blank=True, null=True)),
+                ('adventure', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='league.adventure')),
+                ('characterprogression', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='game.characterprogression')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='adventurelog',
+            name='run',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='league.adventurerun'),
+        ),
+        migrations.CreateModel(
+            name='RunSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, null=True)),
+                ('rolls', models.IntegerField()),
+                ('mean', models.FloatField()),
+                ('successes', models.IntegerField(blank=True, null=True)),
+                ('successrate', models.FloatField(blank=True, null=True)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='league.adventurerun')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='game.skill')),
+            ],
+            options={
+                'unique_together': {('run', 'skill')},
+            },
+        ),
+        migrations.CreateModel(
+            name='RunOutcome',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, null=True)),
+                ('outcome', models.IntegerField()),
+                ('count', models.IntegerField()),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='league.adventurerun')),
+            ],
+            options={
+                'unique_together': {('run', 'outcome')},
+            },
+        ),
+        migrations.CreateModel(
+            name='RunMoney',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, null=True)),
+                ('money', models.IntegerField()),
+                ('count', models.IntegerField()),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='league.adventurerun')),
+            ],
+            options={
+                'unique_together': {('run', 'money')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='adventurerun',
+            index=models.Index(fields=['characterprogression', 'adventure'], name='league_adve_charact_6113cc_idx'),
+        ),
+    ]
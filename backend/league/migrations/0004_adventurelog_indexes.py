@@ -0,0 +1,25 @@
+# Generated by Django 4.0.10 on 2026-10-18 12:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0003_adventurerun'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='adventurelog',
+            options={},
+        ),
+        migrations.AddIndex(
+            model_name='adventurelog',
+            index=models.Index(fields=['adventure', 'characterprogression', 'created_at'], name='league_adve_adventu_a606cc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='adventurelog',
+            index=models.Index(fields=['skill', 'success'], name='league_adve_skill_i_88e760_idx'),
+        ),
+    ]
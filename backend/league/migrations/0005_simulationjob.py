@@ -0,0 +1,41 @@
+# Generated by Django 4.0.10 on 2026-10-18 12:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0004_adventurelog_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimulationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, null=True)),
+                ('character', models.CharField(max_length=100)),
+                ('adventure', models.CharField(max_length=100)),
+                ('cycles', models.IntegerField()),
+                ('seed', models.CharField(blank=True, max_length=100, null=True)),
+                ('apuesta', models.IntegerField(default=0)),
+                ('player', models.CharField(blank=True, default='', max_length=20)),
+                ('detail', models.BooleanField(default=False)),
+                ('batch', models.CharField(blank=True, db_index=True, max_length=32, null=True)),
+                ('status', models.CharField(choices=[('queued', 'En cola'), ('running', 'Ejecutando'), ('cancelling', 'Cancelando'), ('done', 'Terminado'), ('failed', 'Fallido'), ('cancelled', 'Cancelado')], default='queued', max_length=10)),
+                ('progress', models.IntegerField(default=0)),
+                ('worker', models.CharField(blank=True, max_length=50, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('run', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='league.adventurerun')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='simulationjob',
+            index=models.Index(fields=['status', 'id'], name='league_simu_status_76c62e_idx'),
+        ),
+    ]
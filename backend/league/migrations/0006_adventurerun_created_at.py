@@ -0,0 +1,17 @@
+# Generated by Django 4.0.10 on 2026-10-18 12:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0005_simulationjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='adventurerun',
+            index=models.Index(fields=['created_at'], name='league_adve_created_7006f9_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.10 on 2026-10-18 12:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league', '0006_adventurerun_created_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='runmoney',
+            name='money',
+            field=models.FloatField(),
+        ),
+    ]
@@ -6,6 +6,9 @@ from game.models import Auditable, CharacterProgression, Skill
 class Adventure(Auditable):
     name = models.CharField(max_length=30, null=False, blank=False, unique=True)
 
+    def __str__(self):
+        return self.name
+
 # Historial de las aventuras
 class AdventureLog(Auditable):
     adventure = models.ForeignKey(Adventure, blank=False, null=False, on_delete=models.CASCADE)
@@ -13,4 +16,99 @@ class AdventureLog(Auditable):
     skill = models.ForeignKey(Skill, blank=False, null=False, on_delete=models.CASCADE)
     difficultyclass = models.IntegerField(null=True, blank=True)
     roll = models.IntegerField(null=False, blank=False)
-    success = models.BooleanField(null=True, blank=True)
\ No newline at end of file
+    success = models.BooleanField(null=True, blank=True)
+    run = models.ForeignKey('AdventureRun', blank=True, null=True, on_delete=models.CASCADE)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['adventure', 'characterprogression', 'created_at']),
+            models.Index(fields=['skill', 'success'])
+        ]
+
+# Corridas del simulador, con sus parámetros y resultados agregados
+class AdventureRun(Auditable):
+    adventure = models.ForeignKey(Adventure, blank=False, null=False, on_delete=models.CASCADE)
+    characterprogression = models.ForeignKey(CharacterProgression, blank=False, null=False, on_delete=models.CASCADE)
+    cycles = models.IntegerField(null=False, blank=False)
+    seed = models.CharField(max_length=100, null=True, blank=True)
+    apuesta = models.IntegerField(null=False, blank=False, default=0)
+    engineversion = models.CharField(max_length=20, null=False, blank=False)
+    days = models.IntegerField(null=False, blank=False)
+    money = models.FloatField(null=True, blank=True)
+    variance = models.FloatField(null=True, blank=True)
+    moneyperday = models.FloatField(null=True, blank=True)
+    lossprobability = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['characterprogression', 'adventure']),
+            models.Index(fields=['created_at'])
+        ]
+
+    def __str__(self):
+        return f'{self.characterprogression} @ {self.adventure.name}: {self.cycles} ciclos'
+
+# Histograma de éxitos (o de la suma de tiradas) de cada corrida
+class RunOutcome(Auditable):
+    run = models.ForeignKey(AdventureRun, blank=False, null=False, on_delete=models.CASCADE)
+    outcome = models.IntegerField(null=False, blank=False)
+    count = models.IntegerField(null=False, blank=False)
+
+    class Meta:
+        unique_together = ('run', 'outcome')
+
+# Distribución del dinero ganado en cada corrida
+class RunMoney(Auditable):
+    run = models.ForeignKey(AdventureRun, blank=False, null=False, on_delete=models.CASCADE)
+    money = models.FloatField(null=False, blank=False)
+    count = models.IntegerField(null=False, blank=False)
+
+    class Meta:
+        unique_together = ('run', 'money')
+
+# Resultados de cada habilidad en cada corrida
+class RunSkill(Auditable):
+    run = models.ForeignKey(AdventureRun, blank=False, null=False, on_delete=models.CASCADE)
+    skill = models.ForeignKey(Skill, blank=False, null=False, on_delete=models.CASCADE)
+    rolls = models.IntegerField(null=False, blank=False)
+    mean = models.FloatField(null=False, blank=False)
+    successes = models.IntegerField(null=True, blank=True)
+    successrate = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('run', 'skill')
+
+# Cola de simulaciones pedidas a la API, las ejecutan los procesos de simulation_worker
+class SimulationJob(Auditable):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    CANCELLING = 'cancelling'
+    DONE = 'done'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+    STATUSES = [(QUEUED, 'En cola'), (RUNNING, 'Ejecutando'), (CANCELLING, 'Cancelando'),
+                (DONE, 'Terminado'), (FAILED, 'Fallido'), (CANCELLED, 'Cancelado')]
+
+    character = models.CharField(max_length=100, null=False, blank=False)
+    adventure = models.CharField(max_length=100, null=False, blank=False)
+    cycles = models.IntegerField(null=False, blank=False)
+    seed = models.CharField(max_length=100, null=True, blank=True)
+    apuesta = models.IntegerField(null=False, blank=False, default=0)
+    player = models.CharField(max_length=20, null=False, blank=True, default='')
+    detail = models.BooleanField(null=False, blank=False, default=False)
+    batch = models.CharField(max_length=32, null=True, blank=True, db_index=True)
+    status = models.CharField(max_length=10, null=False, blank=False, choices=STATUSES, default=QUEUED)
+    progress = models.IntegerField(null=False, blank=False, default=0)
+    worker = models.CharField(max_length=50, null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+    run = models.ForeignKey(AdventureRun, blank=True, null=True, on_delete=models.SET_NULL)
+    attempts = models.IntegerField(null=False, blank=False, default=0)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'id'])]
+
+    def __str__(self):
+        return f'{self.character} @ {self.adventure}: {self.status}'
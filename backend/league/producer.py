@@ -0,0 +1,54 @@
+import traceback
+
+from engine.game.environment import Adventure
+from engine.game.statistics import RunningStatistics, addSkills
+from engine.game.sweep import cookPair
+
+# Este módulo no importa Django: los productores de LogWriter funcionan con cualquier método de
+# inicio de multiprocessing (fork, spawn o forkserver), sin configurar Django en cada proceso
+
+# Columnas del detalle que usa LogIngest, lo único que viaja entre procesos
+DETAIL_COLUMNS = ('skillName', 'roll', 'DC', 'success')
+
+# Detalle de un bloque reducido a lo que se guarda en AdventureLog
+def slimDetail(df_detail):
+    df_detail = df_detail[[column for column in DETAIL_COLUMNS if column in df_detail]].copy()
+    df_detail['skillName'] = df_detail['skillName'].astype('category')
+    return df_detail
+
+# Trabajo de cada productor: simula los pares de la cola de tareas y envía sus tiradas al escritor
+def produceRuns(tasks, messages, producer):
+    """
+    Los productores no usan la base de datos: acumulan las estadísticas de cada corrida y envían
+    mensajes al escritor, en orden, por cada par:
+        ('open', key, characterName, adventureName, kwargs de LogIngest.createRun)
+        ('rows', key, df_detail) por cada bloque
+        ('close', key, statistics, skills), o ('abort', key, traceback) si algo falla
+    y al terminar ('done', producer).
+
+    Args:
+        tasks (multiprocessing.Queue): Tuplas (key, task) con las tareas de RosterSweep, None para terminar
+        messages (multiprocessing.Queue): Cola de mensajes al escritor
+        producer (int): Número del productor
+    """
+    adventureManager = Adventure()
+    while True:
+        item = tasks.get()
+        if item is None:
+            break
+        key, (characterName, adventureName, cycles, seed, apuesta, chunkSize, strategy, _) = item
+        try:
+            cookedAdventure = cookPair(characterName, adventureName, apuesta, strategy)
+            days = cookedAdventure['comparison']['days']
+            messages.put(('open', key, characterName, cookedAdventure['name'], {'days': days, 'seed': seed, 'apuesta': apuesta}))
+            statistics = RunningStatistics()
+            skills = dict()
+            for df_summary, df_detail in adventureManager.streamMoneyAdventure(cookedAdventure, cycles, seed=seed,
+                                                                               chunkSize=chunkSize):
+                statistics.update(df_summary)
+                addSkills(skills, df_detail)
+                messages.put(('rows', key, slimDetail(df_detail)))
+            messages.put(('close', key, statistics, skills))
+        except Exception:
+            messages.put(('abort', key, traceback.format_exc()))
+    messages.put(('done', producer))
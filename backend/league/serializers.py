@@ -0,0 +1,69 @@
+from rest_framework import serializers
+
+from engine.game.environment import Adventure
+from league.models import AdventureLog, AdventureRun, SimulationJob
+
+# Tiradas, con los nombres ya resueltos
+class AdventureLogSerializer(serializers.ModelSerializer):
+    adventureName = serializers.CharField(source='adventure.name')
+    characterName = serializers.CharField(source='characterprogression.character.name')
+    level = serializers.IntegerField(source='characterprogression.level')
+    skillName = serializers.CharField(source='skill.name')
+
+    class Meta:
+        model = AdventureLog
+        fields = ['id', 'adventure', 'adventureName', 'characterprogression', 'characterName', 'level',
+                  'skill', 'skillName', 'difficultyclass', 'roll', 'success', 'run', 'created_at']
+
+# Corridas y sus resultados agregados
+class AdventureRunSerializer(serializers.ModelSerializer):
+    adventureName = serializers.CharField(source='adventure.name')
+    characterName = serializers.CharField(source='characterprogression.character.name')
+    level = serializers.IntegerField(source='characterprogression.level')
+
+    class Meta:
+        model = AdventureRun
+        fields = ['id', 'adventure', 'adventureName', 'characterprogression', 'characterName', 'level',
+                  'cycles', 'seed', 'apuesta', 'engineversion', 'days', 'money', 'variance',
+                  'moneyperday', 'lossprobability', 'created_at']
+
+# Posiciones de la tabla de la liga
+class LeaderboardSerializer(serializers.Serializer):
+    adventure = serializers.IntegerField()
+    adventureName = serializers.CharField()
+    characterprogression = serializers.IntegerField()
+    characterName = serializers.CharField()
+    level = serializers.IntegerField()
+    runs = serializers.IntegerField()
+    totalCycles = serializers.IntegerField()
+    moneyPerDay = serializers.FloatField()
+
+# Trabajos de simulación y su avance
+class SimulationJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SimulationJob
+        fields = ['id', 'batch', 'character', 'adventure', 'cycles', 'seed', 'apuesta', 'player', 'detail',
+                  'status', 'progress', 'worker', 'attempts', 'error', 'run', 'created_at', 'started_at',
+                  'heartbeat_at', 'finished_at']
+
+# Pedido de simulación: sin personajes o sin aventuras se encolan todos los disponibles
+class SimulationRequestSerializer(serializers.Serializer):
+    characters = serializers.ListField(child=serializers.CharField(), required=False)
+    adventures = serializers.ListField(child=serializers.CharField(), required=False)
+    cycles = serializers.IntegerField(min_value=1, max_value=100000000)
+    seed = serializers.IntegerField(min_value=0, required=False)
+    apuesta = serializers.IntegerField(required=False, default=0)
+    player = serializers.CharField(max_length=20, required=False, default='')
+    detail = serializers.BooleanField(required=False, default=False)
+
+    def validate_characters(self, characters):
+        missing = set(characters) - set(Adventure().characterNames())
+        if missing:
+            raise serializers.ValidationError(f'No existen los personajes {sorted(missing)}')
+        return characters
+
+    def validate_adventures(self, adventures):
+        missing = set(adventures) - set(Adventure().adventureNames())
+        if missing:
+            raise serializers.ValidationError(f'No existen las aventuras {sorted(missing)}')
+        return adventures
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from backend.caching import bumpOnCommit
+from league.models import Adventure, AdventureLog, AdventureRun, RunMoney, RunOutcome, RunSkill
+
+# Cualquier cambio en los modelos de la liga invalida las respuestas guardadas que los usan.
+# Las ingestas masivas no disparan señales, LogIngest cambia la versión por su cuenta. Las tiradas
+# y agregados sólo escuchan post_save: con un receptor de borrado, borrar una corrida obligaría a
+# Django a cargar cada tirada antes de borrarla en cascada (el borrado lo avisa AdventureRun)
+@receiver([post_save, post_delete], sender=Adventure)
+@receiver([post_save, post_delete], sender=AdventureRun)
+@receiver(post_save, sender=AdventureLog)
+@receiver(post_save, sender=RunMoney)
+@receiver(post_save, sender=RunOutcome)
+@receiver(post_save, sender=RunSkill)
+def bumpLeague(sender, **kwargs):
+    bumpOnCommit('league')
@@ -1,3 +1,271 @@
-from django.test import TestCase
+import io
+import multiprocessing
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import pandas as pd
+from django.core.management import call_command
+from django.db.models.query import QuerySet
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.utils import timezone
+
+from backend.caching import bumpResource
+from backend.testing import clearCaches
+from engine.game.environment import Adventure as AdventureManager
+from league.ingest import LogIngest
+from league.jobs import JOB_ATTEMPTS, cancelJob, claimJob, enqueueJobs, recoverJobs, runJob, workLoop
+from league.management.commands.simulate import CSV_COLUMNS
+from league.models import Adventure, AdventureLog, AdventureRun, RunMoney, RunOutcome, RunSkill, SimulationJob
+from league.producer import produceRuns
+from league.writer import LogWriter
+
+adventureManager = AdventureManager()
+ZGRAK = adventureManager.loadCharacter('fvtt-Actor-zgrak.json')
+
+# Bloques simulados de street fighting para zgrak
+def streetFighting(cycles, chunkSize=2000):
+    cookedAdventure = adventureManager.loadAdventure('street_fighting.json', ZGRAK)
+    return adventureManager.streamMoneyAdventure(cookedAdventure, cycles, seed=1, chunkSize=chunkSize)
+
+class LogIngestTests(TestCase):
+
+    # Los agregados de la corrida coinciden con los bloques simulados
+    def test_ingest_run_rollups(self):
+        chunks = list(streetFighting(5000))
+        df_summary = pd.concat([chunk[0] for chunk in chunks], ignore_index=True)
+        df_detail = pd.concat([chunk[1] for chunk in chunks], ignore_index=True)
+        run = LogIngest(ZGRAK, 'Street Fighting').ingestRun(chunks, days=1, seed=1)
+
+        self.assertEqual(run.cycles, 5000)
+        self.assertAlmostEqual(run.money, df_summary['money'].mean())
+        self.assertAlmostEqual(run.variance, df_summary['money'].var())
+        self.assertAlmostEqual(run.lossprobability, (df_summary['money'] < 0).mean())
+        self.assertEqual(AdventureLog.objects.filter(run=run).count(), len(df_detail))
+
+        money = {row.money: row.count for row in RunMoney.objects.filter(run=run)}
+        self.assertEqual(money, df_summary['money'].value_counts().to_dict())
+        outcomes = {row.outcome: row.count for row in RunOutcome.objects.filter(run=run)}
+        self.assertEqual(outcomes, df_summary['successes'].value_counts().to_dict())
+        skills = {row.skill.name: (row.rolls, row.successes) for row in RunSkill.objects.filter(run=run)}
+        expected = df_detail.groupby('skillName').agg(rolls=('roll', 'size'), successes=('success', 'sum'))
+        self.assertEqual(skills, {name: (row.rolls, row.successes) for name, row in expected.iterrows()})
+
+    # Sin detalle sólo se guardan los agregados
+    def test_ingest_run_without_detail(self):
+        run = LogIngest(ZGRAK, 'Street Fighting').ingestRun(streetFighting(3000), days=1, detail=False)
+        self.assertEqual(run.cycles, 3000)
+        self.assertEqual(sum(RunMoney.objects.filter(run=run).values_list('count', flat=True)), 3000)
+        self.assertFalse(AdventureLog.objects.exists())
+
+    # Si la simulación falla a medio camino se borra la corrida con las tiradas que alcanzó a guardar
+    def test_ingest_run_deletes_on_failure(self):
+        def failing():
+            yield from streetFighting(4000)
+            raise RuntimeError('falla')
+
+        with self.assertRaises(RuntimeError):
+            LogIngest(ZGRAK, 'Street Fighting').ingestRun(failing(), days=1)
+        self.assertFalse(AdventureRun.objects.exists())
+        self.assertFalse(AdventureLog.objects.exists())
+
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        clearCaches()
+
+    # Recorre las páginas siguiendo next, con muchas tiradas del mismo lote (mismo created_at)
+    def test_cursor_across_equal_created_at(self):
+        ingest = LogIngest(ZGRAK, 'Street Fighting')
+        for _, df_detail in streetFighting(300, chunkSize=100):
+            ingest.ingest(df_detail)
+        self.assertLess(AdventureLog.objects.values('created_at').distinct().count(), 10)
+
+        url = f'/league/logs/?adventure={ingest.adventure.id}&characterprogression={ingest.progression.id}&page_size=70'
+        ids = list()
+        while url is not None:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [row['id'] for row in response.json()['results']]
+            url = response.json()['next']
+        expected = list(AdventureLog.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    # Un cursor que no se puede leer es un 404
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/league/logs/?cursor=no-es-un-cursor').status_code, 404)
+
+class CachedResponseTests(TestCase):
+
+    def setUp(self):
+        clearCaches()
+
+    # Con el ETag vigente responde 304, y al cambiar los datos vuelve a responder 200 con otro ETag
+    def test_etag_not_modified(self):
+        Adventure.objects.create(name='Street Fighting')
+        response = self.client.get('/league/leaderboard/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        response = self.client.get('/league/leaderboard/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        bumpResource('league')
+        response = self.client.get('/league/leaderboard/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+class JobTests(TestCase):
+
+    # Cada worker toma un trabajo distinto, en orden, y sin trabajos en cola devuelve None
+    def test_claim_job(self):
+        jobs = enqueueJobs(['fvtt-Actor-zgrak.json'], ['street_fighting.json', 'honest_work.json'], 1000, seed=1)
+        first = claimJob('a')
+        second = claimJob('b')
+        self.assertEqual((first.id, first.status, first.worker), (jobs[0].id, SimulationJob.RUNNING, 'a'))
+        self.assertEqual((second.id, second.status, second.worker), (jobs[1].id, SimulationJob.RUNNING, 'b'))
+        self.assertIsNone(claimJob('c'))
+
+    # Si otro worker toma el trabajo entre la lectura y el UPDATE, se pasa al siguiente
+    def test_claim_job_lost_race(self):
+        jobs = enqueueJobs(['fvtt-Actor-zgrak.json'], ['street_fighting.json', 'honest_work.json'], 1000, seed=1)
+        first = QuerySet.first
+        raced = list()
+
+        def staleFirst(queryset):
+            jobId = first(queryset)
+            if not raced:
+                raced.append(jobId)
+                SimulationJob.objects.filter(id=jobId).update(status=SimulationJob.RUNNING, worker='otro')
+            return jobId
+
+        with mock.patch.object(QuerySet, 'first', autospec=True, side_effect=staleFirst):
+            job = claimJob('a')
+        self.assertEqual(raced, [jobs[0].id])
+        self.assertEqual((job.id, job.worker), (jobs[1].id, 'a'))
+        self.assertEqual(SimulationJob.objects.get(id=jobs[0].id).worker, 'otro')
+
+    # En cola se cancela de inmediato, ejecutándose pasa a cancelando y terminado no cambia
+    def test_cancel_job(self):
+        queued, running, done = enqueueJobs(['fvtt-Actor-zgrak.json'], ['street_fighting.json', 'honest_work.json',
+                                                                          'private_investigations.json'], 1000, seed=1)
+        SimulationJob.objects.filter(id=running.id).update(status=SimulationJob.RUNNING)
+        SimulationJob.objects.filter(id=done.id).update(status=SimulationJob.DONE)
+
+        job = cancelJob(queued.id)
+        self.assertEqual(job.status, SimulationJob.CANCELLED)
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(cancelJob(running.id).status, SimulationJob.CANCELLING)
+        self.assertEqual(cancelJob(done.id).status, SimulationJob.DONE)
+
+    # Un trabajo cancelado mientras se ejecuta se detiene al terminar el bloque y borra su corrida
+    def test_cancel_running_job(self):
+        enqueueJobs(['fvtt-Actor-zgrak.json'], ['street_fighting.json'], 50000, seed=1, detail=True)
+        job = claimJob('a')
+        cancelJob(job.id)
+        runJob(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, SimulationJob.CANCELLED)
+        self.assertIsNone(job.run)
+        self.assertFalse(AdventureRun.objects.exists())
+        self.assertFalse(AdventureLog.objects.exists())
+
+    # Un trabajo cuyo worker murió vuelve a la cola, se borra su corrida a medias y otro worker lo termina
+    def test_recover_dead_worker(self):
+        enqueueJobs(['fvtt-Actor-zgrak.json'], ['street_fighting.json'], 3000, seed=1)
+        job = claimJob('muerto')
+        LogIngest(ZGRAK, 'Street Fighting').createRun(days=1, seed=job.seed)
+        SimulationJob.objects.filter(id=job.id).update(heartbeat_at=timezone.now() - timedelta(seconds=60))
+
+        self.assertIsNone(claimJob('otro', timeout=120))
+        self.assertTrue(AdventureRun.objects.filter(cycles=0).exists())
+
+        job = claimJob('otro', timeout=30)
+        self.assertEqual((job.worker, job.attempts, job.progress), ('otro', 2, 0))
+        self.assertFalse(AdventureRun.objects.exists())
+        runJob(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, SimulationJob.DONE)
+        self.assertIsNotNone(job.heartbeat_at)
+
+    # Tras JOB_ATTEMPTS workers muertos falla, y uno que se estaba cancelando queda cancelado
+    def test_recover_exhausted_and_cancelling(self):
+        failing, cancelling = enqueueJobs(['fvtt-Actor-zgrak.json'], ['street_fighting.json', 'honest_work.json'], 3000, seed=1)
+        old = timezone.now() - timedelta(seconds=600)
+        SimulationJob.objects.filter(id=failing.id).update(status=SimulationJob.RUNNING, attempts=JOB_ATTEMPTS, heartbeat_at=old)
+        SimulationJob.objects.filter(id=cancelling.id).update(status=SimulationJob.CANCELLING, attempts=1, heartbeat_at=old)
+        self.assertEqual(recoverJobs(300), 2)
+        self.assertEqual(SimulationJob.objects.get(id=failing.id).status, SimulationJob.FAILED)
+        self.assertEqual(SimulationJob.objects.get(id=cancelling.id).status, SimulationJob.CANCELLED)
+        self.assertEqual(recoverJobs(300), 0)
+
+    # El worker ejecuta la cola completa y guarda la corrida de cada trabajo
+    def test_work_loop(self):
+        jobs = enqueueJobs(['fvtt-Actor-zgrak.json'], ['street_fighting.json', 'honest_work.json'], 3000, seed=1)
+        workLoop(name='a', once=True)
+        for job in jobs:
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.progress, job.worker), (SimulationJob.DONE, 3000, 'a'))
+            self.assertEqual(job.run.cycles, 3000)
+
+class SimulateCommandTests(SimpleTestCase):
+
+    # El csv de varias aventuras (con y sin dificultades) se vuelve a leer con las mismas columnas en todas las filas
+    def test_output_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'simulation.csv')
+            call_command('simulate', '-c', 'fvtt-Actor-zgrak.json', '-n', '3', '-s', '1', '-o', 'file', '-f', path,
+                         stdout=io.StringIO())
+            df_detail = pd.read_csv(path)
+        self.assertEqual(tuple(df_detail.columns), CSV_COLUMNS)
+        self.assertEqual(set(df_detail['character']), {'fvtt-Actor-zgrak.json'})
+        for name in adventureManager.adventureNames():
+            plan = adventureManager.loadPlan(name)
+            df_adventure = df_detail[df_detail['adventure'] == plan.name]
+            self.assertEqual(len(df_adventure), 3*plan.comparison['ammount'])
+            self.assertEqual(df_adventure['DC'].notna().all(), plan.comparison['rollsDice'])
+            self.assertEqual(df_adventure['DC'].isna().all(), not plan.comparison['rollsDice'])
+
+# LogWriter hace commit y checkpoint del WAL, no puede correr dentro de la transacción de TestCase
+class LogWriterTests(TransactionTestCase):
+
+    # Cada corrida guarda todas sus tiradas y las mismas estadísticas que una ingesta directa
+    def test_write_runs(self):
+        tasks = [('fvtt-Actor-zgrak.json', name, 3000, 1, 0, 1000, 'greedy', None)
+                 for name in ('street_fighting.json', 'honest_work.json')]
+        writer = LogWriter(tasks, workers=2, commitRows=1500)
+        runs = writer.run()
+        self.assertEqual(len(runs), 2)
+        self.assertGreater(writer.transactions, 1)
+        self.assertEqual(writer.rows, AdventureLog.objects.count())
+
+        run = AdventureRun.objects.get(adventure__name='Street Fighting')
+        df_summary = pd.concat([chunk[0] for chunk in streetFighting(3000, chunkSize=1000)], ignore_index=True)
+        self.assertEqual(run.cycles, 3000)
+        self.assertAlmostEqual(run.money, df_summary['money'].mean())
+
+    # Un par que falla no deja su corrida y el resto queda guardado
+    def test_failed_pair(self):
+        tasks = [('fvtt-Actor-zgrak.json', name, 1000, 1, 0, 1000, 'greedy', None)
+                 for name in ('street_fighting.json', 'no_existe.json')]
+        with self.assertRaises(RuntimeError):
+            LogWriter(tasks, workers=1).run()
+        self.assertEqual(list(AdventureRun.objects.values_list('adventure__name', flat=True)), ['Street Fighting'])
+
+    # Los productores no importan Django: funcionan en procesos iniciados con spawn
+    def test_producer_with_spawn(self):
+        context = multiprocessing.get_context('spawn')
+        tasks = context.Queue()
+        messages = context.Queue()
+        tasks.put((0, ('fvtt-Actor-zgrak.json', 'street_fighting.json', 2000, 1, 0, 1000, 'greedy', None)))
+        tasks.put(None)
+        producer = context.Process(target=produceRuns, args=(tasks, messages, 0))
+        producer.start()
+        received = [messages.get(timeout=60) for _ in range(5)]
+        producer.join(timeout=60)
+        self.assertEqual(producer.exitcode, 0)
+        self.assertEqual([message[0] for message in received], ['open', 'rows', 'rows', 'close', 'done'])
+        self.assertEqual(received[3][2].cycles, 2000)
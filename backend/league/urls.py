@@ -2,4 +2,12 @@ from django.urls import path
 from .views import *
 
 urlpatterns = [
-]
\ No newline at end of file
+    path('logs/', AdventureLogList.as_view()),
+    path('logs/<int:pk>/', AdventureLogDetail.as_view()),
+    path('runs/', AdventureRunList.as_view()),
+    path('runs/<int:pk>/', AdventureRunDetail.as_view()),
+    path('leaderboard/', Leaderboard.as_view()),
+    path('jobs/', SimulationJobList.as_view()),
+    path('jobs/<int:pk>/', SimulationJobDetail.as_view()),
+    path('jobs/<int:pk>/cancel/', SimulationJobCancel.as_view()),
+]
@@ -1,3 +1,139 @@
-from django.shortcuts import render
+from django.db.models import Count, F, Sum
+from rest_framework import generics, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from backend.caching import CachedResponseMixin
+from backend.filters import QueryFilterMixin
+from backend.pagination import KeysetPagination
+from engine.game.environment import Adventure
+from league.jobs import cancelJob, enqueueJobs
+from league.models import AdventureLog, AdventureRun, SimulationJob
+from league.serializers import (AdventureLogSerializer, AdventureRunSerializer, LeaderboardSerializer,
+                                SimulationJobSerializer, SimulationRequestSerializer)
+
+# Tiradas del simulador
+class AdventureLogList(CachedResponseMixin, QueryFilterMixin, generics.ListAPIView):
+    """
+    Filtrando por adventure y characterprogression las páginas van por (created_at, id) descendente
+    y se leen directo del índice (adventure, characterprogression, created_at). En otro caso van por
+    id, que sigue el orden de inserción: sin filtros se leen de la llave primaria y filtrando por
+    skill y success del índice (skill, success).
+    """
+    cache_resources = ('game', 'league')
+    queryset = AdventureLog.objects.select_related('adventure', 'characterprogression__character', 'skill')
+    serializer_class = AdventureLogSerializer
+    pagination_class = KeysetPagination
+    query_filters = {
+        'adventure': ('adventure_id', 'int'),
+        'characterprogression': ('characterprogression_id', 'int'),
+        'character': ('characterprogression__character_id', 'int'),
+        'skill': ('skill_id', 'int'),
+        'success': ('success', 'bool'),
+        'run': ('run_id', 'int'),
+        'since': ('created_at__gte', 'datetime'),
+        'until': ('created_at__lt', 'datetime')
+    }
+
+    # Llave de la paginación según los filtros
+    def __get_keyset(self):
+        if self.request.query_params.get('adventure') and self.request.query_params.get('characterprogression'):
+            return ('created_at', 'id')
+        return ('id',)
+    keyset = property(__get_keyset)
+
+class AdventureLogDetail(CachedResponseMixin, generics.RetrieveAPIView):
+    cache_resources = ('game', 'league')
+    queryset = AdventureLogList.queryset
+    serializer_class = AdventureLogSerializer
+
+# Corridas del simulador con sus resultados agregados
+class AdventureRunList(CachedResponseMixin, QueryFilterMixin, generics.ListAPIView):
+    cache_resources = ('game', 'league')
+    queryset = AdventureRun.objects.select_related('adventure', 'characterprogression__character')
+    serializer_class = AdventureRunSerializer
+    pagination_class = KeysetPagination
+    query_filters = {
+        'adventure': ('adventure_id', 'int'),
+        'characterprogression': ('characterprogression_id', 'int'),
+        'character': ('characterprogression__character_id', 'int'),
+        'engineversion': ('engineversion', 'str'),
+        'since': ('created_at__gte', 'datetime'),
+        'until': ('created_at__lt', 'datetime')
+    }
+
+class AdventureRunDetail(CachedResponseMixin, generics.RetrieveAPIView):
+    cache_resources = ('game', 'league')
+    queryset = AdventureRunList.queryset
+    serializer_class = AdventureRunSerializer
+
+# Tabla de posiciones: dinero por día esperado de cada personaje en cada aventura
+class Leaderboard(CachedResponseMixin, QueryFilterMixin, generics.ListAPIView):
+    """
+    Junta todas las corridas de cada progreso en cada aventura, ponderando por sus ciclos,
+    y ordena de mayor a menor dinero por día. Es la consulta más pedida en noche de liga,
+    por eso se guarda en caché hasta que llegue una corrida nueva.
+    """
+    cache_resources = ('game', 'league')
+    serializer_class = LeaderboardSerializer
+    query_filters = {
+        'adventure': ('adventure_id', 'int'),
+        'character': ('characterprogression__character_id', 'int'),
+        'engineversion': ('engineversion', 'str')
+    }
+
+    def get_queryset(self):
+        return AdventureRun.objects.values(
+            'adventure', 'characterprogression'
+        ).annotate(
+            adventureName=F('adventure__name'),
+            characterName=F('characterprogression__character__name'),
+            level=F('characterprogression__level'),
+            runs=Count('id'),
+            totalCycles=Sum('cycles'),
+            moneyPerDay=Sum(F('moneyperday')*F('cycles'))/Sum('cycles')
+        ).order_by('-moneyPerDay')
+
+# Cola de simulaciones: GET lista los trabajos, POST encola uno por cada par personaje x aventura
+class SimulationJobList(QueryFilterMixin, generics.ListAPIView):
+    """
+    El POST sólo crea las filas de la cola y responde de inmediato, las simulaciones las
+    ejecutan los procesos de "manage.py simulation_worker". No se guarda en caché: el avance
+    cambia mientras se ejecutan.
+    """
+    queryset = SimulationJob.objects.all()
+    serializer_class = SimulationJobSerializer
+    pagination_class = KeysetPagination
+    query_filters = {
+        'batch': ('batch', 'str'),
+        'status': ('status', 'str'),
+        'character': ('character', 'str'),
+        'adventure': ('adventure', 'str')
+    }
+
+    def post(self, request, *args, **kwargs):
+        simulation = SimulationRequestSerializer(data=request.data)
+        simulation.is_valid(raise_exception=True)
+        data = simulation.validated_data
+        adventureManager = Adventure()
+        jobs = enqueueJobs(
+            data.get('characters') or adventureManager.characterNames(),
+            data.get('adventures') or adventureManager.adventureNames(),
+            data['cycles'],
+            seed=data.get('seed'),
+            apuesta=data['apuesta'],
+            player=data['player'],
+            detail=data['detail']
+        )
+        return Response(SimulationJobSerializer(jobs, many=True).data, status=status.HTTP_201_CREATED)
+
+class SimulationJobDetail(generics.RetrieveAPIView):
+    queryset = SimulationJob.objects.all()
+    serializer_class = SimulationJobSerializer
+
+# Cancela un trabajo en cola o en ejecución
+class SimulationJobCancel(APIView):
+    def post(self, request, pk):
+        if not SimulationJob.objects.filter(id=pk).exists():
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        return Response(SimulationJobSerializer(cancelJob(pk)).data)
@@ -0,0 +1,166 @@
+import multiprocessing
+import queue
+import time
+
+from django.db import connection, connections, transaction
+
+from backend.database import checkpoint
+from engine.game.environment import Adventure
+from league.ingest import LogIngest
+from league.models import AdventureRun
+from league.producer import produceRuns
+
+# Filas que junta el escritor antes de hacer commit
+COMMIT_ROWS = 200000
+# Segundos máximos que el escritor junta mensajes para un mismo commit
+COMMIT_INTERVAL = 1.0
+# Mensajes en espera: si el escritor se atrasa los productores esperan, en vez de llenar la memoria
+QUEUE_SIZE = 16
+# Segundos entre revisiones de los productores mientras la cola está vacía
+POLL = 1.0
+
+class LogWriter:
+    """
+    Clase que guarda las corridas de un barrido en la base de datos con un solo escritor (write-behind).
+    - Atributos:
+        tasks: tareas de RosterSweep, una corrida por cada una
+        workers: procesos productores que simulan
+        player: jugador de los personajes
+        commitRows: filas que se juntan antes de hacer commit
+        commitInterval: segundos máximos que se juntan mensajes para un mismo commit
+    - Los productores (produceRuns, en league/producer.py) simulan y envían los bloques de tiradas por
+      una cola acotada; no importan Django, así funcionan también con spawn (macOS, Windows)
+    - El escritor (el proceso que llama a run) junta mensajes de varias corridas y los guarda en una
+      sola transacción grande: SQLite admite un escritor a la vez, así nadie espera el bloqueo de otro
+    - Nunca espera la cola con una transacción abierta, así entre commits la web lee y escribe sin
+      esperas (con WAL, ver backend/database.py, las lecturas tampoco esperan durante el commit)
+    - Si un par falla se borra su corrida y el error se informa al final; si falla el escritor se
+      detienen los productores y se borran las corridas sin terminar
+    """
+
+    ### Initializer ###
+    def __init__(self, tasks, **kwargs):
+        self.__tasks = list(tasks)
+        self.__workers = max(1, min(kwargs.get('workers') or multiprocessing.cpu_count(), len(self.__tasks)))
+        self.__player = kwargs.get('player', '')
+        self.__commitRows = kwargs.get('commitRows', COMMIT_ROWS)
+        self.__commitInterval = kwargs.get('commitInterval', COMMIT_INTERVAL)
+        self.__queueSize = kwargs.get('queueSize', QUEUE_SIZE)
+        self.__open = dict()
+        self.__runs = list()
+        self.__errors = list()
+        self.__rows = 0
+        self.__transactions = 0
+
+    def __str__(self):
+        return f'{len(self.__tasks)} corridas con {self.__workers} productores: {self.__rows} tiradas en {self.__transactions} transacciones'
+
+    ### Getters & Setters ###
+    def __get_runs(self): return list(self.__runs)
+    runs = property(__get_runs)
+    def __get_rows(self): return self.__rows
+    rows = property(__get_rows)
+    def __get_transactions(self): return self.__transactions
+    transactions = property(__get_transactions)
+
+    ### Class Methods ###
+    # Simula y guarda todas las corridas
+    def run(self):
+        """
+        Returns:
+            list: Las AdventureRun guardadas, en el orden en que terminaron
+
+        Raises:
+            RuntimeError: Si falló algún par (el resto de las corridas queda guardado)
+        """
+        if not self.__tasks:
+            return list()
+        tasks = multiprocessing.Queue()
+        for item in enumerate(self.__tasks):
+            tasks.put(item)
+        for _ in range(self.__workers):
+            tasks.put(None)
+        messages = multiprocessing.Queue(self.__queueSize)
+
+        # Los productores no heredan la conexión del escritor
+        connections.close_all()
+        producers = [multiprocessing.Process(target=produceRuns, args=(tasks, messages, producer), daemon=True)
+                     for producer in range(self.__workers)]
+        for producer in producers:
+            producer.start()
+        try:
+            finished = 0
+            while finished < len(producers):
+                finished += self.__write(self.__collect(messages, producers))
+        except BaseException:
+            for producer in producers:
+                producer.terminate()
+            for _, run, _ in self.__open.values():
+                AdventureRun.objects.filter(id=run.id).delete()
+            self.__open.clear()
+            raise
+        for producer in producers:
+            producer.join()
+
+        # El WAL creció con la escritura masiva, se devuelve a la base de datos
+        checkpoint(connection)
+        if self.__errors:
+            raise RuntimeError(f'{len(self.__errors)} corridas fallaron, la primera:\n{self.__errors[0]}')
+        return self.runs
+
+    # Junta mensajes hasta commitRows filas o commitInterval segundos, sin transacciones abiertas
+    def __collect(self, messages, producers):
+        batch = list()
+        rows = 0
+        deadline = None
+        while rows < self.__commitRows:
+            timeout = POLL if deadline is None else deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                message = messages.get(timeout=timeout)
+            except queue.Empty:
+                if batch:
+                    break
+                self.__checkProducers(producers)
+                continue
+            if deadline is None:
+                deadline = time.monotonic() + self.__commitInterval
+            batch.append(message)
+            if message[0] == 'rows':
+                rows += len(message[2])
+        return batch
+
+    # Guarda los mensajes en una sola transacción, devuelve cuántos productores terminaron
+    def __write(self, batch):
+        finished = 0
+        adventureManager = Adventure()
+        with transaction.atomic():
+            for message in batch:
+                kind, key = message[:2]
+                if kind == 'open':
+                    characterName, adventureName, kwargs = message[2:]
+                    ingest = LogIngest(adventureManager.loadCharacter(characterName), adventureName, player=self.__player)
+                    self.__open[key] = (ingest, ingest.createRun(**kwargs), kwargs)
+                elif kind == 'rows':
+                    ingest, run, _ = self.__open[key]
+                    self.__rows += ingest.ingest(message[2], run=run)
+                elif kind == 'close':
+                    ingest, run, kwargs = self.__open.pop(key)
+                    statistics, skills = message[2:]
+                    self.__runs.append(ingest.finishRun(run, statistics, skills, **kwargs))
+                elif kind == 'abort':
+                    if key in self.__open:
+                        _, run, _ = self.__open.pop(key)
+                        AdventureRun.objects.filter(id=run.id).delete()
+                    self.__errors.append(message[2])
+                else:
+                    finished += 1
+        self.__transactions += 1
+        return finished
+
+    # Falla si un productor murió sin terminar (p.ej. sin memoria), sus corridas quedarían a medias
+    def __checkProducers(self, producers):
+        for producer in producers:
+            if producer.exitcode not in (None, 0):
+                raise RuntimeError(f'El productor {producer.name} terminó con código {producer.exitcode}')
@@ -0,0 +1,73 @@
+"""
+Ejecuta el suite de benchmarks del motor y lo compara con la línea base.
+
+    python -m engine.benchmarks                 # mide todo y compara con engine/benchmarks/baseline.json
+    python -m engine.benchmarks -k Skill        # sólo los benchmarks cuyo nombre contiene Skill
+    python -m engine.benchmarks --save          # guarda el resultado como nueva línea base
+
+Termina con código 1 si hay alguna regresión, así se puede usar antes de subir cambios al motor.
+"""
+import argparse
+import sys
+
+from engine.benchmarks.runner import BASELINE_PATH, TOLERANCE, BenchmarkRunner, environmentInfo, readBaseline
+from engine.benchmarks.suite import benchmarks
+
+# Argumentos de la línea de comandos
+def parseArguments(arguments=None):
+    parser = argparse.ArgumentParser(prog='python -m engine.benchmarks', description='Benchmarks del motor de simulación')
+    parser.add_argument('-k', '--filter', action='append', dest='filters',
+                        help='Sólo los benchmarks cuyo nombre contiene el texto, se puede repetir')
+    parser.add_argument('-b', '--baseline', default=BASELINE_PATH, help='Json de la línea base')
+    parser.add_argument('-t', '--tolerance', type=float, default=TOLERANCE,
+                        help='Caída de ops/s (o alza de memoria) aceptada antes de marcar una regresión')
+    parser.add_argument('--save', action='store_true', help='Guarda el resultado como línea base en lugar de comparar')
+    parser.add_argument('--no-memory', action='store_false', dest='memory', help='No mide el peak de memoria')
+    return parser.parse_args(arguments)
+
+# Texto de un tiempo en segundos con la unidad más cómoda
+def formatTime(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('µs', 1e-6)):
+        if seconds >= scale:
+            return f'{seconds/scale:.2f} {unit}'
+    return f'{seconds/1e-9:.0f} ns'
+
+# Texto de una cantidad de bytes
+def formatMemory(size):
+    if size is None:
+        return '-'
+    return f'{size/2**20:.2f} MB' if size >= 2**20 else f'{size/2**10:.1f} KB'
+
+def main(arguments=None):
+    options = parseArguments(arguments)
+    suite = benchmarks()
+    if options.filters:
+        suite = [benchmark for benchmark in suite if any(text in benchmark.name for text in options.filters)]
+    runner = BenchmarkRunner(suite, memory=options.memory, tolerance=options.tolerance)
+    runner.run(lambda name, result: print(
+        f'{name:<48} {result["opsPerSecond"]:>14,.0f} ops/s  p50 {formatTime(result["p50"]):>10}  '
+        f'p95 {formatTime(result["p95"]):>10}  p99 {formatTime(result["p99"]):>10}  '
+        f'peak {formatMemory(result["peakMemory"]):>10}', flush=True))
+
+    if options.save:
+        runner.save(options.baseline)
+        print(f'Línea base guardada en {options.baseline}')
+        return 0
+
+    baseline = readBaseline(options.baseline)
+    if baseline is None:
+        print(f'No hay línea base en {options.baseline}, usar --save para crearla')
+        return 0
+    if baseline['environment'] != environmentInfo():
+        print(f'Aviso: la línea base se midió en otro entorno {baseline["environment"]}')
+    df_comparison = runner.compare(baseline)
+    df_comparison = df_comparison[['benchmark', 'speedup', 'memory', 'regression']]
+    print(df_comparison.to_string(index=False, float_format=lambda value: f'{value:.2f}x'))
+    regressions = df_comparison.loc[df_comparison['regression'], 'benchmark'].tolist()
+    if regressions:
+        print(f'{len(regressions)} regresiones: {", ".join(regressions)}')
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
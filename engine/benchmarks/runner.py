@@ -0,0 +1,151 @@
+import gc
+import json
+import os
+import platform
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from engine.game.environment import ENGINE_VERSION
+
+# Línea base guardada junto al suite
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+# Caída de ops/s (o alza de memoria) sobre la línea base que se considera regresión
+TOLERANCE = 0.25
+
+# Versiones y máquina de la medición, para saber si dos resultados son comparables
+def environmentInfo():
+    return {
+        'engine': ENGINE_VERSION,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count()
+    }
+
+class BenchmarkRunner:
+    """
+    Clase que ejecuta los benchmarks y los compara con una línea base.
+    - Cada benchmark se prepara fuera del tiempo medido, se llama una vez para calentar
+      y luego se toman sus muestras con el recolector de basura apagado (como timeit)
+    - Entrega ops/s, percentiles de latencia por llamada y el peak de memoria de una llamada
+      (medido aparte con tracemalloc, que hace más lentas las llamadas)
+    - Compara con la línea base guardada en json y marca las regresiones que superan la tolerancia
+    """
+
+    ### Initializer ###
+    def __init__(self, suite, **kwargs):
+        self.__suite = suite
+        self.__memory = kwargs.get('memory', True)
+        self.__tolerance = kwargs.get('tolerance', TOLERANCE)
+        self.__results = dict()
+
+    def __str__(self):
+        return f'{len(self.__suite)} benchmarks, {len(self.__results)} medidos'
+
+    ### Getters & Setters ###
+    def __get_results(self): return dict(self.__results)
+    results = property(__get_results)
+
+    ### Class Methods ###
+    # Ejecuta todos los benchmarks, avisando a progress (si se indica) después de cada uno
+    def run(self, progress=None):
+        for benchmark in self.__suite:
+            self.__results[benchmark.name] = self.measure(benchmark)
+            if progress is not None:
+                progress(benchmark.name, self.__results[benchmark.name])
+        return self.results
+
+    # Mide un benchmark
+    def measure(self, benchmark):
+        """
+        Returns:
+            dict: opsPerSecond, latencias p50, p95, p99 y max (segundos por llamada) y peakMemory (bytes)
+        """
+        function = benchmark.setup()
+        function()
+
+        samples = np.empty(benchmark.repeat)
+        enabled = gc.isenabled()
+        gc.collect()
+        gc.disable()
+        try:
+            for sample in range(benchmark.repeat):
+                start = time.perf_counter()
+                for _ in range(benchmark.number):
+                    function()
+                samples[sample] = time.perf_counter() - start
+        finally:
+            if enabled:
+                gc.enable()
+
+        latencies = samples/benchmark.number
+        result = {
+            'opsPerSecond': benchmark.ops*benchmark.number*benchmark.repeat/samples.sum(),
+            'p50': float(np.percentile(latencies, 50)),
+            'p95': float(np.percentile(latencies, 95)),
+            'p99': float(np.percentile(latencies, 99)),
+            'max': float(latencies.max()),
+            'peakMemory': None
+        }
+        if self.__memory:
+            result['peakMemory'] = self.__peakMemory(function)
+        return result
+
+    # Compara los resultados con una línea base
+    def compare(self, baseline):
+        """
+        Args:
+            baseline (dict): Línea base leída con readBaseline
+
+        Returns:
+            pandas.DataFrame: Una fila por benchmark con la razón de ops/s y de memoria contra la
+                línea base (speedup > 1 es más rápido) y si es una regresión
+        """
+        rows = list()
+        for name, result in self.__results.items():
+            row = {'benchmark': name}
+            row.update(result)
+            reference = baseline['results'].get(name)
+            row['speedup'] = None
+            row['memory'] = None
+            if reference is not None:
+                row['speedup'] = result['opsPerSecond']/reference['opsPerSecond']
+                if result['peakMemory'] and reference.get('peakMemory'):
+                    row['memory'] = result['peakMemory']/reference['peakMemory']
+            row['regression'] = bool(
+                (row['speedup'] is not None and row['speedup'] < 1 - self.__tolerance) or
+                (row['memory'] is not None and row['memory'] > 1 + self.__tolerance)
+            )
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    # Guarda los resultados como línea base
+    def save(self, path=BASELINE_PATH):
+        data = {'environment': environmentInfo(), 'results': self.__results}
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'w', encoding = 'utf8') as file:
+            json.dump(data, file, indent=2, sort_keys=True)
+            file.write('\n')
+        os.replace(temporary, path)
+
+    # Peak de memoria (sobre lo ya asignado) de una llamada
+    def __peakMemory(self, function):
+        gc.collect()
+        tracemalloc.start()
+        try:
+            function()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+# Lee una línea base guardada con BenchmarkRunner.save, None si no existe
+def readBaseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding = 'utf8') as file:
+        return json.load(file)
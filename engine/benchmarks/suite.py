@@ -0,0 +1,133 @@
+import os
+
+import numpy as np
+
+from engine.game.characters import Character
+from engine.game.environment import Adventure
+from engine.game.objects import Dice, Die
+
+# Semilla fija de todos los benchmarks, así cada corrida mide exactamente el mismo trabajo
+SEED = 20240601
+# Datos fijos: los personajes y aventuras de engine/data
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data')
+# Par personaje x aventura con que se mide executeMoneyAdventure
+MONEY_CHARACTER = 'fvtt-Actor-zgrak.json'
+MONEY_ADVENTURE = 'illegal_gambling.json'
+# Ciclos de executeMoneyAdventure, de 10^2 a 10^6
+MONEY_CYCLES = (10**2, 10**3, 10**4, 10**5, 10**6)
+
+class Benchmark:
+    """
+    Clase que describe una medición del suite.
+    - Atributos:
+        name: nombre único, se usa para comparar con la línea base
+        setup: función sin argumentos que prepara los datos y devuelve la función a medir,
+            así la preparación no entra en el tiempo medido
+        number: llamadas por muestra, para que funciones muy rápidas no midan sólo el reloj
+        repeat: muestras, de ellas salen los percentiles de latencia
+        ops: operaciones por llamada (p.ej. ciclos simulados), para calcular ops/s
+    """
+
+    __slots__ = ('__name', '__setup', '__number', '__repeat', '__ops')
+
+    ### Initializer ###
+    def __init__(self, name, setup, **kwargs):
+        self.__name = name
+        self.__setup = setup
+        self.__number = kwargs.get('number', 1)
+        self.__repeat = kwargs.get('repeat', 20)
+        self.__ops = kwargs.get('ops', 1)
+
+    def __str__(self):
+        return f'{self.__name}: {self.__repeat} x {self.__number} llamadas'
+
+    ### Getters & Setters ###
+    def __get_name(self): return self.__name
+    name = property(__get_name)
+    def __get_setup(self): return self.__setup
+    setup = property(__get_setup)
+    def __get_number(self): return self.__number
+    number = property(__get_number)
+    def __get_repeat(self): return self.__repeat
+    repeat = property(__get_repeat)
+    def __get_ops(self): return self.__ops
+    ops = property(__get_ops)
+
+# Nombres de los json de una carpeta de engine/data
+def dataFiles(folder):
+    return sorted(filename for filename in os.listdir(os.path.join(DATA_PATH, folder)) if filename.endswith('.json'))
+
+# Personaje leído directo del json, sin pasar por el caché
+def readCharacter(name):
+    return Character(os.path.join(DATA_PATH, 'characters', name))
+
+# Tirada de un dado suelto, con el estado global de np.random fijado
+def dieRoll():
+    die = Die(20)
+    np.random.seed(SEED)
+    return lambda: die.roll()
+
+# Tirada de un grupo de dados con bono
+def diceRoll():
+    dice = Dice('2d6+1d4+3')
+    np.random.seed(SEED)
+    return lambda: dice.roll()
+
+# Check activo de una habilidad con ventaja y un bono de dado
+def skillCheck():
+    skill = readCharacter(MONEY_CHARACTER).skills('perception')
+    bonus = [Die(4)]
+    rng = np.random.default_rng(SEED)
+    return lambda: skill.check(advantage=True, extraBonuses=bonus, rng=rng)
+
+# Check promedio de una habilidad con ventaja
+def skillAvgRoll():
+    skill = readCharacter(MONEY_CHARACTER).skills('perception')
+    return lambda: skill.avgRoll(advantage=True)
+
+# Lectura y compilación de un personaje desde el json de Foundry
+def characterLoad(name):
+    path = os.path.join(DATA_PATH, 'characters', name)
+    return lambda: Character(path)
+
+# Compilación y cocinado de una aventura, sin caché (cold) o desde el caché
+def adventureLoad(name, cache):
+    adventureManager = Adventure()
+    character = adventureManager.loadCharacter(MONEY_CHARACTER)
+    adventureManager.loadAdventure(name, character)
+    return lambda: adventureManager.loadAdventure(name, character, cache=cache)
+
+# Simulación vectorizada de la aventura de dinero
+def moneyAdventure(cycles):
+    adventureManager = Adventure()
+    character = adventureManager.loadCharacter(MONEY_CHARACTER)
+    cookedAdventure = adventureManager.loadAdventure(MONEY_ADVENTURE, character)
+    return lambda: adventureManager.executeMoneyAdventure(cookedAdventure, cycles, vectorized=True, seed=SEED)
+
+# Simulación de la aventura de dinero ciclo a ciclo (modo no vectorizado)
+def moneyAdventureLoop(cycles):
+    adventureManager = Adventure()
+    character = adventureManager.loadCharacter(MONEY_CHARACTER)
+    cookedAdventure = adventureManager.loadAdventure(MONEY_ADVENTURE, character)
+    return lambda: adventureManager.executeMoneyAdventure(cookedAdventure, cycles, seed=SEED)
+
+# Todos los benchmarks del suite, en el orden en que se ejecutan
+def benchmarks():
+    suite = [
+        Benchmark('Die.roll', dieRoll, number=1000),
+        Benchmark('Dice.roll', diceRoll, number=1000),
+        Benchmark('Skill.check', skillCheck, number=1000),
+        Benchmark('Skill.avgRoll', skillAvgRoll, number=10000),
+    ]
+    for name in dataFiles('characters'):
+        suite.append(Benchmark(f'Character[{name}]', lambda name=name: characterLoad(name), repeat=10))
+    for name in dataFiles('adventures'):
+        suite.append(Benchmark(f'loadAdventure[{name}]', lambda name=name: adventureLoad(name, False), repeat=10))
+        suite.append(Benchmark(f'loadAdventure[{name}]:cached', lambda name=name: adventureLoad(name, True), number=1000))
+    suite.append(Benchmark('executeMoneyAdventure[loop]@100', lambda: moneyAdventureLoop(100), repeat=3, ops=100))
+    for cycles in MONEY_CYCLES:
+        # Menos muestras mientras más grande la corrida, así el suite completo toma unos pocos minutos
+        repeat = max(3, min(20, 10**6//(cycles*10)))
+        suite.append(Benchmark(f'executeMoneyAdventure@{cycles}', lambda cycles=cycles: moneyAdventure(cycles),
+                               repeat=repeat, ops=cycles))
+    return suite
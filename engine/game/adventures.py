@@ -0,0 +1,112 @@
+import json
+from types import MappingProxyType
+
+from engine.game.objects import Dice
+
+# Copia de sólo lectura de un valor del json: los dict pasan a MappingProxyType y las listas a tuplas
+def freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(element) for key, element in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(element) for element in value)
+    return value
+
+class AdventurePlan:
+    """
+    Clase que representa una aventura ya compilada, independiente del personaje.
+    - Atributos:
+        name: nombre de la aventura
+        type: tipo de aventura ['money']
+        cost: paso 'expenditure' (días y oro)
+        rolls: pasos 'challenge' y 'cheat', en el orden del json
+        prize: paso 'reward'
+        replacements: cambios de dados que permiten los cheats
+        uniqueBonus: bono que se aplica a una sola habilidad
+        comparison: tiradas enfrentadas, con los Dice de la dificultad ya construidos
+    - Es inmutable: todo lo que entrega es de sólo lectura, así se comparte entre personajes
+    - Tiene un método para obtener la tabla de premios según la apuesta
+    """
+
+    __slots__ = ('__name', '__type', '__cost', '__rolls', '__prize', '__replacements',
+                 '__uniqueBonus', '__comparison')
+
+    ### Initializer ###
+    def __init__(self, data):
+        self.__name = data['name']
+        self.__type = data['type']
+        self.__cost = None
+        self.__prize = None
+        rolls = list()
+        for step in data['steps']:
+            if step['id'] == 'expenditure':
+                self.__cost = freeze(step)
+            elif step['id'] in ['challenge' , 'cheat']:
+                rolls.append(freeze(step))
+            elif step['id'] == 'reward':
+                self.__prize = freeze(step)
+        self.__rolls = tuple(rolls)
+        self.__replacements = data.get('replacements')
+        self.__uniqueBonus = freeze(data.get('uniqueBonus'))
+
+        # Prepara las tiradas enfrentadas
+        self.__comparison = None
+        if self.__prize is not None:
+            if self.__prize['type']['gauge'] == 'success':
+                self.__comparison = freeze({
+                    'rollsDice': True,
+                    'dice': Dice(self.__prize['type']['dice']),
+                    'ammount': self.__prize['type']['ammount'],
+                    'days': self.__cost['days']
+                })
+            elif self.__prize['type']['gauge'] == 'maxValue':
+                self.__comparison = freeze({
+                    'rollsDice': False,
+                    'ammount': self.__prize['type']['ammount'],
+                    'days': self.__cost['days']
+                })
+
+    def __str__(self):
+        return self.__name
+
+    ### Getters & Setters ###
+    def __get_name(self): return self.__name
+    name = property(__get_name)
+    def __get_type(self): return self.__type
+    type = property(__get_type)
+    def __get_cost(self): return self.__cost
+    cost = property(__get_cost)
+    def __get_rolls(self): return self.__rolls
+    rolls = property(__get_rolls)
+    def __get_prize(self): return self.__prize
+    prize = property(__get_prize)
+    def __get_replacements(self): return self.__replacements
+    replacements = property(__get_replacements)
+    def __get_uniqueBonus(self): return self.__uniqueBonus
+    uniqueBonus = property(__get_uniqueBonus)
+    def __get_comparison(self): return self.__comparison
+    comparison = property(__get_comparison)
+    # Es True si los premios dependen de la apuesta
+    def __get_usesInput(self): return self.__prize is not None and self.__prize['multiplicator'] == 'input'
+    usesInput = property(__get_usesInput)
+
+    ### Class Methods ###
+    # Tabla de dinero ganado según el resultado
+    def prizes(self, apuesta=0):
+        earningsTable = dict()
+        cost = self.__cost
+        prize = self.__prize
+        if prize['multiplicator'] == 'day':
+            for key, value in prize['difficultyClass'].items():
+                earningsTable[int(key)] = value*cost['days'] - cost['gold']
+        elif prize['multiplicator'] == 'input':
+            for key, value in prize['difficultyClass'].items():
+                earningsTable[int(key)] = value*apuesta - cost['gold']
+        elif prize['multiplicator'] == 'global':
+            for key, value in prize['difficultyClass'].items():
+                earningsTable[int(key)] = value - cost['gold']
+        return earningsTable
+
+# Compila la aventura de un json
+def readPlan(path):
+    with open(path, 'r', encoding = 'utf8') as fcc_file:
+        return AdventurePlan(json.load(fcc_file))
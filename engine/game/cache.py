@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+from engine.game.adventures import readPlan
+from engine.game.characters import Character
+from engine.game.instrumentation import instrumentation
+
+class CharacterCache:
+    """
+    Clase que guarda personajes ya compilados para no volver a leer el json de Foundry.
+    - En disco guarda el snapshot de cada personaje (un json de pocos cientos de bytes),
+      identificado por el hash del contenido del archivo original
+    - En memoria guarda los últimos personajes cargados (LRU), identificados por la ruta,
+      la fecha de modificación y el tamaño del archivo
+    - Los archivos se escriben de forma atómica, así varios procesos pueden compartir la carpeta
+    """
+
+    # Cambiar cuando cambie el formato de Character.readSnapshot
+    VERSION = 3
+
+    ### Initializer ###
+    def __init__(self, **kwargs):
+        self.__directory = kwargs.get('directory', os.path.join(os.path.dirname(__file__), '..', 'data', 'cache'))
+        self.__maxsize = kwargs.get('maxsize', 1024)
+        self.__memory = OrderedDict()
+        self.__hits = 0
+        self.__diskHits = 0
+        self.__misses = 0
+
+    def __str__(self):
+        return f'{len(self.__memory)} personajes en memoria, {self.__hits} hits, {self.__diskHits} en disco, {self.__misses} misses'
+
+    ### Getters & Setters ###
+    def __get_stats(self):
+        return {'hits': self.__hits, 'diskHits': self.__diskHits, 'misses': self.__misses, 'size': len(self.__memory)}
+    stats = property(__get_stats)
+
+    ### Class Methods ###
+    # Obtiene el personaje del json indicado
+    def load(self, path):
+        status = os.stat(path)
+        key = (os.path.realpath(path), status.st_mtime_ns, status.st_size)
+        if key in self.__memory:
+            self.__hits += 1
+            instrumentation.count('cache.character.hit')
+            self.__memory.move_to_end(key)
+            return self.__memory[key]
+
+        character = Character(snapshot=self.snapshot(path))
+        self.__memory[key] = character
+        if len(self.__memory) > self.__maxsize:
+            self.__memory.popitem(last=False)
+        return character
+
+    # Obtiene el snapshot del json indicado, compilándolo sólo si no está en disco
+    def snapshot(self, path):
+        with open(path, 'rb') as source:
+            digest = hashlib.sha1(source.read()).hexdigest()
+        compiled = os.path.join(self.__directory, f'{digest}.v{self.VERSION}.json')
+        try:
+            with open(compiled, 'r', encoding = 'utf8') as cached:
+                snapshot = json.load(cached)
+            self.__diskHits += 1
+            instrumentation.count('cache.character.disk')
+            return snapshot
+        except (OSError, ValueError):
+            pass
+
+        self.__misses += 1
+        instrumentation.count('cache.character.miss')
+        snapshot = Character(path).snapshot
+        os.makedirs(self.__directory, exist_ok=True)
+        temporary = f'{compiled}.{os.getpid()}.tmp'
+        with open(temporary, 'w', encoding = 'utf8') as cached:
+            json.dump(snapshot, cached, separators=(',', ':'))
+        os.replace(temporary, compiled)
+        return snapshot
+
+    # Olvida los personajes en memoria
+    def clear(self):
+        self.__memory.clear()
+
+class AdventureCache:
+    """
+    Clase que guarda aventuras compiladas y aventuras ya cocinadas para un personaje.
+    - Los planes (AdventurePlan) se identifican por la ruta, la fecha de modificación y el tamaño del json
+    - Las aventuras cocinadas se identifican por el plan, la huella del personaje (Character.fingerprint)
+      y la apuesta, si es que la aventura la usa. Se guardan las últimas maxsize (LRU)
+    - Lo que entrega se comparte entre llamadas, no se debe modificar
+    """
+
+    ### Initializer ###
+    def __init__(self, **kwargs):
+        self.__maxsize = kwargs.get('maxsize', 4096)
+        self.__plans = dict()
+        self.__cooked = OrderedDict()
+        self.__hits = 0
+        self.__misses = 0
+
+    def __str__(self):
+        return f'{len(self.__plans)} aventuras, {len(self.__cooked)} cocinadas, {self.__hits} hits, {self.__misses} misses'
+
+    ### Getters & Setters ###
+    def __get_stats(self):
+        return {'hits': self.__hits, 'misses': self.__misses, 'plans': len(self.__plans), 'size': len(self.__cooked)}
+    stats = property(__get_stats)
+
+    ### Class Methods ###
+    # Obtiene la aventura compilada del json indicado
+    def plan(self, path):
+        status = os.stat(path)
+        realpath = os.path.realpath(path)
+        key = (status.st_mtime_ns, status.st_size)
+        cached = self.__plans.get(realpath)
+        if cached is None or cached[0] != key:
+            instrumentation.count('cache.plan.miss')
+            with instrumentation.span('adventure.read'):
+                cached = (key, readPlan(path))
+            self.__plans[realpath] = cached
+        return cached[1]
+
+    # Obtiene la aventura cocinada para el personaje, llamando a cook(plan, actor, apuesta=...) sólo si no está
+    def cook(self, plan, actor, cook, **kwargs):
+        apuesta = kwargs.get('apuesta', 0)
+        key = (id(plan), actor.fingerprint, apuesta if plan.usesInput else None)
+        if key in self.__cooked:
+            self.__hits += 1
+            instrumentation.count('cache.adventure.hit')
+            self.__cooked.move_to_end(key)
+            return self.__cooked[key][1]
+
+        self.__misses += 1
+        instrumentation.count('cache.adventure.miss')
+        with instrumentation.span('adventure.cook', adventure=plan.name):
+            cookedAdventure = cook(plan, actor, apuesta=apuesta)
+        # Se guarda también el plan, así su id no se reutiliza mientras la entrada exista
+        self.__cooked[key] = (plan, cookedAdventure)
+        if len(self.__cooked) > self.__maxsize:
+            self.__cooked.popitem(last=False)
+        return cookedAdventure
+
+    # Olvida las aventuras guardadas
+    def clear(self):
+        self.__plans.clear()
+        self.__cooked.clear()
+
+# Cachés compartidos por todo el proceso
+characterCache = CharacterCache()
+adventureCache = AdventureCache()
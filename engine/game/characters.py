@@ -1,7 +1,85 @@
+import hashlib
 import json
 import math
 
-from engine.game.objects import Die
+import numpy as np
+
+from engine.game.foundry import FoundryReader
+from engine.game.instrumentation import instrumentation
+from engine.game.objects import ROLL_MODES, Die, convolveDistributions, rollMode
+
+### Tablas de reglas compartidas ###
+# Clases de personaje
+CLASSES = ('Artificer', 'Barbarian', 'Bard', 'Cleric', 'Druid', 'Fighter', 'Monk',
+           'Paladin', 'Ranger', 'Rogue', 'Sorcerer', 'Warlock', 'Wizard')
+
+# Estadística y nombre de cada habilidad
+SKILL_DEFINITIONS = {
+    'acr': {'Attribute': 'dex', 'Name': 'acrobatics'},
+    'ani': {'Attribute': 'wis', 'Name': 'animalHandling'},
+    'arc': {'Attribute': 'int', 'Name': 'arcana'},
+    'ath': {'Attribute': 'str', 'Name': 'athletics'},
+    'dec': {'Attribute': 'cha', 'Name': 'deception'},
+    'his': {'Attribute': 'int', 'Name': 'history'},
+    'ins': {'Attribute': 'wis', 'Name': 'insight'},
+    'itm': {'Attribute': 'cha', 'Name': 'intimidation'},
+    'inv': {'Attribute': 'int', 'Name': 'investigation'},
+    'med': {'Attribute': 'wis', 'Name': 'medicine'},
+    'nat': {'Attribute': 'int', 'Name': 'nature'},
+    'prc': {'Attribute': 'wis', 'Name': 'perception'},
+    'prf': {'Attribute': 'cha', 'Name': 'performance'},
+    'per': {'Attribute': 'cha', 'Name': 'persuasion'},
+    'rel': {'Attribute': 'int', 'Name': 'religion'},
+    'slt': {'Attribute': 'dex', 'Name': 'sleightOfHand'},
+    'ste': {'Attribute': 'dex', 'Name': 'stealth'},
+    'sur': {'Attribute': 'wis', 'Name': 'survival'},
+    'str': {'Attribute': 'str', 'Name': 'strength'},
+    'dex': {'Attribute': 'dex', 'Name': 'dexterity'},
+    'con': {'Attribute': 'con', 'Name': 'constitution'},
+    'int': {'Attribute': 'int', 'Name': 'intelligence'},
+    'wis': {'Attribute': 'wis', 'Name': 'wisdom'},
+    'cha': {'Attribute': 'cha', 'Name': 'charisma'},
+    'art': {'Attribute': 'int', 'Name': 'artisanTool'},
+    'mus': {'Attribute': 'cha', 'Name': 'musicalInstrument'},
+    'gam': {'Attribute': 'wis', 'Name': 'gamingSet'}
+}
+
+# Habilidades que vienen en el json de Foundry
+FOUNDRY_SKILLS = ('acr', 'ani', 'arc', 'ath', 'dec', 'his', 'ins', 'itm', 'inv',
+                  'med', 'nat', 'prc', 'prf', 'per', 'rel', 'slt', 'ste', 'sur')
+
+# Nombre usado por las aventuras (Character.skills) para cada habilidad
+SKILL_LOOKUP = {
+    'acrobatics': 'acr', 'animalHandling': 'ani', 'arcana': 'arc', 'athletics': 'ath',
+    'deception': 'dec', 'history': 'his', 'insight': 'ins', 'intimidation': 'itm',
+    'investigation': 'inv', 'medicine': 'med', 'nature': 'nat', 'perception': 'prc',
+    'performance': 'prf', 'persuasion': 'per', 'religion': 'rel', 'sleightOfHand': 'slt',
+    'stealth': 'ste', 'survival': 'sur', 'strength': 'str', 'dexterity': 'dex',
+    'constitution': 'con', 'intelligence': 'int', 'wisdom': 'wis', 'charisma': 'cha',
+    'tool': 'art', 'instrument': 'mus', 'gamingSet': 'gam'
+}
+
+# Valor de competencia de Foundry
+PROFICIENCY_LEVELS = {0: 'not', 0.5: 'jot', 1: 'pro', 2: 'exp'}
+
+# Herramientas de Foundry
+TOOLS = ('art', 'alchemist', 'brewer', 'calligrapher', 'carpenter', 'cartographer', 'cobbler',
+         'cook', 'glassblower', 'jeweler', 'leatherworker', 'mason', 'painter', 'potter', 'smith',
+         'tinker', 'weaver', 'woodcarver', 'navg', 'thief')
+KITS = ('disg', 'forg', 'herb', 'pois')
+MUSICAL_INSTRUMENTS = ('music', 'bagpipes', 'drum', 'dulcimer', 'flute', 'horn', 'lute', 'lyre',
+                       'panflute', 'shawm', 'viol')
+GAMING_SETS = ('game', 'chess', 'dice', 'card')
+
+# Objetos mágicos que fijan una puntuación de habilidad: (habilidad, puntuación)
+MAGIC_ITEMS = {
+    'Gauntlets of Ogre Power': ('str', 19),
+    'Headband of Intellect': ('int', 19),
+    'Amulet of Health': ('con', 19)
+}
+
+# Dado de los checks, compartido por todas las habilidades
+D20 = Die(20)
 
 class Skill:
     """
@@ -19,8 +97,14 @@ class Skill:
     - Tiene lógica para aplicar beneficios de subclases
     - Tiene métodos para realizar un check activo
     - Tiene métodos para realizar un check pasivo
+    - Al crearse compila todo lo que no depende del dado: el modificador fijo (estadística,
+      bonos enteros y competencia), el mínimo del d20 y el bono de subclase, y el promedio
+      de cada tipo de lanzamiento. Si el personaje cambia hay que crear la habilidad de nuevo
     """
 
+    __slots__ = ('__actor', '__name', '__abilityScore', '__bonuses', '__bonusDice', '__proficient',
+                 '__modifier', '__floor', '__subclassBonus', '__averages')
+
     ### Initializer ###
     def __init__(self, actor, name, abbr, **kwargs):
         self.__actor = actor
@@ -29,6 +113,7 @@ class Skill:
         self.__bonuses = list()
         self.__bonuses += kwargs.get('bonuses', [])
         self.__proficient = kwargs.get('proficient', 'not')
+        self.compile()
 
     def __str__(self):
         return f'{self.__name} @ {self.__actor.name.split()[0]}'
@@ -36,8 +121,58 @@ class Skill:
     ### Getters & Setters ###
     def __get_name(self): return self.__name
     name = property(__get_name)
+    def __get_abilityScore(self): return self.__abilityScore
+    abilityScore = property(__get_abilityScore)
+    def __get_proficient(self): return self.__proficient
+    proficient = property(__get_proficient)
+    def __get_modifier(self): return self.__modifier
+    modifier = property(__get_modifier)
 
     ### Class Methods ###
+    # Precalcula todo lo que no depende del dado
+    def compile(self):
+        # Adición de bonus
+        self.__modifier = self.__actor.getMod(self.__abilityScore)
+        self.__bonusDice = list()
+        for bonus in self.__bonuses:
+            if type(bonus) == Die:
+                self.__bonusDice.append(bonus)
+            elif type(bonus) == int:
+                self.__modifier += bonus
+
+        # Adición de competencia
+        if self.__proficient == 'pro':
+            self.__modifier += self.__actor.proficiency
+        elif self.__proficient == 'exp':
+            self.__modifier += 2*self.__actor.proficiency
+        elif self.__proficient == 'jot':
+            self.__modifier += math.floor(self.__actor.proficiency/2)
+
+        # Bonificaciones de subclase
+        # TODO: Agregar ventajas de Rune Knight
+        # TODO: investigar el resto de subclass features que pueden afectar
+        subclasses = self.__actor.subclasses
+        self.__floor = 0
+        self.__subclassBonus = 0
+        if 'Inquisitive' in subclasses and self.__name == 'insight':
+            if subclasses['Inquisitive']['level'] >= 3:
+                self.__floor = 8
+        if 'College of Eloquence' in subclasses and (self.__name == 'deception' or self.__name == 'persuasion'):
+            if subclasses['College of Eloquence']['level'] >= 3:
+                self.__floor = 10
+        if 'Fey Wanderer' in subclasses and self.__abilityScore == 'cha':
+            if subclasses['Fey Wanderer']['level'] >= 3:
+                self.__subclassBonus = max(self.__actor.getMod('wis'), 1)
+
+        # Promedio de cada tipo de lanzamiento
+        # TODO: Agregar modificadores debido a subclase (eloquence, inquisitive, etc)
+        self.__averages = dict()
+        for mode, arguments in ROLL_MODES.items():
+            average = D20.decideAvgRoll(**arguments) + self.__modifier
+            for die in self.__bonusDice:
+                average += die.avgRoll()
+            self.__averages[mode] = average
+
     # Revisa si es competente
     def isProficient(self):
         if self.__proficient in ['pro', 'exp']:
@@ -54,60 +189,71 @@ class Skill:
             disadvantage (bool): Es True si tiene alguna fuente de desventaja, False en otro caso
             elvenAccuracy (bool): Es True si tiene el rasgo de elvenAccuracy
             extraBonuses (list): Lista de bonos, pueden ser enteros o dados
+            rng (numpy.random.Generator): Generador a usar, por defecto el estado global de np.random
 
         Returns:
             int: Número logrado en el check
         """
 
-        # TODO: Agregar ventajas de Rune Knight|
-
-        # Tirada de d20
-        roll = 0
-        roll = Die(20).decideRoll(**kwargs)
-
-        # Bonificaciones de subclase
-        if 'Inquisitive' in self.__actor.subclasses and self.__name == 'insight':
-            if self.__actor.subclasses['Inquisitive']['level'] >= 3:
-                if roll <= 8: roll = 8
-        if 'College of Eloquence' in self.__actor.subclasses and (self.__name == 'deception' or self.__name == 'persuasion'):
-            if self.__actor.subclasses['College of Eloquence']['level'] >= 3:
-                if roll <= 10: roll = 10
-        if 'Fey Wanderer' in self.__actor.subclasses and self.__abilityScore == 'cha':
-            if self.__actor.subclasses['Fey Wanderer']['level'] >= 3:
-                wisMod = self.__actor.getMod('wis')
-                if wisMod < 1:
-                    roll += 1
-                else:
-                    roll += wisMod
-        # TODO: investigar el resto de subclass features que pueden afectar
+        # Tirada de d20 con los beneficios de subclase
+        roll = D20.decideRoll(**kwargs)
+        if roll < self.__floor:
+            roll = self.__floor
+        roll += self.__subclassBonus + self.__modifier
 
         # Adición de bonus
-        roll += self.__actor.getMod(self.__abilityScore)
+        for die in self.__bonusDice:
+            roll += die.roll(rng=kwargs.get('rng'))
         extraBonuses = kwargs.get('extraBonuses', [])
         if type(extraBonuses) != list:
             extraBonuses = [extraBonuses]
-        for bonus in (self.__bonuses + extraBonuses):
+        for bonus in extraBonuses:
             if type(bonus) == Die:
-                roll += bonus.roll()
+                roll += bonus.roll(rng=kwargs.get('rng'))
             elif type(bonus) == int:
                 roll += bonus
-
-        # Adición de competencia
-        if self.__proficient == 'pro':
-            roll += self.__actor.proficiency
-        elif self.__proficient == 'exp':
-            roll += 2*self.__actor.proficiency
-        elif self.__proficient == 'jot':
-            roll += math.floor(self.__actor.proficiency/2)
         return roll
 
-    # Check pasivo
-    def avgRoll(self, **kwargs):
+    # Varios checks activos de una sola vez
+    def checkMany(self, n, **kwargs):
+        """
+        Realiza n checks de esta habilidad en una sola llamada, con las mismas reglas que check.
 
-        # TODO: Agregar ventajas de Rune Knight
+        Args:
+            n (int): Cantidad de checks a realizar
+
+        kwargs:
+            advantage (bool): Es True si tiene alguna fuente de ventaja, False en otro caso
+            disadvantage (bool): Es True si tiene alguna fuente de desventaja, False en otro caso
+            elvenAccuracy (bool): Es True si tiene el rasgo de elvenAccuracy
+            extraBonuses (list): Lista de bonos, pueden ser enteros o dados
+            rng (numpy.random.Generator): Generador a usar, por defecto el estado global de np.random
 
+        Returns:
+            numpy.ndarray: Arreglo de enteros con los n números logrados
         """
-        Calcula el check promedio de la habilidad.
+
+        # Tiradas de d20 con los beneficios de subclase
+        rolls = D20.rollMany(n, **kwargs)
+        if self.__floor > 0:
+            rolls = np.maximum(rolls, self.__floor)
+        rolls += self.__subclassBonus + self.__modifier
+
+        # Adición de bonus
+        extraBonuses = kwargs.get('extraBonuses', [])
+        if type(extraBonuses) != list:
+            extraBonuses = [extraBonuses]
+        for bonus in (self.__bonusDice + extraBonuses):
+            if type(bonus) == Die:
+                rolls += bonus.rollMany(n, rng=kwargs.get('rng'))
+            elif type(bonus) == int:
+                rolls += bonus
+        return rolls
+
+    # Distribución exacta del check
+    def distribution(self, **kwargs):
+        """
+        Calcula la distribución de probabilidad exacta del check, con las mismas reglas que check.
 
         kwargs:
             advantage (bool): Es True si tiene alguna fuente de ventaja, False en otro caso
@@ -116,32 +262,50 @@ class Skill:
             extraBonuses (list): Lista de bonos, pueden ser enteros o dados
 
         Returns:
-            float: Número del check promedio
+            pandas.Series: Probabilidad de cada resultado, indexada por resultados consecutivos
         """
 
-        # Tirada de d20
-        roll = Die(20).decideAvgRoll(**kwargs)
-
-        # TODO: Agregar modificadores debido a subclase (eloquence, inquisitive, etc)
+        # Tirada de d20 con los beneficios de subclase
+        distribution = D20.distribution(**kwargs)
+        if self.__floor > 0:
+            distribution = distribution.groupby(np.maximum(distribution.index, self.__floor)).sum()
+        shift = self.__subclassBonus + self.__modifier
 
         # Adición de bonus
-        roll += self.__actor.getMod(self.__abilityScore)
         extraBonuses = kwargs.get('extraBonuses', [])
         if type(extraBonuses) != list:
             extraBonuses = [extraBonuses]
-        for bonus in (self.__bonuses + extraBonuses):
+        for bonus in (self.__bonusDice + extraBonuses):
+            if type(bonus) == Die:
+                distribution = convolveDistributions(distribution, bonus.distribution())
+            elif type(bonus) == int:
+                shift += bonus
+        distribution.index = distribution.index + shift
+        return distribution
+
+    # Check pasivo
+    def avgRoll(self, **kwargs):
+        """
+        Calcula el check promedio de la habilidad.
+
+        kwargs:
+            advantage (bool): Es True si tiene alguna fuente de ventaja, False en otro caso
+            disadvantage (bool): Es True si tiene alguna fuente de desventaja, False en otro caso
+            elvenAccuracy (bool): Es True si tiene el rasgo de elvenAccuracy
+            extraBonuses (list): Lista de bonos, pueden ser enteros o dados
+
+        Returns:
+            float: Número del check promedio
+        """
+        roll = self.__averages[rollMode(**kwargs)]
+        extraBonuses = kwargs.get('extraBonuses', [])
+        if type(extraBonuses) != list:
+            extraBonuses = [extraBonuses]
+        for bonus in extraBonuses:
             if type(bonus) == Die:
                 roll += bonus.avgRoll()
             elif type(bonus) == int:
                 roll += bonus
-
-        # Adición de competencia
-        if self.__proficient == 'pro':
-            roll += self.__actor.proficiency
-        elif self.__proficient == 'exp':
-            roll += 2*self.__actor.proficiency
-        elif self.__proficient == 'jot':
-            roll += math.floor(self.__actor.proficiency/2)
         return roll
 
 class Character:
@@ -150,112 +314,45 @@ class Character:
     - Atributos:
         name: nombre del personaje
         background: trasfondo del personaje
-        level: nivel del personaje
-        subclasses: diccionario con los nombres y niveles de sus subclases
+        level: nivel del personaje, la suma de los niveles de sus clases
+        classes: diccionario con el nivel y la subclase de cada clase
+        subclasses: diccionario con los nombres y niveles de sus subclases (sólo las clases que ya tienen una)
         hitDice: lista con los dados de golpe
         proficiency: modificador de competencia
         abilityScores: diccionario con las puntuaciones de habilidad
         skills: diccionario con las habilidades y su nivel de competencia
+        snapshot: datos compilados desde el json, permiten reconstruir el personaje sin leerlo
+        fingerprint: hash del snapshot, identifica al personaje en los cachés
+    - Se construye desde la ruta del json de Foundry, desde un snapshot con Character(snapshot=...)
+      o desde un actor ya leído con Character(actor=...)
     """
 
+    __slots__ = ('__name', '__background', '__level', '__classes', '__subclasses', '__hitDice', '__proficiency',
+                 '__abilityScores', '__modifiers', '__skills', '__weaponAttack', '__snapshot', '__fingerprint')
+
     ### Initializer ###
-    def __init__(self, path):
-        # Global
-        self.__classes = list()
-        self.__classes.append('Artificer')
-        self.__classes.append('Barbarian')
-        self.__classes.append('Bard')
-        self.__classes.append('Cleric')
-        self.__classes.append('Druid')
-        self.__classes.append('Fighter')
-        self.__classes.append('Monk')
-        self.__classes.append('Paladin')
-        self.__classes.append('Ranger')
-        self.__classes.append('Rogue')
-        self.__classes.append('Sorcerer')
-        self.__classes.append('Warlock')
-        self.__classes.append('Wizard')
-        self.__skillDefinition = dict()
-        self.__skillDefinition['acr'] = {'Attribute': 'dex', 'Name': 'acrobatics'}
-        self.__skillDefinition['ani'] = {'Attribute': 'wis', 'Name': 'animalHandling'}
-        self.__skillDefinition['arc'] = {'Attribute': 'int', 'Name': 'arcana'}
-        self.__skillDefinition['ath'] = {'Attribute': 'str', 'Name': 'athletics'}
-        self.__skillDefinition['dec'] = {'Attribute': 'cha', 'Name': 'deception'}
-        self.__skillDefinition['his'] = {'Attribute': 'int', 'Name': 'history'}
-        self.__skillDefinition['ins'] = {'Attribute': 'wis', 'Name': 'insight'}
-        self.__skillDefinition['itm'] = {'Attribute': 'cha', 'Name': 'intimidation'}
-        self.__skillDefinition['inv'] = {'Attribute': 'int', 'Name': 'investigation'}
-        self.__skillDefinition['med'] = {'Attribute': 'wis', 'Name': 'medicine'}
-        self.__skillDefinition['nat'] = {'Attribute': 'int', 'Name': 'nature'}
-        self.__skillDefinition['prc'] = {'Attribute': 'wis', 'Name': 'perception'}
-        self.__skillDefinition['prf'] = {'Attribute': 'cha', 'Name': 'performance'}
-        self.__skillDefinition['per'] = {'Attribute': 'cha', 'Name': 'persuasion'}
-        self.__skillDefinition['rel'] = {'Attribute': 'int', 'Name': 'religion'}
-        self.__skillDefinition['slt'] = {'Attribute': 'dex', 'Name': 'sleightOfHand'}
-        self.__skillDefinition['ste'] = {'Attribute': 'dex', 'Name': 'stealth'}
-        self.__skillDefinition['sur'] = {'Attribute': 'wis', 'Name': 'survival'}
-        self.__skillDefinition['str'] = {'Attribute': 'str', 'Name': 'strength'}
-        self.__skillDefinition['dex'] = {'Attribute': 'dex', 'Name': 'dexterity'}
-        self.__skillDefinition['con'] = {'Attribute': 'con', 'Name': 'constitution'}
-        self.__skillDefinition['int'] = {'Attribute': 'int', 'Name': 'intelligence'}
-        self.__skillDefinition['wis'] = {'Attribute': 'wis', 'Name': 'wisdom'}
-        self.__skillDefinition['cha'] = {'Attribute': 'cha', 'Name': 'charisma'}
-        self.__skillDefinition['art'] = {'Attribute': 'int', 'Name': 'artisanTool'}
-        self.__skillDefinition['mus'] = {'Attribute': 'cha', 'Name': 'musicalInstrument'}
-        self.__skillDefinition['gam'] = {'Attribute': 'wis', 'Name': 'gamingSet'}
-        self.__tools = list()
-        self.__tools.append('art')
-        self.__tools.append('alchemist')
-        self.__tools.append('brewer')
-        self.__tools.append('calligrapher')
-        self.__tools.append('carpenter')
-        self.__tools.append('cartographer')
-        self.__tools.append('cobbler')
-        self.__tools.append('cook')
-        self.__tools.append('glassblower')
-        self.__tools.append('jeweler')
-        self.__tools.append('leatherworker')
-        self.__tools.append('mason')
-        self.__tools.append('painter')
-        self.__tools.append('potter')
-        self.__tools.append('smith')
-        self.__tools.append('tinker')
-        self.__tools.append('weaver')
-        self.__tools.append('woodcarver')
-        self.__tools.append('navg')
-        self.__tools.append('thief')
-        self.__kits = list()
-        self.__kits.append('disg')
-        self.__kits.append('forg')
-        self.__kits.append('herb')
-        self.__kits.append('pois')
-        self.__musicalInstruments = list()
-        self.__musicalInstruments.append('music')
-        self.__musicalInstruments.append('bagpipes')
-        self.__musicalInstruments.append('drum')
-        self.__musicalInstruments.append('dulcimer')
-        self.__musicalInstruments.append('flute')
-        self.__musicalInstruments.append('horn')
-        self.__musicalInstruments.append('lute')
-        self.__musicalInstruments.append('lyre')
-        self.__musicalInstruments.append('panflute')
-        self.__musicalInstruments.append('shawm')
-        self.__musicalInstruments.append('viol')
-        self.__gamingSets = list()
-        self.__gamingSets.append('game')
-        self.__gamingSets.append('chess')
-        self.__gamingSets.append('dice')
-        self.__gamingSets.append('card')
+    def __init__(self, path=None, **kwargs):
         # Local
         self.__name = None
         self.__background = None
         self.__level = 0
+        self.__classes = dict()
         self.__subclasses = dict()
         self.__hitDice = list()
         self.__proficiency = 1
         self.__abilityScores = dict()
+        self.__modifiers = dict()
         self.__skills = dict()
-        self.loadCharacter(path)
+        self.__weaponAttack = None
+        self.__snapshot = None
+        self.__fingerprint = None
+        with instrumentation.span('character.load'):
+            if kwargs.get('snapshot') is not None:
+                self.loadSnapshot(kwargs['snapshot'])
+            elif kwargs.get('actor') is not None:
+                self.loadSnapshot(self.compileSnapshot(kwargs['actor']))
+            else:
+                self.loadCharacter(path)
 
     def __str__(self):
         return f'{self.__name} @ Level {self.__level}'
@@ -264,6 +361,10 @@ class Character:
     # Atributos
     def __get_name(self): return self.__name
     name = property(__get_name)
+    def __get_level(self): return self.__level
+    level = property(__get_level)
+    def __get_classes(self): return self.__classes
+    classes = property(__get_classes)
     def __get_subclasses(self): return self.__subclasses
     subclasses = property(__get_subclasses)
     def __get_proficiency(self): return self.__proficiency
@@ -272,6 +373,14 @@ class Character:
     background = property(__get_background)
     def __get_abilityScores(self): return self.__abilityScores
     abilityScores = property(__get_abilityScores)
+    def __get_snapshot(self): return self.__snapshot
+    snapshot = property(__get_snapshot)
+    def __get_fingerprint(self):
+        if self.__fingerprint is None:
+            encoded = json.dumps(self.__snapshot, sort_keys=True, separators=(',', ':')).encode('utf8')
+            self.__fingerprint = hashlib.sha1(encoded).hexdigest()
+        return self.__fingerprint
+    fingerprint = property(__get_fingerprint)
     # Habilidades
     def __get_acrobatics(self): return self.__skills['acr']
     acrobatics = property(__get_acrobatics)
@@ -329,140 +438,138 @@ class Character:
     instrument = property(__get_instrument)
     def __get_gamingSet(self): return self.__skills['gam']
     gamingSet = property(__get_gamingSet)
-    def __get_weaponAttack(self): # TODO: Funcionalidad de armas
-        if self.__skills['acr'].avgRoll() > self.__skills['ath'].avgRoll():
-            return self.__skills['acr']
-        else:
-            return self.__skills['ath']
+    def __get_weaponAttack(self): return self.__weaponAttack # TODO: Funcionalidad de armas
     weaponAttack = property(__get_weaponAttack)
 
     def skills(self, skill):
-        checks = dict()
-        checks['acrobatics'] = self.acrobatics
-        checks['animalHandling'] = self.animalHandling
-        checks['arcana'] = self.arcana
-        checks['athletics'] = self.athletics
-        checks['deception'] = self.deception
-        checks['history'] = self.history
-        checks['insight'] = self.insight
-        checks['intimidation'] = self.intimidation
-        checks['investigation'] = self.investigation
-        checks['medicine'] = self.medicine
-        checks['nature'] = self.nature
-        checks['perception'] = self.perception
-        checks['performance'] = self.performance
-        checks['persuasion'] = self.persuasion
-        checks['religion'] = self.religion
-        checks['sleightOfHand'] = self.sleightOfHand
-        checks['stealth'] = self.stealth
-        checks['survival'] = self.survival
-        checks['strength'] = self.strength
-        checks['dexterity'] = self.dexterity
-        checks['constitution'] = self.constitution
-        checks['intelligence'] = self.intelligence
-        checks['wisdom'] = self.wisdom
-        checks['charisma'] = self.charisma
-        checks['tool'] = self.tool
-        checks['instrument'] = self.instrument
-        checks['gamingSet'] = self.gamingSet
-        checks['weaponAttack'] = self.weaponAttack
-        return checks[skill]
+        if skill == 'weaponAttack':
+            return self.__weaponAttack
+        return self.__skills[SKILL_LOOKUP[skill]]
 
     ### Métodos de la Clase ###
     # Carga el personaje desde un json
     def loadCharacter(self, path):
-        with open(path, 'r', encoding = 'utf8') as fcc_file:
-            data = json.load(fcc_file)
-            # Nombre
-            self.__name = data['name']
-            # Background
-            self.__background = data['data']['details']['background']
-            self.__background = self.__background.replace(' ', '')
-            self.__background = self.__background[0].lower() + self.__background[1:]
-            # Ability Scores
-            self.__abilityScores['str'] = data['data']['abilities']['str']['value']
-            self.__abilityScores['dex'] = data['data']['abilities']['dex']['value']
-            self.__abilityScores['con'] = data['data']['abilities']['con']['value']
-            self.__abilityScores['int'] = data['data']['abilities']['int']['value']
-            self.__abilityScores['wis'] = data['data']['abilities']['wis']['value']
-            self.__abilityScores['cha'] = data['data']['abilities']['cha']['value']
-            # Level
-            self.__level = 0
-            for item in data['items']:
-                if type(item) == dict:
-                    if 'name' in item:
-                        if item['name'] in self.__classes:
-                            classLevel = item['data']['levels']
-                            subclass = item['data']['subclass']
-                            if subclass == '':
-                                subclass = 'No Subclass'
-                            self.__level += classLevel
-                            self.__subclasses[subclass] = {'level': classLevel, 'class': item['name']}
-                            dado = item['data']['hitDice']
-                            dado = Die(int(dado[1:]))
-                            for i in range(0, classLevel):
-                                self.__hitDice.append(dado)
-                        elif item['name'] == 'Gauntlets of Ogre Power': 
-                            self.__abilityScores['str'] = max(self.__abilityScores['str'], 19)
-                        elif item['name'] == 'Headband of Intellect':
-                            self.__abilityScores['int'] = max(self.__abilityScores['int'], 19)
-                        elif item['name'] == 'Amulet of Health':
-                            self.__abilityScores['con'] = max(self.__abilityScores['con'], 19)
-            self.__proficiency = math.ceil(1 + self.__level/4)
-            # Skills
-            profDict = dict()
-            profDict[0] = 'not'
-            profDict[0.5] = 'jot'
-            profDict[1] = 'pro'
-            profDict[2] = 'exp'
-            skills = dict()
-            skills['acr'] = profDict[data['data']['skills']['acr']['value']]
-            skills['ani'] = profDict[data['data']['skills']['ani']['value']]
-            skills['arc'] = profDict[data['data']['skills']['arc']['value']]
-            skills['ath'] = profDict[data['data']['skills']['ath']['value']]
-            skills['dec'] = profDict[data['data']['skills']['dec']['value']]
-            skills['his'] = profDict[data['data']['skills']['his']['value']]
-            skills['ins'] = profDict[data['data']['skills']['ins']['value']]
-            skills['itm'] = profDict[data['data']['skills']['itm']['value']]
-            skills['inv'] = profDict[data['data']['skills']['inv']['value']]
-            skills['med'] = profDict[data['data']['skills']['med']['value']]
-            skills['nat'] = profDict[data['data']['skills']['nat']['value']]
-            skills['prc'] = profDict[data['data']['skills']['prc']['value']]
-            skills['prf'] = profDict[data['data']['skills']['prf']['value']]
-            skills['per'] = profDict[data['data']['skills']['per']['value']]
-            skills['rel'] = profDict[data['data']['skills']['rel']['value']]
-            skills['slt'] = profDict[data['data']['skills']['slt']['value']]
-            skills['ste'] = profDict[data['data']['skills']['ste']['value']]
-            skills['sur'] = profDict[data['data']['skills']['sur']['value']]
-            skills['str'] = 'not'
-            skills['dex'] = 'not'
-            skills['con'] = 'not'
-            skills['int'] = 'not'
-            skills['wis'] = 'not'
-            skills['cha'] = 'not'
-            skills['art'] = 'not'
-            skills['mus'] = 'not'
-            skills['gam'] = 'not'
-            # Tools
-            tools = data['data']['traits']['toolProf']['value']
-            for tool in tools:
-                if tool in self.__tools:
-                    skills['art'] = 'pro'
-                elif tool in self.__musicalInstruments:
-                    skills['mus'] = 'pro'
-                elif tool in self.__gamingSets:
-                    skills['gam'] = 'pro'
-            # Ingresa los datos
-            for skill in skills:
-                attribute = self.__skillDefinition[skill]['Attribute']
-                name = self.__skillDefinition[skill]['Name']
-                self.__skills[skill] = Skill(self, name, attribute, proficient = skills[skill])
+        self.loadSnapshot(self.readSnapshot(path))
+
+    # Lee del json de Foundry sólo los datos que usa el simulador
+    def readSnapshot(self, path):
+        with instrumentation.span('character.read'):
+            actor = FoundryReader(path).actor()
+        with instrumentation.span('character.compile'):
+            return self.compileSnapshot(actor)
+
+    # Compila un actor de Foundry (completo o extraído por FoundryReader)
+    def compileSnapshot(self, data):
+        """
+        Compila el actor de Foundry VTT en un diccionario pequeño con todo lo que necesita el personaje.
+
+        Returns:
+            dict: Con las llaves name, background, abilityScores (con los objetos mágicos), baseAbilityScores
+                (sin ellos), items (objetos de MAGIC_ITEMS equipados), classes (nivel y subclase de cada clase:
+                dos clases sin subclase no chocan), hitDice (caras de cada
+                dado de golpe), skills (competencia de cada habilidad) y tools (competencias con herramientas)
+        """
+        snapshot = dict()
+        # Nombre
+        snapshot['name'] = data['name']
+        # Background
+        background = data['data']['details']['background']
+        background = background.replace(' ', '')
+        snapshot['background'] = background[0].lower() + background[1:]
+        # Ability Scores
+        abilityScores = dict()
+        abilityScores['str'] = data['data']['abilities']['str']['value']
+        abilityScores['dex'] = data['data']['abilities']['dex']['value']
+        abilityScores['con'] = data['data']['abilities']['con']['value']
+        abilityScores['int'] = data['data']['abilities']['int']['value']
+        abilityScores['wis'] = data['data']['abilities']['wis']['value']
+        abilityScores['cha'] = data['data']['abilities']['cha']['value']
+        baseAbilityScores = dict(abilityScores)
+        # Level
+        classes = dict()
+        hitDice = list()
+        items = list()
+        for item in data['items']:
+            if type(item) == dict:
+                if 'name' in item:
+                    if item['name'] in CLASSES:
+                        classLevel = item['data']['levels']
+                        subclass = item['data']['subclass']
+                        if subclass == '':
+                            subclass = 'No Subclass'
+                        classes[item['name']] = {'level': classLevel, 'subclass': subclass}
+                        dado = item['data']['hitDice']
+                        hitDice += [int(dado[1:])]*classLevel
+                    elif item['name'] in MAGIC_ITEMS:
+                        ability, score = MAGIC_ITEMS[item['name']]
+                        abilityScores[ability] = max(abilityScores[ability], score)
+                        items.append(item['name'])
+        snapshot['abilityScores'] = abilityScores
+        snapshot['baseAbilityScores'] = baseAbilityScores
+        snapshot['items'] = sorted(set(items))
+        snapshot['classes'] = classes
+        snapshot['hitDice'] = hitDice
+        # Skills
+        skills = dict()
+        for skill in FOUNDRY_SKILLS:
+            skills[skill] = PROFICIENCY_LEVELS[data['data']['skills'][skill]['value']]
+        snapshot['skills'] = skills
+        # Tools
+        snapshot['tools'] = list(data['data']['traits']['toolProf']['value'])
+        return snapshot
+
+    # Carga el personaje desde los datos compilados por readSnapshot
+    def loadSnapshot(self, snapshot):
+        self.__snapshot = snapshot
+        self.__fingerprint = None
+        self.__name = snapshot['name']
+        self.__background = snapshot['background']
+        self.__abilityScores = dict(snapshot['abilityScores'])
+        self.__level = 0
+        self.__classes = dict()
+        self.__subclasses = dict()
+        for dndclass, info in snapshot['classes'].items():
+            self.__level += info['level']
+            self.__classes[dndclass] = dict(info)
+            if info['subclass'] != 'No Subclass':
+                self.__subclasses[info['subclass']] = {'level': info['level'], 'class': dndclass}
+        dice = dict()
+        self.__hitDice = [dice.setdefault(faces, Die(faces)) for faces in snapshot['hitDice']]
+        self.__proficiency = math.ceil(1 + self.__level/4)
+        self.__modifiers = {abbr: math.floor((score - 10)/2) for abbr, score in self.__abilityScores.items()}
+        # Skills
+        skills = dict(snapshot['skills'])
+        skills['str'] = 'not'
+        skills['dex'] = 'not'
+        skills['con'] = 'not'
+        skills['int'] = 'not'
+        skills['wis'] = 'not'
+        skills['cha'] = 'not'
+        skills['art'] = 'not'
+        skills['mus'] = 'not'
+        skills['gam'] = 'not'
+        # Tools
+        for tool in snapshot['tools']:
+            if tool in TOOLS:
+                skills['art'] = 'pro'
+            elif tool in MUSICAL_INSTRUMENTS:
+                skills['mus'] = 'pro'
+            elif tool in GAMING_SETS:
+                skills['gam'] = 'pro'
+        # Ingresa los datos
+        self.__skills = dict()
+        for skill in skills:
+            attribute = SKILL_DEFINITIONS[skill]['Attribute']
+            name = SKILL_DEFINITIONS[skill]['Name']
+            self.__skills[skill] = Skill(self, name, attribute, proficient = skills[skill])
+        if self.__skills['acr'].avgRoll() > self.__skills['ath'].avgRoll():
+            self.__weaponAttack = self.__skills['acr']
+        else:
+            self.__weaponAttack = self.__skills['ath']
 
     # Obtiene el modificador a partir de la puntuación de habilidad
     def getMod(self, abbr):
-        score = self.__abilityScores[abbr]
-        modifier = math.floor((score - 10)/2)
-        return modifier
+        return self.__modifiers[abbr]
 
     # Obtiene el dado de golpe más grande
     def getMaxHitDie(self):
@@ -0,0 +1,227 @@
+import json
+import os
+import struct
+
+import numpy as np
+import pandas as pd
+
+from engine.game.statistics import RunningStatistics
+
+# Cambiar cuando cambie el formato de los archivos
+COLUMNAR_VERSION = 1
+# Tablas de cada corrida: resumen por ciclo y detalle por tirada
+TABLES = ('summary', 'detail')
+# Largo fijo del encabezado de los .npy, así se puede corregir al cerrar sin mover los datos
+HEADER_SIZE = 128
+
+# Encabezado de un .npy (formato 1.0) de una dimensión, rellenado hasta HEADER_SIZE bytes
+def npyHeader(dtype, rows):
+    header = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (np.lib.format.dtype_to_descr(np.dtype(dtype)), rows)
+    header = header.ljust(HEADER_SIZE - 11) + '\n'
+    return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin1')
+
+# Convierte una columna del detalle a algo que se pueda guardar como texto (p.ej. la lista de bonos)
+def encodeValue(value):
+    if isinstance(value, (list, tuple)):
+        return ' '.join(str(element) for element in value)
+    return str(value)
+
+class ColumnarWriter:
+    """
+    Clase que guarda una corrida del simulador en archivos por columna.
+    - Cada corrida es una carpeta con meta.json y un .npy por columna de cada tabla
+      (summary/money.npy, detail/roll.npy, etc.), que se pueden abrir con np.load(mmap_mode='r')
+    - Las columnas de texto (nombres, bonos) se guardan como códigos int32 y sus categorías
+      van en meta.json, así pesan 4 bytes por fila en vez de un objeto de Python
+    - Escribe por bloques: los datos se agregan al final de cada .npy y el encabezado, de largo
+      fijo, se corrige al cerrar, así una corrida larga no necesita tener todo en memoria
+    - Se puede usar en lugar de LogIngest como destino de las corridas
+    """
+
+    ### Initializer ###
+    def __init__(self, path, **kwargs):
+        self.__path = path
+        self.__attributes = dict(kwargs.get('attributes', {}))
+        self.__columns = {table: dict() for table in TABLES}
+        self.__files = dict()
+        self.__rows = {table: 0 for table in TABLES}
+        for table in TABLES:
+            os.makedirs(os.path.join(path, table), exist_ok=True)
+
+    def __str__(self):
+        return f'{self.__path}: {self.__rows["summary"]} ciclos, {self.__rows["detail"]} tiradas'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    ### Getters & Setters ###
+    def __get_path(self): return self.__path
+    path = property(__get_path)
+    def __get_rows(self): return dict(self.__rows)
+    rows = property(__get_rows)
+
+    ### Class Methods ###
+    # Agrega un bloque (df_summary, df_detail) de executeMoneyAdventure o streamMoneyAdventure
+    def write(self, df_summary, df_detail):
+        self.__append('summary', df_summary)
+        self.__append('detail', df_detail)
+
+    # Guarda una corrida completa, con el mismo uso que LogIngest.ingestRun
+    def writeRun(self, chunks, **kwargs):
+        self.__attributes.update(kwargs)
+        for df_summary, df_detail in chunks:
+            self.write(df_summary, df_detail)
+        self.close()
+        return self
+
+    # Corrige los encabezados y escribe meta.json
+    def close(self):
+        for (table, name), file in self.__files.items():
+            file.seek(0)
+            file.write(npyHeader(self.__columns[table][name]['dtype'], self.__rows[table]))
+            file.close()
+        self.__files.clear()
+
+        meta = {
+            'version': COLUMNAR_VERSION,
+            'rows': self.__rows,
+            'columns': {table: {name: {key: value for key, value in column.items() if key != 'codes'}
+                                for name, column in columns.items()}
+                        for table, columns in self.__columns.items()},
+            'attributes': self.__attributes
+        }
+        temporary = os.path.join(self.__path, f'meta.json.{os.getpid()}.tmp')
+        with open(temporary, 'w', encoding = 'utf8') as file:
+            json.dump(meta, file, default=str)
+        os.replace(temporary, os.path.join(self.__path, 'meta.json'))
+
+    # Agrega las filas de un bloque a cada columna de la tabla
+    def __append(self, table, df_block):
+        for name in df_block.columns:
+            values = df_block[name].values
+            if name not in self.__columns[table]:
+                self.__addColumn(table, name, values)
+            column = self.__columns[table][name]
+            if 'categories' in column:
+                values = self.__encode(column, values)
+            values = np.ascontiguousarray(values, dtype=column['dtype'])
+            self.__files[(table, name)].write(values.tobytes())
+        self.__rows[table] += len(df_block)
+
+    # Crea el .npy de una columna nueva, con un encabezado provisorio
+    def __addColumn(self, table, name, values):
+        column = dict()
+        if values.dtype == object:
+            column['dtype'] = 'int32'
+            column['categories'] = list()
+            column['codes'] = dict()
+        else:
+            column['dtype'] = values.dtype.str
+        if self.__rows[table] > 0:
+            raise ValueError(f'La columna {table}/{name} no estaba en los bloques anteriores')
+        file = open(os.path.join(self.__path, table, f'{name}.npy'), 'wb')
+        file.write(npyHeader(column['dtype'], 0))
+        self.__columns[table][name] = column
+        self.__files[(table, name)] = file
+
+    # Códigos de los valores de una columna de texto, agregando las categorías nuevas
+    def __encode(self, column, values):
+        try:
+            codes, uniques = pd.factorize(values)
+        except TypeError:
+            # Valores no hashables (la lista de bonos): cada tirada comparte la lista de su habilidad,
+            # así que basta con agrupar por identidad y convertir a texto una vez por lista
+            codes, first = pd.factorize(np.fromiter(map(id, values), dtype=np.int64, count=len(values)))
+            uniques = [values[np.argmax(codes == position)] for position in range(len(first))]
+        mapping = np.empty(len(uniques), dtype=np.int32)
+        for position, value in enumerate(uniques):
+            key = encodeValue(value)
+            if key not in column['codes']:
+                column['codes'][key] = len(column['categories'])
+                column['categories'].append(key)
+            mapping[position] = column['codes'][key]
+        return mapping[codes]
+
+class ColumnarReader:
+    """
+    Clase que lee una corrida guardada con ColumnarWriter sin cargarla en memoria.
+    - Las columnas se abren con memory-map: sólo se leen del disco las partes que se usan
+    - Las columnas de texto se entregan como pandas.Categorical sobre los códigos
+    - Tiene métodos para leer rangos de filas y para acumular estadísticas por bloques
+    """
+
+    ### Initializer ###
+    def __init__(self, path):
+        self.__path = path
+        with open(os.path.join(path, 'meta.json'), 'r', encoding = 'utf8') as file:
+            self.__meta = json.load(file)
+        if self.__meta['version'] != COLUMNAR_VERSION:
+            raise ValueError(f'Versión {self.__meta["version"]} no soportada en {path}')
+        self.__arrays = dict()
+
+    def __str__(self):
+        return f'{self.__path}: {self.rows("summary")} ciclos, {self.rows("detail")} tiradas'
+
+    ### Getters & Setters ###
+    def __get_attributes(self): return self.__meta['attributes']
+    attributes = property(__get_attributes)
+
+    ### Class Methods ###
+    # Filas de la tabla
+    def rows(self, table):
+        return self.__meta['rows'][table]
+
+    # Nombres de las columnas de la tabla
+    def columns(self, table):
+        return list(self.__meta['columns'][table])
+
+    # Categorías de una columna de texto, None si es numérica
+    def categories(self, table, name):
+        return self.__meta['columns'][table][name].get('categories')
+
+    # Arreglo (memory-map) de una columna, con códigos en vez de texto
+    def array(self, table, name):
+        if (table, name) not in self.__arrays:
+            path = os.path.join(self.__path, table, f'{name}.npy')
+            self.__arrays[(table, name)] = np.load(path, mmap_mode='r')
+        return self.__arrays[(table, name)]
+
+    # Rango de filas de la tabla como DataFrame
+    def frame(self, table, start=0, stop=None, **kwargs):
+        """
+        Lee sólo las filas y columnas pedidas.
+
+        Args:
+            table (str): 'summary' o 'detail'
+            start (int): Primera fila
+            stop (int): Fila final (sin incluir), por defecto la última
+
+        kwargs:
+            columns (list): Columnas a leer, por defecto todas
+
+        Returns:
+            pandas.DataFrame: Las filas pedidas, con las columnas de texto como Categorical
+        """
+        data = dict()
+        for name in kwargs.get('columns') or self.columns(table):
+            values = np.array(self.array(table, name)[start:stop])
+            categories = self.categories(table, name)
+            if categories is not None:
+                values = pd.Categorical.from_codes(values, categories)
+            data[name] = values
+        return pd.DataFrame(data)
+
+    # Recorre la tabla por bloques de filas
+    def chunks(self, table, chunkSize=1000000, **kwargs):
+        for start in range(0, self.rows(table), chunkSize):
+            yield self.frame(table, start, start + chunkSize, **kwargs)
+
+    # Estadísticas del dinero, acumuladas por bloques
+    def statistics(self, chunkSize=1000000):
+        statistics = RunningStatistics()
+        for df_summary in self.chunks('summary', chunkSize):
+            statistics.update(df_summary)
+        return statistics
@@ -1,11 +1,225 @@
+import bisect
+import itertools
 import json
 import os
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from statistics import NormalDist
 
 import numpy as np
 import pandas as pd
 
+from engine.game.adventures import readPlan
+from engine.game.cache import adventureCache, characterCache
 from engine.game.characters import Character
-from engine.game.objects import Dice
+from engine.game.foundry import FoundryReader
+from engine.game.instrumentation import instrumentation
+from engine.game.objects import Dice, spawnGenerator
+from engine.game.statistics import RunningStatistics
+
+# Versión del motor de simulación, se guarda con cada corrida. Cambiarla cuando cambien los resultados
+ENGINE_VERSION = '1'
+
+# Tamaño máximo de la evaluación exacta (estados x totales posibles, ver keptDistribution), más allá de eso hay que simular
+MAX_EXACT_STATES = 10000000
+
+# Opciones de un roll (paso challenge o cheat) para el personaje: una por cada skill que permite
+def rollOptions(roll, actor):
+    """
+    Prepara cada skill que permite el roll con su ventaja, sus bonos y su check promedio.
+
+    Returns:
+        list: Un dict por skill con actorName, skillName, behavior, timing, advantage, skill, bonus y average
+    """
+    goodBackgrounds = roll.get('advantage')
+    advantage = False
+    if not goodBackgrounds:
+        pass
+    elif actor.background in goodBackgrounds:
+        advantage = True
+    else:
+        for background in goodBackgrounds:
+            if background in actor.background:
+                advantage = True
+
+    options = list()
+    for skill in roll['skillCheck']:
+        avgRoll = dict()
+        avgRoll['actorName'] = actor.name
+        avgRoll['skillName'] = skill
+        avgRoll['behavior'] = roll['id']
+        avgRoll['timing'] = roll.get('time')
+        avgRoll['advantage'] = advantage
+        avgRoll['skill'] = actor.skills(skill)
+        bonuses = roll.get('bonus')
+        avgRoll['bonus'] = list()
+        if bonuses:
+            for bonus in bonuses:
+                if bonus == 'maxHitDie':
+                    avgRoll['bonus'].append(actor.getMaxHitDie())
+                elif False: # Aquí añadir nuevos posibles bonus
+                    pass
+        avgRoll['average'] = avgRoll['skill'].avgRoll(advantage=avgRoll['advantage'],
+                                                    extraBonuses=avgRoll['bonus'])
+        options.append(avgRoll)
+    return options
+
+# Bonos del uniqueBonus de la aventura que puede usar el personaje, None si no cumple el requisito
+def uniqueBonuses(uniqueBonus, actor):
+    if not uniqueBonus:
+        return None
+    if uniqueBonus['requires'] == 'gamingSet':
+        if not actor.skills('gamingSet').isProficient():
+            return None
+    else: # Aquí poner futuros requisitos
+        return None
+    bonuses = list()
+    for bonus in uniqueBonus['bonus']:
+        if bonus == 'proficiency':
+            bonuses.append(actor.proficiency)
+    return bonuses
+
+# Une challenges y comodines en una tabla de tiradas: primero los challenges, luego los comodines
+def prepareSlots(cookedAdventure):
+    df_rolls = cookedAdventure['rolls']
+    df_jokers = cookedAdventure['jokers'].sort_values(by=['average'], ascending=False)
+    df_slots = pd.concat([df_rolls, df_jokers], ignore_index=True)
+    return df_slots, len(df_rolls), df_jokers['average'].values
+
+# Aplica los comodines y se queda con las mejores tiradas de cada fila de la matriz
+def resolveRolls(matrix, nRolls, averages, size):
+    rows = len(matrix)
+    rolls = matrix[:, :nRolls].copy()
+    slots = np.tile(np.arange(nRolls), (rows, 1))
+
+    # Cada comodín reemplaza a la peor tirada si ésta es menor a su promedio
+    rowIndex = np.arange(rows)
+    for joker, average in enumerate(averages):
+        worst = rolls.argmin(axis=1)
+        replace = rolls[rowIndex, worst] < average
+        rolls[rowIndex[replace], worst[replace]] = matrix[replace, nRolls + joker]
+        slots[rowIndex[replace], worst[replace]] = nRolls + joker
+
+    order = np.argsort(-rolls, axis=1, kind='stable')[:, 0:size]
+    return np.take_along_axis(rolls, order, axis=1), np.take_along_axis(slots, order, axis=1)
+
+# Distribución exacta de la suma de los aportes de las tiradas que se quedan, por estadísticos de orden
+def keptDistribution(supports, jokers, averages, size, score):
+    """
+    Recorre los challenges uno a uno guardando sólo lo que todavía puede cambiar el resultado: las
+    k tiradas más bajas (k = cantidad de comodines, son las únicas que un comodín puede reemplazar),
+    las size más altas del resto si no se quedan todas, y la distribución del aporte acumulado de las
+    que ya se sabe que se quedan (un arreglo por estado). Luego aplica los comodines como resolveRolls.
+    Así los estados crecen con el soporte elevado a k (o a k + size), no con el producto de los
+    soportes de todas las tiradas.
+
+    Args:
+        supports (list): (valores, probabilidades) de cada challenge
+        jokers (list): (valores, probabilidades) de cada comodín, del mejor promedio al peor
+        averages (array): Promedio de cada comodín
+        size (int): Tiradas que se quedan, las más altas
+        score (callable): Distribución del aporte entero de una tirada que se queda, {aporte: probabilidad}
+            (p.ej. {tirada: 1.} para la suma, o {1: p, 0: 1 - p} para los éxitos)
+
+    Returns:
+        pandas.Series: Probabilidad de cada total
+
+    Raises:
+        ValueError: Si la aventura necesita más de MAX_EXACT_STATES estados
+    """
+    low = min(len(jokers), len(supports))
+    keepAll = size >= len(supports)
+
+    # Los totales van de kept*menor aporte a kept*mayor aporte, el arreglo de cada estado los cubre todos
+    kept = min(size, len(supports))
+    contributions = [contribution for values, _ in supports + jokers for value in values for contribution in score(value)]
+    origin = min(0, kept*min(contributions))
+    width = max(0, kept*max(contributions)) - origin + 1
+    start = np.zeros(width)
+    start[-origin] = 1.
+
+    # Suma al arreglo de un estado un aporte con la distribución indicada
+    def addScore(totals, chances):
+        result = np.zeros(width)
+        for contribution, chance in chances.items():
+            if chance > 0:
+                result += np.roll(totals, contribution)*chance
+        return result
+
+    # Distribución del aporte de una tirada que se queda, mezclada según su probabilidad desde el índice start
+    def tailScore(values, probabilities, start):
+        chances = defaultdict(float)
+        for value, probability in zip(values[start:], probabilities[start:]):
+            for contribution, chance in score(value).items():
+                chances[contribution] += probability*chance
+        return chances
+
+    # Agrega el arreglo de un estado, sumándolo si ya existe
+    def accumulate(states, key, weighted):
+        if key in states:
+            states[key] += weighted
+        else:
+            states[key] = weighted
+
+    states = {((), ()): start}
+    for values, probabilities in supports:
+        nextStates = dict()
+        for (lowest, highest), totals in states.items():
+            if keepAll and len(lowest) == low:
+                # Las tiradas desde la mayor de las bajas en adelante se quedan, todas van al mismo estado
+                cut = bisect.bisect_left(values, lowest[-1]) if low else 0
+                if cut < len(values):
+                    accumulate(nextStates, (lowest, highest), addScore(totals, tailScore(values, probabilities, cut)))
+                if cut > 0:
+                    # Las menores entran a las bajas y sale la mayor de ellas, que ya se queda
+                    evicted = addScore(totals, score(lowest[-1]))
+                    for value, probability in zip(values[:cut], probabilities[:cut]):
+                        position = bisect.bisect(lowest, value)
+                        accumulate(nextStates, (lowest[:position] + (value,) + lowest[position:-1], highest),
+                                   evicted*probability)
+                continue
+            for value, probability in zip(values, probabilities):
+                position = bisect.bisect(lowest, value)
+                candidates = lowest[:position] + (value,) + lowest[position:]
+                if len(candidates) <= low:
+                    accumulate(nextStates, (candidates, highest), totals*probability)
+                else:
+                    upper = tuple(sorted(highest + (candidates[-1],), reverse=True)[:size])
+                    accumulate(nextStates, (candidates[:-1], upper), totals*probability)
+        states = nextStates
+        if len(states)*width > MAX_EXACT_STATES:
+            raise ValueError(f'La aventura necesita más de {MAX_EXACT_STATES} estados para evaluarse de forma exacta, '
+                             f'hay que simularla')
+
+    # Cada comodín reemplaza a la peor tirada si ésta es menor a su promedio
+    for (values, probabilities), average in zip(jokers, averages):
+        nextStates = dict()
+        for (lowest, highest), totals in states.items():
+            if not lowest or lowest[0] >= average:
+                accumulate(nextStates, (lowest, highest), totals)
+                continue
+            rest = lowest[1:]
+            for value, probability in zip(values, probabilities):
+                position = bisect.bisect(rest, value)
+                accumulate(nextStates, (rest[:position] + (value,) + rest[position:], highest), totals*probability)
+        states = nextStates
+
+    # Aporte de las tiradas que quedaban por decidir
+    distribution = np.zeros(width)
+    for (lowest, highest), totals in states.items():
+        for value in (lowest if keepAll else sorted(lowest + highest, reverse=True)[:size]):
+            totals = addScore(totals, score(value))
+        distribution += totals
+    distribution = pd.Series(distribution, index=np.arange(width) + origin)
+    return distribution[distribution > 0]
+
+# Dinero ganado según la suma de las tiradas, usando el mayor premio alcanzado
+def maxValuePrizes(sums, prizes):
+    money = np.zeros(len(sums), dtype=np.result_type(0, *prizes.values()))
+    for DC, gold in prizes.items():
+        money = np.where((sums >= DC) & (gold > money), gold, money)
+    return money
 
 class Adventure:
 
@@ -15,204 +229,200 @@ class Adventure:
         self.__characterPath = os.path.join(os.path.dirname(__file__), '..', 'data', 'characters')
 
     ### Métodos de la Clase ###
-    # Carga la aventura desde un json
+    # Carga la aventura desde un json y la cocina para el personaje
     def loadAdventure(self, name, actor, **kwargs):
+        """
+        Obtiene la aventura cocinada para el personaje. El json se compila una sola vez por proceso
+        (AdventurePlan) y el resultado se guarda según la huella del personaje, así llamadas repetidas
+        no vuelven a leer archivos ni a construir tablas. Lo que se entrega no se debe modificar.
+
+        kwargs:
+            apuesta (int): Apuesta de las aventuras con multiplicador 'input'
+            cache (bool): Si es False compila y cocina de nuevo sin pasar por el caché
+
+        Returns:
+            dict: Aventura cocinada, None si la aventura no es de dinero
+        """
         path = os.path.join(self.__adventurePath, name)
-        with open(path, 'r', encoding = 'utf8') as fcc_file:
-            data = json.load(fcc_file)
-            type = data['type']
-            actions = dict()
-            for step in data['steps']:
-                if step['id'] == 'expenditure':
-                    actions['cost'] = step
-                elif step['id'] in ['challenge' , 'cheat']:
-                    if not 'rolls' in actions:
-                        actions['rolls'] = list()
-                    actions['rolls'].append(step)
-                elif step['id'] == 'reward':
-                    actions['prize'] = step
-            
-            if type == 'money':
-                cookedAdventure = dict()
-                cookedAdventure['name'] = data['name']
-                cost = actions['cost']
-                rolls = actions['rolls']
-                prize = actions['prize']
-                replacements = data.get('replacements')
-                uniqueBonus = data.get('uniqueBonus')
-
-                # Prepara los resultados
-                earningsTable = dict()
-                if prize['multiplicator'] == 'day':
-                    for key, value in prize['difficultyClass'].items():
-                        earningsTable[int(key)] = value*cost['days'] - cost['gold']
-                elif prize['multiplicator'] == 'input':
-                    for key, value in prize['difficultyClass'].items():
-                        earningsTable[int(key)] = value*kwargs.get('apuesta', 0) - cost['gold']
-                elif prize['multiplicator'] == 'global':
-                    for key, value in prize['difficultyClass'].items():
-                        earningsTable[int(key)] = value - cost['gold']
-                cookedAdventure['prizes'] = earningsTable
-                
-                # Prepara las tiradas enfrentadas
-                if prize['type']['gauge'] == 'success':
-                    cookedAdventure['comparison'] = {
-                        'rollsDice': True,
-                        'dice': Dice(prize['type']['dice']),
-                        'ammount': prize['type']['ammount'],
-                        'days': cost['days']
-                    }
-                elif prize['type']['gauge'] == 'maxValue':
-                    cookedAdventure['comparison'] = {
-                        'rollsDice': False,
-                        'ammount': prize['type']['ammount'],
-                        'days': cost['days']
-                    }
-
-                # Cada roll es una tirada enfrentada
-                bestRolls = list()
-                for roll in rolls:
-                    skillBehavior = roll['id']
-                    cheatTiming = roll.get('time')
-                    goodBackgrounds = roll.get('advantage')
-                    advantage = False
-                    if not goodBackgrounds:
-                        pass
-                    elif actor.background in goodBackgrounds:
-                        advantage = True
-                    else:
-                        for background in goodBackgrounds:
-                            if background in actor.background:
-                                advantage = True
-
-                    # Escoges la mejor skill que te ofrezca el roll
-                    avgRolls = list()
-                    for skill in roll['skillCheck']:
-                        avgRoll = dict()
-                        avgRoll['actorName'] = actor.name
-                        avgRoll['skillName'] = skill
-                        avgRoll['behavior'] = skillBehavior
-                        avgRoll['timing'] = cheatTiming
-                        avgRoll['advantage'] = advantage
-                        avgRoll['skill'] = actor.skills(skill)
-                        bonuses = roll.get('bonus')
-                        avgRoll['bonus'] = list()
-                        if bonuses:
-                            for bonus in bonuses:
-                                if bonus == 'maxHitDie':
-                                    avgRoll['bonus'].append(actor.getMaxHitDie())
-                                elif False: # Aquí añadir nuevos posibles bonus
-                                    pass
-                        avgRoll['average'] = avgRoll['skill'].avgRoll(advantage=avgRoll['advantage'],
-                                                                    extraBonuses=avgRoll['bonus'])
-                        avgRolls.append(avgRoll)
-                    df_avgRolls = pd.DataFrame(avgRolls)
-                    df_avgRolls.sort_values(by=['average'], ascending=False, inplace=True)
-                    bestRoll = df_avgRolls.iloc[[0]].to_dict('records') # El valor mayor
-                    bestRolls += bestRoll
-
-                # Añade bonos que se puedan aplicar a solamente una habilidad
-                df_bestRolls = pd.DataFrame(bestRolls)
-                if uniqueBonus:
-                    df_bestRolls = df_bestRolls.sort_values(by=['average'], ascending=False)
-                    if uniqueBonus['requires'] == 'gamingSet':
-                        if actor.skills('gamingSet').isProficient():
-                            bonuses = []
-                            for bonus in uniqueBonus['bonus']:
-                                if bonus == 'proficiency':
-                                    bonuses.append(actor.proficiency)
-                            if not df_bestRolls.loc[df_bestRolls.behavior == 'cheat'].empty:
-                                row = df_bestRolls.loc[df_bestRolls.behavior == 'cheat'].iloc[0]
-                                row.bonus += (bonuses)
-                                df_bestRolls.at[row.name, 'average'] = row.skill.avgRoll(
-                                    advantage=row.advantage, extraBonuses=row.bonus)
-                            else:
-                                row = df_bestRolls.iloc[-1]
-                                row.bonus += (bonuses)
-                                df_bestRolls.at[row.name, 'average'] = row.skill.avgRoll(
-                                    advantage=row.advantage, extraBonuses=row.bonus)
-                    elif False: # Aquí poner futuros bonos
-                        pass
-
-                # Divide los rolls según su comportamiento
-                df_beforeCheats = df_bestRolls.loc[(df_bestRolls['behavior'] == 'cheat') & (df_bestRolls['timing'] == 'before')]
-                df_afterCheats = df_bestRolls.loc[(df_bestRolls['behavior'] == 'cheat') & (df_bestRolls['timing'] == 'after')]
-                df_selectedRolls = df_bestRolls.loc[df_bestRolls['behavior'] == 'challenge']
-
-                # Se queda con posibles cambios a hacer después de lanzar los dados
-                if not df_afterCheats.empty: # TODO: Priorizar qué dados quedarse. Dados que se lanzan después son más útiles que los que se lanzan antes, pero cuánta debería ser la diferencia estimada a la que son similares
-                    df_afterCheats = df_afterCheats.sort_values(by=['average'], ascending=False)
-                    df_afterCheats = df_afterCheats.reset_index(drop=True)
-                    if len(df_afterCheats) > replacements:
-                        df_afterCheats = df_afterCheats.iloc[0:replacements]
-                        replacements -= replacements
+        with instrumentation.span('adventure.load', adventure=name):
+            if not kwargs.get('cache', True):
+                with instrumentation.span('adventure.read'):
+                    plan = readPlan(path)
+                with instrumentation.span('adventure.cook', adventure=plan.name):
+                    return self.cookAdventure(plan, actor, **kwargs)
+            return adventureCache.cook(adventureCache.plan(path), actor, self.cookAdventure, **kwargs)
+
+    # Aventura compilada (AdventurePlan) de un json, pasando por el caché
+    def loadPlan(self, name):
+        return adventureCache.plan(os.path.join(self.__adventurePath, name))
+
+    # Cocina una aventura compilada para el personaje
+    def cookAdventure(self, plan, actor, **kwargs):
+        if plan.type == 'money':
+            cookedAdventure = dict()
+            cookedAdventure['name'] = plan.name
+            rolls = plan.rolls
+            replacements = plan.replacements
+            uniqueBonus = plan.uniqueBonus
+
+            # Prepara los resultados
+            cookedAdventure['prizes'] = plan.prizes(kwargs.get('apuesta', 0))
+
+            # Prepara las tiradas enfrentadas
+            cookedAdventure['comparison'] = dict(plan.comparison)
+
+            # Cada roll es una tirada enfrentada
+            bestRolls = list()
+            for roll in rolls:
+                # Escoges la mejor skill que te ofrezca el roll
+                df_avgRolls = pd.DataFrame(rollOptions(roll, actor))
+                df_avgRolls.sort_values(by=['average'], ascending=False, inplace=True)
+                bestRoll = df_avgRolls.iloc[[0]].to_dict('records') # El valor mayor
+                bestRolls += bestRoll
+
+            # Añade bonos que se puedan aplicar a solamente una habilidad
+            df_bestRolls = pd.DataFrame(bestRolls)
+            if uniqueBonus:
+                df_bestRolls = df_bestRolls.sort_values(by=['average'], ascending=False)
+                bonuses = uniqueBonuses(uniqueBonus, actor)
+                if bonuses is not None:
+                    if not df_bestRolls.loc[df_bestRolls.behavior == 'cheat'].empty:
+                        row = df_bestRolls.loc[df_bestRolls.behavior == 'cheat'].iloc[0]
                     else:
-                        replacements -= len(df_afterCheats)
+                        row = df_bestRolls.iloc[-1]
+                    row.bonus += (bonuses)
+                    df_bestRolls.at[row.name, 'average'] = row.skill.avgRoll(
+                        advantage=row.advantage, extraBonuses=row.bonus)
 
-                # Detecta si puede hacer algún cambio antes de lanzar los dados, si es que le quedan opciones
-                if not df_beforeCheats.empty and replacements > 0:
-                    df_selectedRolls = df_selectedRolls.sort_values(by=['average'], ascending=True)
+            # Divide los rolls según su comportamiento
+            df_beforeCheats = df_bestRolls.loc[(df_bestRolls['behavior'] == 'cheat') & (df_bestRolls['timing'] == 'before')]
+            df_afterCheats = df_bestRolls.loc[(df_bestRolls['behavior'] == 'cheat') & (df_bestRolls['timing'] == 'after')]
+            df_selectedRolls = df_bestRolls.loc[df_bestRolls['behavior'] == 'challenge']
+
+            # Se queda con posibles cambios a hacer después de lanzar los dados
+            if not df_afterCheats.empty: # TODO: Priorizar qué dados quedarse. Dados que se lanzan después son más útiles que los que se lanzan antes, pero cuánta debería ser la diferencia estimada a la que son similares
+                df_afterCheats = df_afterCheats.sort_values(by=['average'], ascending=False)
+                df_afterCheats = df_afterCheats.reset_index(drop=True)
+                if len(df_afterCheats) > replacements:
+                    df_afterCheats = df_afterCheats.iloc[0:replacements]
+                    replacements -= replacements
+                else:
+                    replacements -= len(df_afterCheats)
+
+            # Detecta si puede hacer algún cambio antes de lanzar los dados, si es que le quedan opciones
+            if not df_beforeCheats.empty and replacements > 0:
+                df_selectedRolls = df_selectedRolls.sort_values(by=['average'], ascending=True)
+                df_selectedRolls = df_selectedRolls.reset_index(drop=True)
+                df_beforeCheats = df_beforeCheats.sort_values(by=['average'], ascending=False)
+                df_beforeCheats = df_beforeCheats.reset_index(drop=True)
+                while df_selectedRolls.iloc[0].average < df_beforeCheats.iloc[0].average and replacements > 0:
+                    df_selectedRolls.drop(0, inplace=True)
+                    df_selectedRolls = pd.concat([df_selectedRolls, df_beforeCheats.iloc[[0]]])
+                    df_beforeCheats.drop(0, inplace=True)
+                    replacements -= 1
                     df_selectedRolls = df_selectedRolls.reset_index(drop=True)
-                    df_beforeCheats = df_beforeCheats.sort_values(by=['average'], ascending=False)
                     df_beforeCheats = df_beforeCheats.reset_index(drop=True)
-                    while df_selectedRolls.iloc[0].average < df_beforeCheats.iloc[0].average and replacements > 0:
-                        df_selectedRolls.drop(0, inplace=True)
-                        df_selectedRolls = pd.concat([df_selectedRolls, df_beforeCheats.iloc[[0]]])
-                        df_beforeCheats.drop(0, inplace=True)
-                        replacements -= 1
-                        df_selectedRolls = df_selectedRolls.reset_index(drop=True)
-                        df_beforeCheats = df_beforeCheats.reset_index(drop=True)
-                        if df_beforeCheats.empty:
-                            break
-
-                cookedAdventure['rolls'] = df_selectedRolls
-                cookedAdventure['jokers'] = df_afterCheats
-                return cookedAdventure
-
-    # Carga el personaje desde un json
-    def loadCharacter(self, name):
+                    if df_beforeCheats.empty:
+                        break
+
+            cookedAdventure['rolls'] = df_selectedRolls
+            cookedAdventure['jokers'] = df_afterCheats
+            return cookedAdventure
+
+    # Nombres de los archivos de aventuras disponibles
+    def adventureNames(self):
+        return sorted(filename for filename in os.listdir(self.__adventurePath) if filename.endswith('.json'))
+
+    # Nombres de los archivos de personajes disponibles
+    def characterNames(self):
+        return sorted(filename for filename in os.listdir(self.__characterPath) if filename.endswith('.json'))
+
+    # Carga el personaje desde un json, pasando por el caché de personajes compilados
+    def loadCharacter(self, name, **kwargs):
         for filename in os.listdir(self.__characterPath):
             if name == filename:
                 path = os.path.join(self.__characterPath, filename)
-                character = Character(path)   
-                return character
+                if not kwargs.get('cache', True):
+                    return Character(path)
+                return characterCache.load(path)
         return None # TODO: raise error
 
+    # Carga todos los personajes de un export de Foundry con varios actores (p.ej. el actors.db de un mundo)
+    def loadWorldCharacters(self, path):
+        characters = list()
+        for actor in FoundryReader(path).actors():
+            if actor.get('type', 'character') == 'character':
+                characters.append(Character(actor=actor))
+        return characters
+
     # Ejecuta una aventura de dinero un número arbitrario de veces
-    def executeMoneyAdventure(self, cookedAdventure, cycles):
-        #np.random.seed(33)
+    def executeMoneyAdventure(self, cookedAdventure, cycles, **kwargs):
+        """
+        Simula la aventura cocinada la cantidad de ciclos pedida.
+
+        kwargs:
+            vectorized (bool): Si es True lanza todos los ciclos de una vez como matrices de numpy
+            rng (numpy.random.Generator): Generador a usar, por defecto el estado global de np.random
+            seed (int): Semilla de la corrida. En modo vectorizado cada bloque de ciclos usa su
+                propio generador derivado de ella, así el resultado no depende de cuántos workers se usen
+            workers (int): Hilos que simulan bloques en paralelo (modo vectorizado)
+            chunkSize (int): Ciclos por bloque (modo vectorizado con semilla o workers)
+
+        Returns:
+            tuple: (df_summary, df_detail) con un resumen por ciclo y el detalle de cada tirada
+        """
+        with instrumentation.span('money.execute', adventure=cookedAdventure['name'], cycles=cycles,
+                                  vectorized=kwargs.get('vectorized', False)):
+            return self.__executeMoneyAdventure(cookedAdventure, cycles, **kwargs)
+
+    # Cuerpo de executeMoneyAdventure
+    def __executeMoneyAdventure(self, cookedAdventure, cycles, **kwargs):
+        rng = kwargs.get('rng')
+        seed = kwargs.get('seed')
+        if kwargs.get('vectorized', False):
+            if seed is None and kwargs.get('workers', 1) <= 1:
+                return self.__executeMoneyAdventureVectorized(cookedAdventure, cycles, rng)
+            chunks = list(self.streamMoneyAdventure(cookedAdventure, cycles, **kwargs))
+            df_summary = pd.concat([chunk[0] for chunk in chunks], ignore_index=True)
+            df_detail = pd.concat([chunk[1] for chunk in chunks], ignore_index=True)
+            return df_summary, df_detail
+
+        if rng is None and seed is not None:
+            rng = np.random.default_rng(seed)
         df_detail = pd.DataFrame()
         rows_summary = list()
         # Cada ciclo es una aventura
         for i in range(cycles):
-            df_rolls = cookedAdventure['rolls']
+            df_rolls = cookedAdventure['rolls'].copy()
             df_rolls['cooked'] = [list(x) for x in zip(df_rolls['advantage'], df_rolls['bonus'], df_rolls['skill'])]
             df_rolls['roll'] = np.where(
                 True, 
                 df_rolls.cooked.map(lambda x: x[2].check(
                         advantage=x[0],
-                        extraBonuses=x[1])).values,
+                        extraBonuses=x[1],
+                        rng=rng)).values,
                 None
             )
 
-            df_jokers = cookedAdventure['jokers']
+            df_jokers = cookedAdventure['jokers'].copy()
             df_jokers['cooked'] = [list(x) for x in zip(df_jokers['advantage'], df_jokers['bonus'], df_jokers['skill'])]
             df_jokers['roll'] = np.where(
                 True, 
                 df_jokers.cooked.map(lambda x: x[2].check(
                         advantage=x[0],
-                        extraBonuses=x[1])).values,
+                        extraBonuses=x[1],
+                        rng=rng)).values,
                 None
             )
 
-            # Evalúa si reemplazar una tirada
-            df_rolls = df_rolls.sort_values(by=['roll'], ascending=True)
-            df_jokers = df_jokers.sort_values(by=['average'], ascending=False)
+            # Evalúa si reemplazar una tirada: cada comodín, del mejor promedio al peor, reemplaza
+            # a la peor tirada si ésta es menor a su promedio (igual que resolveRolls)
+            df_rolls = df_rolls.reset_index(drop=True)
+            df_jokers = df_jokers.sort_values(by=['average'], ascending=False, kind='stable')
             for index in range(len(df_jokers)):
-                if df_rolls.iloc[0].roll < df_jokers.iloc[0].average:
-                    df_rolls.drop(0, inplace=True)
-                    df_rolls = pd.concat([df_rolls, df_jokers.iloc[[0]]])
-                    df_jokers.drop(0, inplace=True)
+                worst = df_rolls['roll'].astype(int).idxmin()
+                if df_rolls.loc[worst, 'roll'] < df_jokers.iloc[index].average:
+                    df_rolls = pd.concat([df_rolls.drop(worst), df_jokers.iloc[[index]]], ignore_index=True)
                 else:
                     break
 
@@ -227,7 +437,7 @@ class Adventure:
                 df_adventure['difficulty'] = cookedAdventure['comparison']['dice']
                 df_adventure['DC'] = np.where(
                     True, 
-                    df_adventure.difficulty.map(lambda x: x.roll()),
+                    df_adventure.difficulty.map(lambda x: x.roll(rng=rng)),
                     None
                 )
                 df_adventure.drop(axis=1, columns=['difficulty'], inplace=True)
@@ -253,4 +463,252 @@ class Adventure:
         
         df_detail = df_detail.reset_index(drop=True)
         df_summary = pd.DataFrame(rows_summary)
-        return df_summary, df_detail
\ No newline at end of file
+        instrumentation.count('money.cycles', cycles)
+        instrumentation.count('money.rows', len(df_detail))
+        return df_summary, df_detail
+
+    # Ejecuta una aventura de dinero por bloques de tamaño fijo
+    def streamMoneyAdventure(self, cookedAdventure, cycles=None, **kwargs):
+        """
+        Simula la aventura cocinada con el motor vectorizado, entregando un bloque a la vez
+        para que la memoria no crezca con los ciclos. Se puede dejar de iterar en cualquier momento.
+
+        Con semilla, el bloque i usa siempre el generador spawnGenerator(seed, i): una corrida
+        repartida en varios workers o procesos (usando chunks) da los mismos resultados que una serial.
+
+        Args:
+            cycles (int): Total de ciclos a simular, None para seguir hasta que se deje de iterar
+
+        kwargs:
+            chunkSize (int): Ciclos por bloque, por defecto 100000
+            rng (numpy.random.Generator): Generador compartido por todos los bloques, si no hay semilla
+            seed (int): Semilla de la corrida
+            chunks (iterable): Índices de los bloques a simular, por defecto todos en orden
+            workers (int): Hilos que simulan bloques en paralelo, requiere semilla (si no hay, se crea una)
+
+        Yields:
+            tuple: (df_summary, df_detail) de cada bloque, en el orden de chunks
+        """
+        chunkSize = kwargs.get('chunkSize', 100000)
+        rng = kwargs.get('rng')
+        seed = kwargs.get('seed')
+        workers = kwargs.get('workers', 1)
+        if cycles is None:
+            chunks = kwargs.get('chunks', itertools.count())
+        else:
+            chunks = kwargs.get('chunks', range(-(-cycles//chunkSize)))
+        if workers > 1 and seed is None:
+            seed = np.random.SeedSequence().entropy
+
+        # Simula el bloque pedido con el generador que le corresponde
+        def executeChunk(chunk):
+            size = chunkSize if cycles is None else min(chunkSize, cycles - chunk*chunkSize)
+            generator = rng if seed is None else spawnGenerator(seed, chunk)
+            return self.__executeMoneyAdventureVectorized(cookedAdventure, size, generator)
+
+        if workers <= 1:
+            for chunk in chunks:
+                yield executeChunk(chunk)
+            return
+
+        # Mantiene unos pocos bloques en vuelo y los entrega en orden
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(executeChunk, chunk))
+                if len(pending) >= 2*workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    # Simula una aventura de dinero hasta lograr la precisión pedida
+    def estimateMoneyAdventure(self, cookedAdventure, precision, **kwargs):
+        """
+        Simula la aventura por bloques hasta que el intervalo de confianza de la métrica mida a lo más
+        ±precision, o hasta agotar el tiempo o los ciclos. Así cada aventura usa sólo los ciclos que
+        necesita: las de poca varianza terminan rápido y las de mucha reciben más ciclos.
+
+        Los bloques son los de streamMoneyAdventure con la semilla, así el resultado es el mismo que
+        simular de una vez la cantidad de ciclos que se usaron, con el mismo chunkSize.
+
+        Args:
+            precision (float): Semiancho del intervalo buscado, p.ej. 1 para ±1 de oro
+
+        kwargs:
+            metric (str): 'money' para el dinero esperado o 'successRate' para la fracción de checks
+                exitosos (sólo aventuras que lanzan dificultades)
+            confidence (float): Nivel de confianza del intervalo, por defecto 0.95
+            timeBudget (float): Segundos máximos de simulación, por defecto sin límite
+            minCycles (int): Ciclos antes de revisar el intervalo, por defecto un bloque
+            maxCycles (int): Ciclos máximos, por defecto sin límite
+            chunkSize (int): Ciclos por bloque, por defecto 10000
+            seed (int): Semilla de la corrida, si no se indica se crea una
+            workers (int): Hilos que simulan bloques en paralelo
+
+        Returns:
+            dict: Con las llaves metric, estimate, halfWidth, low, high, confidence, cycles, elapsed,
+                converged (si se logró la precisión), reason ('precision', 'time' o 'cycles'),
+                seed y statistics (RunningStatistics con lo simulado)
+        """
+        metric = kwargs.get('metric', 'money')
+        comparison = cookedAdventure['comparison']
+        if metric == 'successRate' and not comparison['rollsDice']:
+            raise ValueError(f'{cookedAdventure["name"]} no lanza dificultades, no tiene tasa de éxito')
+        elif metric not in ('money', 'successRate'):
+            raise ValueError(f'Métrica desconocida {metric}')
+        confidence = kwargs.get('confidence', 0.95)
+        z = NormalDist().inv_cdf((1 + confidence)/2)
+        timeBudget = kwargs.get('timeBudget')
+        chunkSize = kwargs.get('chunkSize', 10000)
+        minCycles = kwargs.get('minCycles', chunkSize)
+        maxCycles = kwargs.get('maxCycles')
+        seed = kwargs.get('seed')
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+
+        statistics = RunningStatistics()
+        estimate, halfWidth = np.nan, np.inf
+        reason = 'cycles'
+        start = time.perf_counter()
+        chunks = self.streamMoneyAdventure(cookedAdventure, maxCycles, chunkSize=chunkSize, seed=seed,
+                                           workers=kwargs.get('workers', 1))
+        for df_summary, _ in chunks:
+            statistics.update(df_summary)
+            if metric == 'money':
+                estimate, standardError = statistics.mean, statistics.standardError()
+            else:
+                estimate, standardError = statistics.outcomeMean()
+                estimate, standardError = estimate/comparison['ammount'], standardError/comparison['ammount']
+            halfWidth = z*standardError
+            if statistics.cycles >= minCycles and halfWidth <= precision:
+                reason = 'precision'
+                break
+            if timeBudget is not None and time.perf_counter() - start >= timeBudget:
+                reason = 'time'
+                break
+        chunks.close()
+
+        return {
+            'metric': metric,
+            'estimate': estimate,
+            'halfWidth': halfWidth,
+            'low': estimate - halfWidth,
+            'high': estimate + halfWidth,
+            'confidence': confidence,
+            'cycles': statistics.cycles,
+            'elapsed': time.perf_counter() - start,
+            'converged': reason == 'precision',
+            'reason': reason,
+            'seed': seed,
+            'statistics': statistics
+        }
+
+    # Evalúa de forma exacta una aventura de dinero, sin simular
+    def evaluateMoneyAdventure(self, cookedAdventure):
+        """
+        Calcula las distribuciones exactas de resultados de la aventura cocinada con estadísticos de
+        orden (ver keptDistribution): el costo depende de la cantidad de comodines y de tiradas que se
+        quedan, no del producto de los soportes de todas las tiradas.
+
+        Returns:
+            dict: Con las llaves
+                successes (pandas.Series): Distribución de éxitos, None si la aventura no lanza dificultades
+                roll (pandas.Series): Distribución de la suma de las tiradas que se quedan
+                money (pandas.Series): Distribución del dinero ganado
+                expectedMoney (float): Dinero esperado
+                variance (float): Varianza del dinero
+                lossProbability (float): Probabilidad de perder dinero
+                days (int): Días que dura la aventura
+
+        Raises:
+            ValueError: Si la aventura es demasiado grande para evaluarse de forma exacta
+        """
+        comparison = cookedAdventure['comparison']
+        df_slots, nRolls, averages = prepareSlots(cookedAdventure)
+
+        # Soporte de cada tirada y su probabilidad
+        supports = list()
+        for slot in df_slots.itertuples():
+            distribution = slot.skill.distribution(advantage=slot.advantage, extraBonuses=slot.bonus)
+            distribution = distribution[distribution > 0]
+            supports.append((distribution.index.values.tolist(), distribution.values.tolist()))
+        arguments = (supports[:nRolls], supports[nRolls:], averages, comparison['ammount'])
+
+        df_roll = keptDistribution(*arguments, lambda value: {value: 1.})
+
+        if comparison['rollsDice']:
+            # Probabilidad de superar la dificultad con cada tirada que se queda
+            difficulty = comparison['dice'].distribution().cumsum()
+            chances = dict()
+            def success(value):
+                if value not in chances:
+                    chance = float(np.interp(value, difficulty.index, difficulty.values, left=0., right=1.))
+                    chances[value] = {1: chance, 0: 1 - chance}
+                return chances[value]
+            df_successes = keptDistribution(*arguments, success).reindex(range(comparison['ammount'] + 1), fill_value=0.)
+            df_money = df_successes.groupby(df_successes.index.map(cookedAdventure['prizes'])).sum()
+        else:
+            df_successes = None
+            money = maxValuePrizes(df_roll.index.values, cookedAdventure['prizes'])
+            df_money = df_roll.groupby(money).sum()
+
+        expectedMoney = (df_money.index.values*df_money.values).sum()
+        variance = (((df_money.index.values - expectedMoney)**2)*df_money.values).sum()
+        return {
+            'successes': df_successes,
+            'roll': df_roll,
+            'money': df_money,
+            'expectedMoney': expectedMoney,
+            'variance': variance,
+            'lossProbability': df_money[df_money.index < 0].sum(),
+            'days': comparison['days']
+        }
+
+    # Ejecuta todos los ciclos de una aventura de dinero de una sola vez
+    def __executeMoneyAdventureVectorized(self, cookedAdventure, cycles, rng=None):
+        with instrumentation.span('money.chunk', cycles=cycles):
+            df_summary, df_detail = self.__simulateChunk(cookedAdventure, cycles, rng)
+        instrumentation.count('money.cycles', cycles)
+        instrumentation.count('money.rows', len(df_detail))
+        return df_summary, df_detail
+
+    # Simula un bloque de ciclos con matrices de numpy
+    def __simulateChunk(self, cookedAdventure, cycles, rng):
+        comparison = cookedAdventure['comparison']
+        df_slots, nRolls, averages = prepareSlots(cookedAdventure)
+
+        # Matriz (ciclos x tiradas) con todos los lanzamientos
+        matrix = np.empty((cycles, len(df_slots)), dtype=int)
+        for column, slot in enumerate(df_slots.itertuples()):
+            matrix[:, column] = slot.skill.checkMany(cycles, advantage=slot.advantage, extraBonuses=slot.bonus, rng=rng)
+        instrumentation.count('money.rolls', matrix.size)
+
+        # Se toman los mejores dados
+        size = comparison['ammount']
+        bestRolls, bestSlots = resolveRolls(matrix, nRolls, averages, size)
+        bestSlots = bestSlots.ravel()
+        detail = {
+            'actorName': df_slots['actorName'].values[bestSlots],
+            'skillName': df_slots['skillName'].values[bestSlots],
+            'bonus': df_slots['bonus'].values[bestSlots],
+            'advantage': df_slots['advantage'].values[bestSlots],
+            'roll': bestRolls.ravel()
+        }
+
+        if comparison['rollsDice']:
+            DCs = comparison['dice'].rollMany(cycles*size, rng=rng).reshape(cycles, size)
+            instrumentation.count('money.dc', DCs.size)
+            success = bestRolls >= DCs
+            successes = success.sum(axis=1)
+            money = pd.Series(successes).map(cookedAdventure['prizes']).values
+            detail['DC'] = DCs.ravel()
+            detail['success'] = success.ravel()
+            df_summary = pd.DataFrame({'successes': successes, 'money': money})
+        else:
+            sum = bestRolls.sum(axis=1)
+            money = maxValuePrizes(sum, cookedAdventure['prizes'])
+            df_summary = pd.DataFrame({'roll': sum, 'money': money})
+
+        df_summary['days'] = comparison['days']
+        df_detail = pd.DataFrame(detail)
+        return df_summary, df_detail
@@ -0,0 +1,176 @@
+import json
+import re
+
+# Campos del actor de Foundry que usa el simulador. True se lee completo, un dict se recorre
+# quedándose sólo con esas llaves y una lista indica un arreglo cuyos elementos siguen esa forma
+ACTOR_FIELDS = {
+    'name': True,
+    'type': True,
+    'data': {
+        'abilities': True,
+        'skills': True,
+        'details': {'background': True},
+        'traits': {'toolProf': True}
+    },
+    'items': [{
+        'name': True,
+        'type': True,
+        'data': {'levels': True, 'subclass': True, 'hitDice': True}
+    }]
+}
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+NUMBER_CHARACTERS = '0123456789.eE+-'
+
+# Se queda sólo con los campos indicados de un valor ya decodificado
+def prune(value, fields):
+    if isinstance(fields, dict) and isinstance(value, dict):
+        return {key: prune(value[key], fields[key]) for key in fields if key in value}
+    if isinstance(fields, list) and isinstance(value, list):
+        return [prune(element, fields[0]) for element in value]
+    return value
+
+class JsonStream:
+    """
+    Clase que lee un json desde un archivo por partes.
+    - Mantiene en memoria sólo un buffer con lo que falta por leer
+    - Decodifica un valor a la vez, así se pueden descartar los que no interesan
+    """
+
+    ### Initializer ###
+    def __init__(self, file, **kwargs):
+        self.__file = file
+        self.__bufferSize = kwargs.get('bufferSize', 1 << 14)
+        self.__buffer = ''
+        self.__position = 0
+        self.__eof = False
+        self.__decoder = json.JSONDecoder()
+
+    ### Class Methods ###
+    # Siguiente caracter que no sea espacio, '' si se acabó el archivo
+    def peek(self):
+        while True:
+            self.__position = WHITESPACE.match(self.__buffer, self.__position).end()
+            if self.__position < len(self.__buffer) or self.__eof:
+                return self.__buffer[self.__position:self.__position + 1]
+            self.__fill()
+
+    # Consume el caracter indicado
+    def expect(self, character):
+        if self.peek() != character:
+            raise ValueError(f'Se esperaba {character!r} en la posición {self.__position} del buffer')
+        self.__position += 1
+
+    # Lee un string, p.ej. la llave de un objeto
+    def readString(self):
+        self.expect('"')
+        value, self.__position = self.__decode(lambda: json.decoder.scanstring(self.__buffer, self.__position))
+        return value
+
+    # Lee un valor completo
+    def readValue(self):
+        self.peek()
+        value, self.__position = self.__decode(lambda: self.__decoder.raw_decode(self.__buffer, self.__position))
+        return value
+
+    # Lee un objeto quedándose sólo con los campos indicados (ver ACTOR_FIELDS)
+    def readSelected(self, fields):
+        """
+        Recorre miembro a miembro el objeto (el actor) y los arreglos de sus campos (los items),
+        así nunca hay más de uno de ellos decodificado a la vez. Los demás valores se decodifican
+        enteros y se podan, lo que es mucho más rápido que recorrerlos desde Python.
+        """
+        if not isinstance(fields, dict) or self.peek() != '{':
+            return prune(self.readValue(), fields)
+        selected = dict()
+        self.expect('{')
+        while self.peek() != '}':
+            key = self.readString()
+            self.expect(':')
+            if key not in fields:
+                self.readValue()
+            elif isinstance(fields[key], list) and self.peek() == '[':
+                selected[key] = list()
+                self.expect('[')
+                while self.peek() != ']':
+                    selected[key].append(prune(self.readValue(), fields[key][0]))
+                    if self.peek() == ',':
+                        self.expect(',')
+                self.expect(']')
+            else:
+                selected[key] = prune(self.readValue(), fields[key])
+            if self.peek() == ',':
+                self.expect(',')
+        self.expect('}')
+        return selected
+
+    # Aplica un decodificador, leyendo más del archivo mientras el valor esté incompleto
+    def __decode(self, decoder):
+        while True:
+            try:
+                value, end = decoder()
+            except json.JSONDecodeError:
+                if self.__eof:
+                    raise
+                self.__fill()
+                continue
+            # Un número cortado por el final del buffer (p.ej. '1.' de '1.5') sigue en el próximo bloque
+            if self.__eof or (end < len(self.__buffer) and self.__buffer[end] not in NUMBER_CHARACTERS):
+                return value, end
+            self.__fill()
+
+    # Lee el siguiente bloque del archivo, descartando lo ya consumido
+    def __fill(self):
+        if self.__position > self.__bufferSize:
+            self.__buffer = self.__buffer[self.__position:]
+            self.__position = 0
+        chunk = self.__file.read(max(self.__bufferSize, len(self.__buffer)))
+        if chunk == '':
+            self.__eof = True
+        self.__buffer += chunk
+
+class FoundryReader:
+    """
+    Clase que extrae de un export de Foundry VTT sólo los campos de ACTOR_FIELDS.
+    - Acepta un actor (fvtt-Actor-*.json), un arreglo de actores o un json por línea (actors.db)
+    - Lee la ruta indicada o un archivo de texto ya abierto (file), p.ej. un miembro de un zip
+    - Entrega diccionarios con la misma forma del json original, pero sin descripciones, íconos, etc.
+    """
+
+    ### Initializer ###
+    def __init__(self, path, **kwargs):
+        self.__path = path
+        self.__file = kwargs.get('file')
+        self.__fields = kwargs.get('fields', ACTOR_FIELDS)
+        self.__bufferSize = kwargs.get('bufferSize', 1 << 14)
+
+    def __str__(self):
+        return self.__path
+
+    ### Class Methods ###
+    # Primer (o único) actor del archivo
+    def actor(self):
+        for actor in self.actors():
+            return actor
+        return None
+
+    # Recorre todos los actores del archivo, uno a la vez
+    def actors(self):
+        if self.__file is not None:
+            yield from self.__read(self.__file)
+            return
+        with open(self.__path, 'r', encoding = 'utf8') as file:
+            yield from self.__read(file)
+
+    # Recorre los actores de un archivo abierto
+    def __read(self, file):
+        stream = JsonStream(file, bufferSize=self.__bufferSize)
+        if stream.peek() == '[':
+            stream.expect('[')
+            while stream.peek() != ']':
+                yield stream.readSelected(self.__fields)
+                if stream.peek() == ',':
+                    stream.expect(',')
+        else:
+            while stream.peek() != '':
+                yield stream.readSelected(self.__fields)
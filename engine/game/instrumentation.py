@@ -0,0 +1,330 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+
+# Variable de entorno que activa la instrumentación al importar el motor: 'log', 'memory' o la ruta de un .jsonl
+ENVIRONMENT_VARIABLE = 'ENGINE_INSTRUMENTATION'
+
+class NullSpan:
+    """
+    Span que no hace nada, es lo que entrega Instrumentation.span cuando está desactivada.
+    Es una sola instancia compartida, así un span desactivado cuesta sólo una llamada y un if.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        return False
+
+    # Agrega atributos al span (no hace nada)
+    def set(self, **attributes):
+        pass
+
+NULL_SPAN = NullSpan()
+
+class Span:
+    """
+    Clase que mide el tiempo de una fase del motor (p.ej. cocinar una aventura).
+    - Se usa como context manager: with instrumentation.span('adventure.cook', adventure=name)
+    - Guarda el span que la contiene (parent), así las fases anidadas se pueden agrupar
+    - Al terminar envía un evento a los sinks con la duración y sus atributos
+    """
+
+    __slots__ = ('__owner', '__name', '__attributes', '__start', '__parent')
+
+    ### Initializer ###
+    def __init__(self, owner, name, attributes):
+        self.__owner = owner
+        self.__name = name
+        self.__attributes = attributes
+        self.__start = None
+        self.__parent = None
+
+    def __enter__(self):
+        self.__parent = self.__owner.push(self.__name)
+        self.__start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exception):
+        duration = time.perf_counter() - self.__start
+        self.__owner.pop()
+        event = {'type': 'span', 'name': self.__name, 'value': duration, 'parent': self.__parent}
+        if exception[0] is not None:
+            event['error'] = exception[0].__name__
+        if self.__attributes:
+            event['attributes'] = self.__attributes
+        self.__owner.emit(event)
+        return False
+
+    ### Class Methods ###
+    # Agrega atributos que se conocen dentro del span (p.ej. filas producidas)
+    def set(self, **attributes):
+        self.__attributes.update(attributes)
+
+class Instrumentation:
+    """
+    Clase que reúne la instrumentación del motor: spans de tiempo por fase y contadores.
+    - Está desactivada por defecto: span entrega NULL_SPAN y count no hace nada, así el costo
+      en el motor es casi nulo. Sólo se instrumentan fases (cargar, cocinar, simular un bloque),
+      nunca cada tirada
+    - Los eventos se envían a uno o varios sinks (LogSink, JsonSink, MemorySink)
+    - Es segura entre hilos: cada hilo lleva su propia pila de spans
+    """
+
+    ### Initializer ###
+    def __init__(self):
+        self.__enabled = False
+        self.__sinks = list()
+        self.__local = threading.local()
+        self.__lock = threading.Lock()
+
+    def __str__(self):
+        return f'Instrumentación {"activa" if self.__enabled else "inactiva"}, {len(self.__sinks)} sinks'
+
+    ### Getters & Setters ###
+    def __get_enabled(self): return self.__enabled
+    enabled = property(__get_enabled)
+    def __get_sinks(self): return list(self.__sinks)
+    sinks = property(__get_sinks)
+
+    ### Class Methods ###
+    # Activa la instrumentación enviando los eventos a los sinks indicados (se suman a los que ya había)
+    def enable(self, *sinks):
+        with self.__lock:
+            self.__sinks.extend(sinks)
+            self.__enabled = bool(self.__sinks)
+
+    # Desactiva la instrumentación y cierra los sinks, o sólo quita los sinks indicados
+    def disable(self, *sinks):
+        with self.__lock:
+            removed = list(sinks) if sinks else list(self.__sinks)
+            self.__sinks = [sink for sink in self.__sinks if sink not in removed]
+            self.__enabled = bool(self.__sinks)
+        for sink in removed:
+            sink.close()
+
+    # Span de tiempo de una fase, con atributos opcionales
+    def span(self, name, **attributes):
+        if not self.__enabled:
+            return NULL_SPAN
+        return Span(self, name, attributes)
+
+    # Suma value al contador indicado (p.ej. tiradas lanzadas, hits de caché)
+    def count(self, name, value=1, **attributes):
+        if not self.__enabled:
+            return
+        event = {'type': 'counter', 'name': name, 'value': value}
+        if attributes:
+            event['attributes'] = attributes
+        self.emit(event)
+
+    # Envía un evento a todos los sinks
+    def emit(self, event):
+        event['time'] = time.time()
+        event['process'] = os.getpid()
+        event['thread'] = threading.current_thread().name
+        for sink in self.__sinks:
+            sink.record(event)
+
+    # Entra a un span en el hilo actual, devuelve el span que lo contiene
+    def push(self, name):
+        stack = getattr(self.__local, 'stack', None)
+        if stack is None:
+            stack = self.__local.stack = list()
+        parent = stack[-1] if stack else None
+        stack.append(name)
+        return parent
+
+    # Sale del span actual del hilo
+    def pop(self):
+        self.__local.stack.pop()
+
+class LogSink:
+    """
+    Sink que escribe cada evento en un logger de Python (por defecto 'engine').
+    """
+
+    ### Initializer ###
+    def __init__(self, **kwargs):
+        self.__logger = logging.getLogger(kwargs.get('logger', 'engine'))
+        self.__level = kwargs.get('level', logging.INFO)
+
+    ### Class Methods ###
+    # Escribe el evento
+    def record(self, event):
+        if event['type'] == 'span':
+            value = f'{event["value"]*1000:.3f} ms'
+        else:
+            value = f'+{event["value"]}'
+        attributes = ' '.join(f'{key}={value}' for key, value in event.get('attributes', {}).items())
+        self.__logger.log(self.__level, f'{event["type"]} {event["name"]} {value} {attributes}'.rstrip())
+
+    def close(self):
+        pass
+
+class JsonSink:
+    """
+    Sink que agrega cada evento como una línea de json a un archivo (jsonl).
+    Cada línea se escribe de una vez en modo append, así varios procesos (p.ej. los workers
+    de RosterSweep) pueden compartir el mismo archivo.
+    """
+
+    ### Initializer ###
+    def __init__(self, path):
+        self.__path = path
+        self.__file = open(path, 'a', encoding = 'utf8', buffering=1)
+        self.__lock = threading.Lock()
+
+    def __str__(self):
+        return self.__path
+
+    ### Class Methods ###
+    # Escribe el evento
+    def record(self, event):
+        line = json.dumps(event, default=str) + '\n'
+        with self.__lock:
+            self.__file.write(line)
+
+    def close(self):
+        self.__file.close()
+
+class MemorySink:
+    """
+    Sink que guarda los eventos en memoria, para revisarlos al terminar una corrida.
+    - Guarda los últimos maxEvents eventos (por defecto 100000)
+    - Tiene métodos para resumir los spans y los contadores en tablas
+    """
+
+    ### Initializer ###
+    def __init__(self, **kwargs):
+        self.__maxEvents = kwargs.get('maxEvents', 100000)
+        self.__events = list()
+        self.__lock = threading.Lock()
+
+    def __str__(self):
+        return f'{len(self.__events)} eventos'
+
+    ### Getters & Setters ###
+    def __get_events(self): return list(self.__events)
+    events = property(__get_events)
+
+    ### Class Methods ###
+    # Guarda el evento
+    def record(self, event):
+        with self.__lock:
+            self.__events.append(event)
+            if len(self.__events) > self.__maxEvents:
+                del self.__events[:len(self.__events) - self.__maxEvents]
+
+    def close(self):
+        pass
+
+    # Tiempo por fase: llamadas, total, promedio y máximo de cada span
+    def spans(self):
+        df_spans = pd.DataFrame([event for event in self.__events if event['type'] == 'span'],
+                                columns=['name', 'parent', 'value'])
+        df_spans = df_spans.groupby('name', sort=False)['value'].agg(['count', 'sum', 'mean', 'max'])
+        return df_spans.rename(columns={'sum': 'total'}).sort_values('total', ascending=False)
+
+    # Total de cada contador
+    def counters(self):
+        df_counters = pd.DataFrame([event for event in self.__events if event['type'] == 'counter'],
+                                   columns=['name', 'value'])
+        return df_counters.groupby('name')['value'].sum()
+
+class Capture:
+    """
+    Clase que instrumenta una corrida completa, opcionalmente con cProfile y tracemalloc.
+    - Se usa como context manager: with Capture(profile=True, memory=True) as capture: ...
+    - Mientras dura activa la instrumentación con un MemorySink (más los sinks indicados)
+    - Al terminar tiene los spans, contadores, estadísticas de cProfile y el peak de memoria
+    """
+
+    ### Initializer ###
+    def __init__(self, *sinks, **kwargs):
+        self.__sinks = (MemorySink(),) + sinks
+        self.__profile = cProfile.Profile() if kwargs.get('profile', False) else None
+        self.__memory = kwargs.get('memory', False)
+        self.__peakMemory = None
+        self.__snapshot = None
+        self.__startedMemory = False
+
+    def __enter__(self):
+        instrumentation.enable(*self.__sinks)
+        if self.__memory:
+            self.__startedMemory = not tracemalloc.is_tracing()
+            if self.__startedMemory:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        if self.__profile is not None:
+            self.__profile.enable()
+        return self
+
+    def __exit__(self, *exception):
+        if self.__profile is not None:
+            self.__profile.disable()
+        if self.__memory:
+            self.__peakMemory = tracemalloc.get_traced_memory()[1]
+            self.__snapshot = tracemalloc.take_snapshot()
+            if self.__startedMemory:
+                tracemalloc.stop()
+        instrumentation.disable(*self.__sinks)
+        return False
+
+    ### Getters & Setters ###
+    def __get_collector(self): return self.__sinks[0]
+    collector = property(__get_collector)
+    def __get_peakMemory(self): return self.__peakMemory
+    peakMemory = property(__get_peakMemory)
+
+    ### Class Methods ###
+    # Estadísticas de cProfile, None si no se perfiló
+    def profile(self):
+        if self.__profile is None:
+            return None
+        return pstats.Stats(self.__profile)
+
+    # Líneas de código que más memoria tenían asignada al terminar, None si no se midió
+    def memory(self, limit=10):
+        if self.__snapshot is None:
+            return None
+        return self.__snapshot.statistics('lineno')[:limit]
+
+    # Reporte en texto: fases, contadores y, si se pidieron, funciones y memoria
+    def report(self, limit=15):
+        lines = list()
+        df_spans = self.collector.spans()
+        if not df_spans.empty:
+            lines += ['Fases (s):', df_spans.to_string(), '', 'Contadores:', self.collector.counters().to_string(), '']
+        if self.__profile is not None:
+            stream = io.StringIO()
+            pstats.Stats(self.__profile, stream=stream).sort_stats('cumulative').print_stats(limit)
+            lines += [stream.getvalue().strip(), '']
+        if self.__snapshot is not None:
+            lines += [f'Peak de memoria: {self.__peakMemory/2**20:.2f} MB']
+            lines += [str(statistic) for statistic in self.memory(limit)]
+        return '\n'.join(lines).strip()
+
+# Sink según el valor de ENGINE_INSTRUMENTATION: 'log', 'memory' o la ruta de un .jsonl
+def sinkFromSetting(setting):
+    if setting == 'log':
+        return LogSink()
+    if setting == 'memory':
+        return MemorySink()
+    return JsonSink(setting)
+
+# Instrumentación compartida por todo el proceso
+instrumentation = Instrumentation()
+if os.environ.get(ENVIRONMENT_VARIABLE):
+    instrumentation.enable(sinkFromSetting(os.environ[ENVIRONMENT_VARIABLE]))
@@ -1,4 +1,41 @@
+from collections import Counter
+
 import numpy as np
+import pandas as pd
+
+# Obtiene enteros aleatorios en [low, high) desde el generador indicado, o desde np.random si no hay
+def drawIntegers(low, high, size, rng=None):
+    if rng is None:
+        return np.random.randint(low, high, size=size)
+    return rng.integers(low, high, size=size)
+
+# Generador independiente y reproducible para una parte de una corrida (p.ej. un bloque de ciclos)
+def spawnGenerator(seed, *key):
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=key))
+
+# Argumentos de cada tipo de lanzamiento
+ROLL_MODES = {
+    'normal': {},
+    'advantage': {'advantage': True},
+    'disadvantage': {'disadvantage': True},
+    'elvenAccuracy': {'advantage': True, 'elvenAccuracy': True}
+}
+
+# Tipo de lanzamiento según los argumentos, con la misma lógica de decideRoll
+def rollMode(**kwargs):
+    advantage = kwargs.get('advantage', False)
+    disadvantage = kwargs.get('disadvantage', False)
+    if advantage and not disadvantage:
+        return 'elvenAccuracy' if kwargs.get('elvenAccuracy', False) else 'advantage'
+    elif disadvantage and not advantage:
+        return 'disadvantage'
+    return 'normal'
+
+# Convoluciona dos distribuciones de probabilidad indexadas por valores consecutivos
+def convolveDistributions(first, second):
+    probabilities = np.convolve(first.values, second.values)
+    start = first.index[0] + second.index[0]
+    return pd.Series(probabilities, index=np.arange(start, start + len(probabilities)))
 
 class Die:
     """
@@ -8,6 +45,8 @@ class Die:
     - Tiene métodos para obtener el promedio de algunos lanzamientos
     """
 
+    __slots__ = ('__faces',)
+
     ### Initializer ###
     def __init__(self, faces):
         self.__faces = faces
@@ -21,39 +60,80 @@ class Die:
 
     ### Class Methods ###
     # Lanza un dado aleatorio dentro del rango permitido
-    def roll(self):
+    def roll(self, **kwargs):
         min = 1
         max = self.__faces + 1
-        return np.random.randint(min, max)
+        return int(drawIntegers(min, max, None, kwargs.get('rng')))
 
     # Lanza dos dados aleatorios y se queda con el menor
-    def rollDisadvantage(self):
-        return min(self.roll(), self.roll())
+    def rollDisadvantage(self, **kwargs):
+        return min(self.roll(**kwargs), self.roll(**kwargs))
 
     # Lanza dos dados aleatorios y se queda con el mejor
-    def rollAdvantage(self):
-        return max(self.roll(), self.roll())
+    def rollAdvantage(self, **kwargs):
+        return max(self.roll(**kwargs), self.roll(**kwargs))
 
     # Lanza tres dados aleatorios y se queda con el mejor
-    def rollElvenAccuracy(self):
-        return max(self.roll(), self.roll(), self.roll())
+    def rollElvenAccuracy(self, **kwargs):
+        return max(self.roll(**kwargs), self.roll(**kwargs), self.roll(**kwargs))
 
     # Lógica para decidir el tipo de lanzamiento
     def decideRoll(self, **kwargs):
         advantage = kwargs.get('advantage', False)
         disadvantage = kwargs.get('disadvantage', False)
         elvenAccuracy = kwargs.get('elvenAccuracy', False)
+        rng = kwargs.get('rng')
         if not advantage and not disadvantage:
-            return self.roll()
+            return self.roll(rng=rng)
         elif advantage and not disadvantage:
             if elvenAccuracy:
-                return self.rollElvenAccuracy()
+                return self.rollElvenAccuracy(rng=rng)
             else:
-                return self.rollAdvantage()
+                return self.rollAdvantage(rng=rng)
         elif not advantage and disadvantage:
-            return self.rollDisadvantage()
+            return self.rollDisadvantage(rng=rng)
         else:
-            return self.roll()
+            return self.roll(rng=rng)
+
+    # Lanza n veces el dado de una sola vez, con la misma lógica de decideRoll
+    def rollMany(self, n, **kwargs):
+        """
+        Realiza n lanzamientos del dado en una sola llamada al generador.
+
+        kwargs:
+            advantage (bool): Se queda con el mejor de dos dados
+            disadvantage (bool): Se queda con el peor de dos dados
+            elvenAccuracy (bool): Con ventaja, se queda con el mejor de tres dados
+            rng (numpy.random.Generator): Generador a usar, por defecto el estado global de np.random
+
+        Returns:
+            numpy.ndarray: Arreglo de enteros con los n lanzamientos
+        """
+        advantage = kwargs.get('advantage', False)
+        disadvantage = kwargs.get('disadvantage', False)
+        elvenAccuracy = kwargs.get('elvenAccuracy', False)
+        rng = kwargs.get('rng')
+        if advantage and not disadvantage:
+            draws = 3 if elvenAccuracy else 2
+            return drawIntegers(1, self.__faces + 1, (n, draws), rng).max(axis=1)
+        elif disadvantage and not advantage:
+            return drawIntegers(1, self.__faces + 1, (n, 2), rng).min(axis=1)
+        return drawIntegers(1, self.__faces + 1, n, rng)
+
+    # Distribución exacta del lanzamiento, con la misma lógica de decideRoll
+    def distribution(self, **kwargs):
+        advantage = kwargs.get('advantage', False)
+        disadvantage = kwargs.get('disadvantage', False)
+        elvenAccuracy = kwargs.get('elvenAccuracy', False)
+        faces = np.arange(1, self.__faces + 1)
+        if advantage and not disadvantage:
+            draws = 3 if elvenAccuracy else 2
+            cumulative = (faces/self.__faces)**draws
+        elif disadvantage and not advantage:
+            cumulative = 1 - ((self.__faces - faces)/self.__faces)**2
+        else:
+            cumulative = faces/self.__faces
+        return pd.Series(np.diff(cumulative, prepend=0.), index=faces)
 
     # Lanzamiento promedio de un dado
     def avgRoll(self):
@@ -96,6 +176,8 @@ class Dice:
     - Tiene métodos para obtener el promedio de algunos lanzamientos
     """
 
+    __slots__ = ('__dice', '__bonuses', '__string')
+
     ### Initializer ###
     def __init__(self, diceString):
         self.__dice = list()
@@ -122,6 +204,21 @@ class Dice:
             roll += die.decideRoll(**kwargs)
         return roll
 
+    # Lanza todos los dados n veces, devuelve un arreglo con las n sumas
+    def rollMany(self, n, **kwargs):
+        # Una sola llamada al generador por cada tipo de dado
+        rolls = np.full(n, self.__bonuses)
+        for faces, ammount in Counter(die.faces for die in self.__dice).items():
+            rolls += Die(faces).rollMany(n*ammount, **kwargs).reshape(n, ammount).sum(axis=1)
+        return rolls
+
+    # Distribución exacta de la suma de los dados
+    def distribution(self, **kwargs):
+        distribution = pd.Series([1.], index=[self.__bonuses])
+        for die in self.__dice:
+            distribution = convolveDistributions(distribution, die.distribution(**kwargs))
+        return distribution
+
     # Calcula el promedio de los dados
     def avgRoll(self, **kwargs):
         roll = self.__bonuses
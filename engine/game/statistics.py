@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+
+class RunningStatistics:
+    """
+    Clase que acumula las estadísticas de una simulación que llega por partes.
+    - Su memoria no depende de la cantidad de ciclos
+    - Mantiene media y varianza del dinero con el algoritmo en paralelo de Chan
+    - Mantiene histogramas del dinero y de los éxitos (o de la suma de tiradas)
+    - Tiene métodos para obtener cuantiles y errores de la media
+    - Sin ciclos acumulados la media, los cuantiles y la probabilidad de pérdida son NaN
+    """
+
+    ### Initializer ###
+    def __init__(self):
+        self.__cycles = 0
+        self.__mean = 0.
+        self.__squares = 0.
+        self.__money = dict()
+        self.__outcomes = dict()
+
+    def __str__(self):
+        return f'{self.__cycles} ciclos: {self.__mean:.2f} ± {self.standardError():.2f}'
+
+    ### Getters & Setters ###
+    def __get_cycles(self): return self.__cycles
+    cycles = property(__get_cycles)
+    def __get_mean(self): return self.__mean
+    mean = property(__get_mean)
+    def __get_variance(self):
+        if self.__cycles < 2:
+            return 0.
+        return self.__squares/(self.__cycles - 1)
+    variance = property(__get_variance)
+
+    ### Class Methods ###
+    # Agrega un bloque de resultados (el df_summary de executeMoneyAdventure)
+    def update(self, df_summary):
+        money = df_summary['money'].values
+        cycles = len(money)
+        if cycles == 0:
+            return
+        mean = money.mean()
+        squares = ((money - mean)**2).sum()
+        delta = mean - self.__mean
+        total = self.__cycles + cycles
+        self.__squares += squares + delta*delta*self.__cycles*cycles/total
+        self.__mean += delta*cycles/total
+        self.__cycles = total
+
+        # Histogramas: el dinero sólo toma los valores de la tabla de premios
+        outcome = 'successes' if 'successes' in df_summary else 'roll'
+        self.__addCounts(self.__money, money)
+        self.__addCounts(self.__outcomes, df_summary[outcome].values)
+
+    # Combina otras estadísticas acumuladas por separado
+    def merge(self, other):
+        if other.cycles == 0:
+            return
+        delta = other.mean - self.__mean
+        total = self.__cycles + other.cycles
+        self.__squares += other.variance*(other.cycles - 1) + delta*delta*self.__cycles*other.cycles/total
+        self.__mean += delta*other.cycles/total
+        self.__cycles = total
+        for value, count in other.moneyHistogram().items():
+            self.__money[value] = self.__money.get(value, 0) + count
+        for value, count in other.outcomeHistogram().items():
+            self.__outcomes[value] = self.__outcomes.get(value, 0) + count
+
+    # Error estándar de la media del dinero
+    def standardError(self):
+        if self.__cycles < 2:
+            return np.inf
+        return np.sqrt(self.variance/self.__cycles)
+
+    # Media y error estándar de la media de los éxitos (o de la suma de tiradas), a partir de su histograma
+    def outcomeMean(self):
+        histogram = self.outcomeHistogram()
+        values = histogram.index.values.astype(float)
+        counts = histogram.values
+        if self.__cycles < 2:
+            return (values*counts).sum()/max(self.__cycles, 1), np.inf
+        mean = (values*counts).sum()/self.__cycles
+        variance = (((values - mean)**2)*counts).sum()/(self.__cycles - 1)
+        return mean, np.sqrt(variance/self.__cycles)
+
+    # Cuantil del dinero a partir de su histograma, NaN si no hay ciclos
+    def quantile(self, q):
+        if self.__cycles == 0:
+            return np.nan
+        histogram = self.moneyHistogram()
+        cumulative = histogram.cumsum()/self.__cycles
+        position = min(np.searchsorted(cumulative.values, q), len(histogram) - 1)
+        return histogram.index[position]
+
+    # Histograma del dinero ganado
+    def moneyHistogram(self):
+        return pd.Series(self.__money, dtype=int).sort_index()
+
+    # Histograma de éxitos, o de la suma de tiradas si la aventura no lanza dificultades
+    def outcomeHistogram(self):
+        return pd.Series(self.__outcomes, dtype=int).sort_index()
+
+    # Resumen de lo acumulado
+    def summary(self):
+        if self.__cycles == 0:
+            return {'cycles': 0, 'mean': np.nan, 'variance': np.nan, 'standardError': np.inf,
+                    'median': np.nan, 'lossProbability': np.nan}
+        return {
+            'cycles': self.__cycles,
+            'mean': self.__mean,
+            'variance': self.variance,
+            'standardError': self.standardError(),
+            'median': self.quantile(0.5),
+            'lossProbability': self.moneyHistogram().loc[lambda x: x.index < 0].sum()/self.__cycles
+        }
+
+    # Suma las apariciones de cada valor al histograma
+    def __addCounts(self, histogram, values):
+        uniques, counts = np.unique(values, return_counts=True)
+        for value, count in zip(uniques.tolist(), counts.tolist()):
+            histogram[value] = histogram.get(value, 0) + count
+
+# Suma las tiradas de cada habilidad de un bloque de detalle: (cantidad, suma, éxitos)
+def addSkills(skills, df_detail):
+    columns = {'rolls': ('roll', 'size'), 'total': ('roll', 'sum')}
+    if 'success' in df_detail:
+        columns['successes'] = ('success', 'sum')
+    for name, row in df_detail.groupby('skillName', observed=True).agg(**columns).iterrows():
+        rolls, total, successes = skills.get(name, (0, 0, None))
+        if 'successes' in row:
+            successes = (successes or 0) + int(row['successes'])
+        skills[name] = (rolls + int(row['rolls']), total + int(row['total']), successes)
@@ -0,0 +1,255 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from engine.game.environment import Adventure, maxValuePrizes, prepareSlots, resolveRolls, rollOptions, uniqueBonuses
+from engine.game.objects import spawnGenerator
+
+# Estrategias para cocinar una aventura: la de loadAdventure (mejor promedio por paso) o la de StrategyOptimizer
+STRATEGIES = ('greedy', 'optimal')
+
+class StrategyOptimizer:
+    """
+    Clase que busca la mejor forma de jugar una aventura de dinero según el dinero esperado.
+    - Recorre todas las asignaciones posibles: la skill de cada paso, qué cheats 'before'
+      reemplazan a qué challenge, qué cheats 'after' quedan como comodines (todo dentro de
+      replacements) y a qué tirada va el uniqueBonus, si el personaje lo puede usar
+    - Evalúa todas con las mismas tiradas simuladas (números aleatorios comunes): cada opción de
+      tirada se lanza una sola vez y la comparten todas las asignaciones que la usan, así la
+      diferencia entre dos asignaciones tiene mucho menos ruido que simularlas por separado
+    - Con exact=True usa en cambio la evaluación exacta de Adventure.evaluateMoneyAdventure
+    - Tiene métodos para obtener la tabla de asignaciones y la mejor, con su margen sobre la segunda
+    """
+
+    ### Initializer ###
+    def __init__(self, plan, actor, **kwargs):
+        """
+        Args:
+            plan (AdventurePlan): Aventura compilada, de tipo money
+            actor (Character): Personaje que juega la aventura
+
+        kwargs:
+            apuesta (int): Apuesta de las aventuras con multiplicador input
+            samples (int): Ciclos simulados por asignación, por defecto 100000
+            seed (int): Semilla de las tiradas simuladas, por defecto 0
+            exact (bool): Si es True evalúa cada asignación de forma exacta en vez de simular
+            maxCandidates (int): Máximo de asignaciones a evaluar, por defecto 100000
+        """
+        if plan.type != 'money':
+            raise ValueError(f'{plan.name} no es una aventura de dinero')
+        self.__plan = plan
+        self.__actor = actor
+        self.__apuesta = kwargs.get('apuesta', 0)
+        self.__samples = kwargs.get('samples', 100000)
+        self.__seed = kwargs.get('seed', 0)
+        self.__exact = kwargs.get('exact', False)
+        self.__maxCandidates = kwargs.get('maxCandidates', 100000)
+        self.__options = [rollOptions(roll, actor) for roll in plan.rolls]
+        self.__bonuses = uniqueBonuses(plan.uniqueBonus, actor)
+        self.__columns = dict()
+        self.__DCs = None
+        self.__money = dict()
+        self.__results = None
+
+    def __str__(self):
+        return f'{self.__plan.name} para {self.__actor.name}'
+
+    ### Getters & Setters ###
+    # Asignaciones posibles, cada una un dict con skills, substitutions, jokers y uniqueBonus
+    def __get_candidates(self):
+        candidates = list()
+        challenges = [step for step, roll in enumerate(self.__plan.rolls) if roll['id'] == 'challenge']
+        before = [step for step, roll in enumerate(self.__plan.rolls) if roll['id'] == 'cheat' and roll.get('time') == 'before']
+        after = [step for step, roll in enumerate(self.__plan.rolls) if roll['id'] == 'cheat' and roll.get('time') == 'after']
+        budget = self.__plan.replacements or 0
+
+        for used in range(min(budget, len(before), len(challenges)) + 1):
+            for cheats in itertools.combinations(before, used):
+                for replaced in itertools.combinations(challenges, used):
+                    substitutions = tuple(zip(cheats, replaced))
+                    for kept in range(min(budget - used, len(after)) + 1):
+                        for jokers in itertools.combinations(after, kept):
+                            active = [step for step in challenges if step not in replaced] + list(cheats) + list(jokers)
+                            for skills in itertools.product(*[range(len(self.__options[step])) for step in active]):
+                                targets = [None] if self.__bonuses is None else active
+                                for target in targets:
+                                    candidates.append({
+                                        'skills': dict(zip(active, skills)),
+                                        'substitutions': substitutions,
+                                        'jokers': jokers,
+                                        'uniqueBonus': target
+                                    })
+                                    if len(candidates) > self.__maxCandidates:
+                                        raise ValueError(f'{self.__plan.name} tiene más de {self.__maxCandidates} asignaciones')
+        return candidates
+    candidates = property(__get_candidates)
+
+    ### Class Methods ###
+    # Aventura cocinada con la asignación indicada, con el mismo formato que Adventure.loadAdventure
+    def cook(self, assignment):
+        cookedAdventure = dict()
+        cookedAdventure['name'] = self.__plan.name
+        cookedAdventure['prizes'] = self.__plan.prizes(self.__apuesta)
+        cookedAdventure['comparison'] = dict(self.__plan.comparison)
+
+        # Los challenges reemplazados por cheats 'before' ya no están en la asignación
+        rolls = list()
+        jokers = list()
+        for step, option in assignment['skills'].items():
+            row = dict(self.__options[step][option])
+            row['option'] = (step, option, step == assignment['uniqueBonus'])
+            if step == assignment['uniqueBonus']:
+                row['bonus'] = row['bonus'] + self.__bonuses
+                row['average'] = row['skill'].avgRoll(advantage=row['advantage'], extraBonuses=row['bonus'])
+            if step in assignment['jokers']:
+                jokers.append(row)
+            else:
+                rolls.append(row)
+        columns = list(self.__options[0][0]) + ['option']
+        cookedAdventure['rolls'] = pd.DataFrame(rolls, columns=columns)
+        cookedAdventure['jokers'] = pd.DataFrame(jokers, columns=columns).sort_values(
+            by=['average'], ascending=False, kind='stable').reset_index(drop=True)
+        return cookedAdventure
+
+    # Evalúa todas las asignaciones
+    def evaluate(self):
+        """
+        Returns:
+            pandas.DataFrame: Una fila por asignación, de la mejor a la peor, con la descripción
+                (skills, substitutions, jokers, uniqueBonus), expectedMoney y su error estándar
+                (0 si es exacta), y la asignación y aventura cocinada en assignment y cookedAdventure
+        """
+        if self.__results is not None:
+            return self.__results
+        rows = list()
+        for assignment in self.candidates:
+            cookedAdventure = self.cook(assignment)
+            row = self.describe(assignment)
+            row['assignment'] = assignment
+            row['cookedAdventure'] = cookedAdventure
+            rows.append(row)
+
+        if self.__exact:
+            adventureManager = Adventure()
+            for row in rows:
+                evaluation = adventureManager.evaluateMoneyAdventure(row['cookedAdventure'])
+                row['expectedMoney'] = evaluation['expectedMoney']
+                row['standardError'] = 0.
+                row['lossProbability'] = evaluation['lossProbability']
+        else:
+            for position, row in enumerate(rows):
+                money = self.__simulate(row['cookedAdventure'])
+                row['expectedMoney'] = money.mean()
+                row['standardError'] = money.std(ddof=1)/np.sqrt(len(money))
+                row['lossProbability'] = (money < 0).mean()
+                self.__keepBest(position, money)
+
+        df_results = pd.DataFrame(rows)
+        self.__results = df_results.sort_values(by=['expectedMoney'], ascending=False, kind='stable')
+        return self.__results
+
+    # Mejor asignación, con su margen sobre la segunda
+    def best(self):
+        """
+        Returns:
+            dict: Con las llaves
+                assignment (dict): La asignación (ver candidates)
+                description (dict): La asignación con nombres de skills en vez de índices
+                expectedMoney (float): Dinero esperado de la asignación
+                margin (float): Diferencia de dinero esperado con la segunda mejor, None si hay una sola
+                marginError (float): Error estándar del margen (0 si es exacta)
+                candidates (int): Asignaciones evaluadas
+                cookedAdventure (dict): La aventura cocinada con la asignación
+        """
+        df_results = self.evaluate()
+        best = df_results.iloc[0]
+        margin = None
+        marginError = None
+        if len(df_results) > 1:
+            second = df_results.iloc[1]
+            margin = best['expectedMoney'] - second['expectedMoney']
+            marginError = 0.
+            if not self.__exact:
+                # Las dos usan las mismas tiradas: el error del margen sale de la diferencia ciclo a ciclo
+                difference = self.__money[best.name] - self.__money[second.name]
+                marginError = difference.std(ddof=1)/np.sqrt(len(difference))
+        return {
+            'assignment': best['assignment'],
+            'description': self.describe(best['assignment']),
+            'expectedMoney': best['expectedMoney'],
+            'margin': margin,
+            'marginError': marginError,
+            'candidates': len(df_results),
+            'cookedAdventure': best['cookedAdventure']
+        }
+
+    # Descripción legible de una asignación
+    def describe(self, assignment):
+        skill = lambda step: self.__options[step][assignment['skills'][step]]['skillName']
+        return {
+            'skills': ', '.join(skill(step) for step in sorted(assignment['skills'])),
+            'substitutions': ', '.join(f'{skill(cheat)} > {"/".join(self.__plan.rolls[challenge]["skillCheck"])}'
+                                       for cheat, challenge in assignment['substitutions']),
+            'jokers': ', '.join(skill(step) for step in assignment['jokers']),
+            'uniqueBonus': '' if assignment['uniqueBonus'] is None else skill(assignment['uniqueBonus'])
+        }
+
+    # Dinero de cada ciclo simulado para la aventura cocinada, con las tiradas compartidas
+    def __simulate(self, cookedAdventure):
+        comparison = cookedAdventure['comparison']
+        df_slots, nRolls, averages = prepareSlots(cookedAdventure)
+        matrix = np.column_stack([self.__column(slot) for slot in df_slots.itertuples()])
+        bestRolls, _ = resolveRolls(matrix, nRolls, averages, comparison['ammount'])
+        if comparison['rollsDice']:
+            successes = (bestRolls >= self.__difficulties()).sum(axis=1)
+            table = np.array([cookedAdventure['prizes'][success] for success in range(comparison['ammount'] + 1)])
+            return table[successes].astype(float)
+        return maxValuePrizes(bestRolls.sum(axis=1), cookedAdventure['prizes']).astype(float)
+
+    # Tiradas simuladas de una opción, lanzadas una sola vez por optimizador
+    def __column(self, slot):
+        if slot.option not in self.__columns:
+            step, option, _ = slot.option
+            # El generador depende sólo del paso y la skill: con y sin uniqueBonus se usan los mismos dados
+            rng = spawnGenerator(self.__seed, step, option)
+            self.__columns[slot.option] = slot.skill.checkMany(self.__samples, advantage=slot.advantage,
+                                                               extraBonuses=slot.bonus, rng=rng)
+        return self.__columns[slot.option]
+
+    # Dificultades simuladas, compartidas por todas las asignaciones
+    def __difficulties(self):
+        if self.__DCs is None:
+            comparison = self.__plan.comparison
+            rng = spawnGenerator(self.__seed, len(self.__plan.rolls))
+            self.__DCs = comparison['dice'].rollMany(self.__samples*comparison['ammount'], rng=rng).reshape(
+                self.__samples, comparison['ammount'])
+        return self.__DCs
+
+    # Guarda el dinero por ciclo de las dos mejores asignaciones, para el error del margen
+    def __keepBest(self, position, money):
+        self.__money[position] = money
+        if len(self.__money) > 2:
+            # Mismo desempate que el orden estable de evaluate: entre empates gana la primera asignación
+            worst = min(self.__money, key=lambda key: (self.__money[key].mean(), -key))
+            del self.__money[worst]
+
+# Aventura cocinada con la mejor asignación de StrategyOptimizer
+def cookOptimal(name, actor, **kwargs):
+    """
+    Igual a Adventure.loadAdventure, pero escogiendo la asignación con mayor dinero esperado.
+
+    Args:
+        name (str): Json de la aventura en engine/data/adventures
+        actor (Character): Personaje que juega la aventura
+
+    kwargs:
+        Los de StrategyOptimizer
+
+    Returns:
+        dict: Aventura cocinada, None si la aventura no es de dinero
+    """
+    plan = Adventure().loadPlan(name)
+    if plan.type != 'money':
+        return None
+    return StrategyOptimizer(plan, actor, **kwargs).best()['cookedAdventure']
@@ -0,0 +1,150 @@
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from engine.game.environment import Adventure
+from engine.game.statistics import RunningStatistics
+from engine.game.strategy import cookOptimal
+
+# Carga y cocina una aventura para un personaje, una sola vez por proceso
+@functools.lru_cache(maxsize=256)
+def cookPair(characterName, adventureName, apuesta, strategy='greedy'):
+    adventureManager = Adventure()
+    character = adventureManager.loadCharacter(characterName)
+    if strategy == 'optimal':
+        return cookOptimal(adventureName, character, apuesta=apuesta)
+    return adventureManager.loadAdventure(adventureName, character, apuesta=apuesta)
+
+# Simula un par (personaje, aventura) y devuelve sólo su resumen
+def simulatePair(task):
+    """
+    Trabajo de cada worker. Recibe sólo nombres de archivo y parámetros, así lo que viaja
+    entre procesos es pequeño, y acumula los ciclos por bloques sin guardar el detalle.
+
+    Args:
+        task (tuple): (characterName, adventureName, cycles, seed, apuesta, chunkSize, strategy, adaptive),
+            donde adaptive es None (cycles fijos) o los kwargs de Adventure.estimateMoneyAdventure,
+            y en ese caso cycles es el máximo de ciclos
+
+    Returns:
+        dict: Fila de la tabla de resultados
+    """
+    characterName, adventureName, cycles, seed, apuesta, chunkSize, strategy, adaptive = task
+    if adaptive is None:
+        return pairRow(task, simulateChunks((task, range(-(-cycles//chunkSize)))))
+    cookedAdventure = cookPair(characterName, adventureName, apuesta, strategy)
+    estimate = Adventure().estimateMoneyAdventure(cookedAdventure, maxCycles=cycles, seed=seed,
+                                                  chunkSize=chunkSize, **adaptive)
+    return pairRow(task, estimate['statistics'], estimate)
+
+# Simula algunos bloques de un par, trabajo de cada worker de RosterSweep con ciclos fijos
+def simulateChunks(work):
+    """
+    Args:
+        work (tuple): (task, chunks), la tarea del par (ver simulatePair) y los índices de sus bloques.
+            El bloque i usa siempre el generador spawnGenerator(seed, i), así da lo mismo qué worker lo simule
+
+    Returns:
+        RunningStatistics: Estadísticas de esos bloques
+    """
+    (characterName, adventureName, cycles, seed, apuesta, chunkSize, strategy, _), chunks = work
+    cookedAdventure = cookPair(characterName, adventureName, apuesta, strategy)
+    statistics = RunningStatistics()
+    for df_summary, _ in Adventure().streamMoneyAdventure(cookedAdventure, cycles, seed=seed, chunkSize=chunkSize,
+                                                          chunks=chunks):
+        statistics.update(df_summary)
+    return statistics
+
+# Fila de la tabla de resultados de un par
+def pairRow(task, statistics, estimate=None):
+    characterName, adventureName, _, _, apuesta, _, strategy, _ = task
+    cookedAdventure = cookPair(characterName, adventureName, apuesta, strategy)
+    row = {
+        'character': characterName,
+        'name': cookedAdventure['rolls']['actorName'].iloc[0],
+        'adventure': cookedAdventure['name'],
+        'days': cookedAdventure['comparison']['days']
+    }
+    row.update(statistics.summary())
+    row['moneyPerDay'] = row['mean']/row['days']
+    if estimate is not None:
+        row['halfWidth'] = estimate['halfWidth']
+        row['converged'] = estimate['converged']
+    return row
+
+class RosterSweep:
+    """
+    Clase que simula todos los personajes contra todas las aventuras en varios procesos.
+    - Atributos:
+        characters: archivos de personajes, por defecto todos los de data/characters
+        adventures: archivos de aventuras, por defecto todos los de data/adventures
+        cycles: ciclos a simular por cada par
+        seed: semilla de la corrida, cada par usa su propia sub-semilla (seed, índice del par)
+        workers: cantidad de procesos, por defecto la cantidad de núcleos
+        chunksize: trabajos (bloques, o pares con adaptive) que se envían juntos a cada proceso
+        apuesta: apuesta de las aventuras con multiplicador 'input'
+        chunkCycles: ciclos por bloque dentro de cada par, acota la memoria de cada worker
+        strategy: cómo se juega cada aventura, 'greedy' (loadAdventure) u 'optimal' (StrategyOptimizer)
+        adaptive: kwargs de Adventure.estimateMoneyAdventure (precision, metric, confidence, timeBudget) para
+            simular cada par hasta la precisión pedida, con cycles como máximo. None para ciclos fijos
+    - Con ciclos fijos cada bloque de chunkCycles ciclos de cada par es un trabajo aparte, así se usan
+      todos los procesos aunque haya menos pares que núcleos. Los bloques de un par se combinan en
+      orden con RunningStatistics.merge, y el resultado no depende de la cantidad de procesos
+    - Tiene un método para ejecutar el barrido y juntar los resultados en una tabla
+    """
+
+    ### Initializer ###
+    def __init__(self, cycles, **kwargs):
+        adventureManager = Adventure()
+        self.__characters = kwargs.get('characters') or adventureManager.characterNames()
+        self.__adventures = kwargs.get('adventures') or adventureManager.adventureNames()
+        self.__cycles = cycles
+        self.__seed = kwargs.get('seed', 0)
+        self.__workers = kwargs.get('workers') or os.cpu_count()
+        self.__chunksize = kwargs.get('chunksize', 1)
+        self.__apuesta = kwargs.get('apuesta', 0)
+        self.__chunkCycles = kwargs.get('chunkCycles', 100000)
+        self.__strategy = kwargs.get('strategy', 'greedy')
+        self.__adaptive = kwargs.get('adaptive')
+
+    def __str__(self):
+        return f'{len(self.__characters)} personajes x {len(self.__adventures)} aventuras @ {self.__cycles} ciclos'
+
+    ### Getters & Setters ###
+    def __get_tasks(self):
+        tasks = list()
+        for characterName in self.__characters:
+            for adventureName in self.__adventures:
+                seed = [self.__seed, len(tasks)]
+                tasks.append((characterName, adventureName, self.__cycles, seed, self.__apuesta, self.__chunkCycles,
+                              self.__strategy, self.__adaptive))
+        return tasks
+    tasks = property(__get_tasks)
+
+    ### Class Methods ###
+    # Ejecuta el barrido completo
+    def run(self):
+        tasks = self.tasks
+        if self.__adaptive is not None:
+            # Cada par decide cuántos bloques simula, no se puede repartir de antemano
+            return pd.DataFrame(self.__map(simulatePair, tasks))
+
+        chunks = -(-self.__cycles//self.__chunkCycles)
+        work = [(task, [chunk]) for task in tasks for chunk in range(chunks)]
+        results = self.__map(simulateChunks, work)
+        rows = list()
+        for pair, task in enumerate(tasks):
+            statistics = RunningStatistics()
+            for chunkStatistics in results[pair*chunks:(pair + 1)*chunks]:
+                statistics.merge(chunkStatistics)
+            rows.append(pairRow(task, statistics))
+        return pd.DataFrame(rows)
+
+    # Ejecuta los trabajos en los procesos, o en este mismo si hay un solo worker
+    def __map(self, function, work):
+        if self.__workers <= 1:
+            return list(map(function, work))
+        with ProcessPoolExecutor(max_workers=self.__workers) as executor:
+            return list(executor.map(function, work, chunksize=self.__chunksize))
@@ -0,0 +1,224 @@
+import copy
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from engine.game.characters import FOUNDRY_SKILLS, GAMING_SETS, MAGIC_ITEMS, MUSICAL_INSTRUMENTS, PROFICIENCY_LEVELS, \
+    SKILL_LOOKUP, TOOLS, Character
+from engine.game.environment import Adventure, maxValuePrizes, prepareSlots, resolveRolls
+from engine.game.objects import spawnGenerator
+from engine.game.strategy import cookOptimal
+
+# Puntuaciones de habilidad que se pueden cambiar
+ABILITIES = ('str', 'dex', 'con', 'int', 'wis', 'cha')
+
+# Herramienta que se agrega al snapshot para dar competencia en cada tipo de herramienta
+TOOL_CATEGORIES = {'tool': TOOLS, 'instrument': MUSICAL_INSTRUMENTS, 'gamingSet': GAMING_SETS}
+
+# Modos de evaluación de cada punto: exacto (Adventure.evaluateMoneyAdventure) o simulado con tiradas comunes
+METHODS = ('exact', 'simulate')
+
+# Aplica cambios a un snapshot de personaje, sin modificar el original
+def applyOverrides(snapshot, overrides):
+    """
+    Args:
+        snapshot (dict): Snapshot del personaje (Character.snapshot)
+        overrides (dict): Cambios a aplicar, con las llaves
+            level (int): Nivel total. La diferencia se suma a la clase con más niveles, así cambian
+                la competencia y los rasgos de subclase que dependen del nivel (no los dados de golpe)
+            str, dex, con, int, wis, cha (int | str): Puntuación de habilidad sin objetos mágicos, o un cambio
+                relativo como '+2' sobre esa puntuación. Los objetos se vuelven a aplicar después, así
+                '+2' de fuerza no sube a 21 a quien tiene los Gauntlets of Ogre Power
+            acrobatics, ..., survival (str): Competencia en la habilidad ('not', 'jot', 'pro', 'exp')
+            tool, instrument, gamingSet (str): Competencia en el tipo de herramienta ('not' o 'pro')
+            items (list): Objetos mágicos de MAGIC_ITEMS que el personaje se equipa, además de los que ya tiene
+
+    Returns:
+        dict: El snapshot con los cambios
+    """
+    snapshot = copy.deepcopy(snapshot)
+    # Snapshots sin baseAbilityScores (anteriores a guardar los objetos) se toman como sin objetos
+    baseScores = snapshot.setdefault('baseAbilityScores', dict(snapshot['abilityScores']))
+    items = snapshot.setdefault('items', list())
+    for key, value in overrides.items():
+        if key == 'level':
+            main = max(snapshot['classes'], key=lambda dndclass: snapshot['classes'][dndclass]['level'])
+            level = snapshot['classes'][main]['level'] + value - sum(
+                info['level'] for info in snapshot['classes'].values())
+            if level < 1:
+                raise ValueError(f'{snapshot["name"]} no puede bajar a nivel {value}')
+            snapshot['classes'][main]['level'] = level
+        elif key in ABILITIES:
+            if isinstance(value, str):
+                value = baseScores[key] + int(value)
+            baseScores[key] = value
+        elif key in TOOL_CATEGORIES:
+            if value not in ('not', 'pro'):
+                raise ValueError(f'La competencia en {key} sólo puede ser not o pro')
+            snapshot['tools'] = [tool for tool in snapshot['tools'] if tool not in TOOL_CATEGORIES[key]]
+            if value == 'pro':
+                snapshot['tools'].append(TOOL_CATEGORIES[key][0])
+        elif SKILL_LOOKUP.get(key) in FOUNDRY_SKILLS:
+            if value not in PROFICIENCY_LEVELS.values():
+                raise ValueError(f'Competencia {value} desconocida, debe ser una de {list(PROFICIENCY_LEVELS.values())}')
+            snapshot['skills'][SKILL_LOOKUP[key]] = value
+        elif key != 'items':
+            raise ValueError(f'No se puede cambiar {key}')
+
+    # Los objetos van al final, así fijan la puntuación sobre los cambios de habilidad
+    for item in overrides.get('items') or ():
+        if item not in MAGIC_ITEMS:
+            raise ValueError(f'Objeto mágico {item} desconocido, debe ser uno de {list(MAGIC_ITEMS)}')
+        if item not in items:
+            items.append(item)
+    snapshot['items'] = sorted(items)
+    snapshot['abilityScores'] = dict(baseScores)
+    for item in items:
+        ability, score = MAGIC_ITEMS[item]
+        snapshot['abilityScores'][ability] = max(snapshot['abilityScores'][ability], score)
+    return snapshot
+
+class WhatIfSweep:
+    """
+    Clase que responde "¿cuánto ganaría con...?" para un personaje en una aventura de dinero.
+    - Atributos:
+        actor: personaje base (Character)
+        adventure: json de la aventura en engine/data/adventures
+        grid: valores a probar de cada parámetro (ver applyOverrides), p.ej.
+            {'level': [7, 8], 'dex': ['+0', '+2'], 'stealth': ['pro', 'exp']}
+        points: combinaciones de la grilla, un dict de cambios por punto
+    - Cada punto es una copia del snapshot del personaje con los cambios, que se cocina (pasando
+      por el caché de aventuras) y se evalúa
+    - Con method='exact' (por defecto) cada punto se evalúa de forma exacta; con 'simulate' todos
+      los puntos usan las mismas tiradas de d20 y de dificultad (un generador por skill y por
+      dificultad), así las diferencias entre puntos tienen mucho menos ruido que simulaciones
+      independientes
+    - Entrega una tabla larga, una fila por punto, lista para graficar
+    """
+
+    ### Initializer ###
+    def __init__(self, actor, adventure, grid, **kwargs):
+        """
+        Args:
+            actor (Character): Personaje base
+            adventure (str): Json de la aventura, de tipo money
+            grid (dict): Lista de valores de cada parámetro
+
+        kwargs:
+            method (str): 'exact' o 'simulate'
+            samples (int): Ciclos simulados por punto con method='simulate', por defecto 100000
+            seed (int): Semilla de las tiradas simuladas, por defecto 0
+            apuesta (int): Apuesta de las aventuras con multiplicador input
+            strategy (str): 'greedy' (loadAdventure) u 'optimal' (StrategyOptimizer) para cocinar cada punto
+        """
+        self.__actor = actor
+        self.__adventure = adventure
+        self.__grid = {parameter: list(values) for parameter, values in grid.items()}
+        self.__method = kwargs.get('method', 'exact')
+        if self.__method not in METHODS:
+            raise ValueError(f'Método {self.__method} desconocido, debe ser uno de {METHODS}')
+        self.__samples = kwargs.get('samples', 100000)
+        self.__seed = kwargs.get('seed', 0)
+        self.__apuesta = kwargs.get('apuesta', 0)
+        self.__strategy = kwargs.get('strategy', 'greedy')
+        self.__plan = Adventure().loadPlan(adventure)
+        if self.__plan.type != 'money':
+            raise ValueError(f'{self.__plan.name} no es una aventura de dinero')
+        self.__DCs = None
+
+    def __str__(self):
+        return f'{self.__actor.name} @ {self.__plan.name}: {len(self.points)} puntos'
+
+    ### Getters & Setters ###
+    def __get_grid(self): return dict(self.__grid)
+    grid = property(__get_grid)
+    def __get_points(self):
+        parameters = list(self.__grid)
+        return [dict(zip(parameters, values)) for values in itertools.product(*self.__grid.values())]
+    points = property(__get_points)
+
+    ### Class Methods ###
+    # Personaje con los cambios de un punto de la grilla
+    def character(self, overrides):
+        return Character(snapshot=applyOverrides(self.__actor.snapshot, overrides))
+
+    # Evalúa todos los puntos de la grilla y el personaje base
+    def run(self):
+        """
+        Returns:
+            pandas.DataFrame: Una fila por punto con los valores de la grilla, level y proficiency del
+                personaje resultante, skills (las que usa en la aventura), expectedMoney y su error
+                estándar (0 si es exacto), moneyPerDay, lossProbability, y delta y deltaError: la
+                diferencia de dinero esperado con el personaje base (con method='simulate' el error
+                sale de la diferencia ciclo a ciclo, porque ambos usan las mismas tiradas)
+        """
+        base = self.__evaluate(self.__actor)
+        rows = list()
+        for overrides in self.points:
+            character = self.character(overrides)
+            result = self.__evaluate(character)
+            row = dict(overrides)
+            if 'items' in row:
+                row['items'] = ', '.join(row['items'] or ())
+            row['level'] = character.level
+            row['proficiency'] = character.proficiency
+            row['skills'] = result['skills']
+            row['expectedMoney'] = result['expectedMoney']
+            row['standardError'] = result['standardError']
+            row['moneyPerDay'] = result['expectedMoney']/self.__plan.comparison['days']
+            row['lossProbability'] = result['lossProbability']
+            row['delta'] = result['expectedMoney'] - base['expectedMoney']
+            row['deltaError'] = 0.
+            if result['money'] is not None:
+                difference = result['money'] - base['money']
+                row['deltaError'] = difference.std(ddof=1)/np.sqrt(len(difference))
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    # Cocina la aventura para un personaje y la evalúa
+    def __evaluate(self, character):
+        if self.__strategy == 'optimal':
+            cookedAdventure = cookOptimal(self.__adventure, character, apuesta=self.__apuesta, seed=self.__seed)
+        else:
+            cookedAdventure = Adventure().loadAdventure(self.__adventure, character, apuesta=self.__apuesta)
+        skills = ', '.join(cookedAdventure['rolls']['skillName'].tolist() + cookedAdventure['jokers']['skillName'].tolist())
+        if self.__method == 'exact':
+            evaluation = Adventure().evaluateMoneyAdventure(cookedAdventure)
+            return {'skills': skills, 'expectedMoney': evaluation['expectedMoney'], 'standardError': 0.,
+                    'lossProbability': evaluation['lossProbability'], 'money': None}
+        money = self.__simulate(cookedAdventure)
+        return {'skills': skills, 'expectedMoney': money.mean(), 'standardError': money.std(ddof=1)/np.sqrt(len(money)),
+                'lossProbability': (money < 0).mean(), 'money': money}
+
+    # Dinero de cada ciclo simulado, con las tiradas compartidas por todos los puntos
+    def __simulate(self, cookedAdventure):
+        comparison = cookedAdventure['comparison']
+        df_slots, nRolls, averages = prepareSlots(cookedAdventure)
+        matrix = np.column_stack([self.__column(slot, occurrence) for slot, occurrence in zip(
+            df_slots.itertuples(), df_slots.groupby('skillName').cumcount())])
+        bestRolls, _ = resolveRolls(matrix, nRolls, averages, comparison['ammount'])
+        if comparison['rollsDice']:
+            successes = (bestRolls >= self.__difficulties()).sum(axis=1)
+            table = np.array([cookedAdventure['prizes'][success] for success in range(comparison['ammount'] + 1)])
+            return table[successes].astype(float)
+        return maxValuePrizes(bestRolls.sum(axis=1), cookedAdventure['prizes']).astype(float)
+
+    # Tiradas simuladas de una skill para el personaje del punto
+    def __column(self, slot, occurrence):
+        """
+        El generador depende sólo de la skill (y de cuántas veces se repite en la aventura), no del
+        personaje: los d20 son los mismos en todos los puntos y sólo cambian los modificadores.
+        """
+        skills = list(SKILL_LOOKUP) + ['weaponAttack']
+        rng = spawnGenerator(self.__seed, skills.index(slot.skillName), occurrence)
+        return slot.skill.checkMany(self.__samples, advantage=slot.advantage, extraBonuses=slot.bonus, rng=rng)
+
+    # Dificultades simuladas, compartidas por todos los puntos
+    def __difficulties(self):
+        if self.__DCs is None:
+            comparison = self.__plan.comparison
+            rng = spawnGenerator(self.__seed, len(SKILL_LOOKUP) + 1)
+            self.__DCs = comparison['dice'].rollMany(self.__samples*comparison['ammount'], rng=rng).reshape(
+                self.__samples, comparison['ammount'])
+        return self.__DCs